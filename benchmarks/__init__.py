@@ -0,0 +1,7 @@
+"""
+Benchmarks for dedlin.
+
+These are plain scripts, run them from the repository root, e.g.
+
+    python -m benchmarks.bench_list_output --lines 1000000
+"""
@@ -0,0 +1,40 @@
+"""
+Throughput of loading and saving compressed documents, next to plain text.
+
+Nothing uncompressed is written to disk, the stdlib codecs stream in BLOCK_SIZE chunks.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import best_of, make_lines
+from dedlin import file_system
+
+
+def run(line_count: int, repeat: int) -> None:
+    """Time a save and a load per suffix.
+
+    Args:
+        line_count (int): Document size
+        repeat (int): Runs per measurement
+    """
+    lines = make_lines(line_count)
+    megabytes = sum(len(line) + 1 for line in lines) / 1024 / 1024
+    print(f"{line_count:,} lines, {megabytes:,.0f} MB uncompressed", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as folder:
+        for suffix in ("", *file_system.COMPRESSED_SUFFIXES):
+            path = Path(folder) / f"sample.txt{suffix}"
+            label = suffix or "plain"
+            save = best_of(repeat, lambda: file_system.save_and_overwrite(path, lines, "\n"))
+            load = best_of(repeat, lambda: file_system.read_file(path))
+            print(f"{label:<8} {megabytes / save:8,.1f} MB/s save {megabytes / load:8,.1f} MB/s load")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=2)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.repeat)
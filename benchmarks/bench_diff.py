@@ -0,0 +1,59 @@
+"""
+DIFF of a million line document with scattered edits, against difflib.unified_diff.
+
+difflib can take minutes on repetitive text, pass --skip_difflib to time DIFF alone.
+"""
+
+import argparse
+import difflib
+import random
+import sys
+import time
+
+from benchmarks.common import make_lines, report
+from dedlin.tools.diff import unified_diff
+
+
+def run(line_count: int, edits: int, skip_difflib: bool) -> None:
+    """Diff the same edits both ways.
+
+    Args:
+        line_count (int): Document size
+        edits (int): Lines changed, inserted or deleted
+        skip_difflib (bool): Only time DIFF
+    """
+    generator = random.Random(0)
+    old = [f"{number} {line}" for number, line in enumerate(make_lines(line_count))]
+    new = list(old)
+    for _ in range(edits):
+        spot = generator.randrange(len(new))
+        choice = generator.random()
+        if choice < 0.4:
+            new[spot] = "changed"
+        elif choice < 0.7:
+            new.insert(spot, "added")
+        else:
+            del new[spot]
+    print(f"{line_count:,} lines, {edits:,} edits", file=sys.stderr)
+
+    start = time.perf_counter()
+    ours = sum(1 for _ in unified_diff(old, new, "old", "new"))
+    seconds = time.perf_counter() - start
+    if skip_difflib:
+        report("DIFF", seconds)
+        return
+    start = time.perf_counter()
+    theirs = sum(1 for _ in difflib.unified_diff(old, new, "old", "new", lineterm=""))
+    baseline = time.perf_counter() - start
+    report("difflib.unified_diff", baseline)
+    report("DIFF", seconds, baseline=baseline)
+    print(f"{ours:,} diff lines, difflib {theirs:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--edits", type=int, default=1_000)
+    parser.add_argument("--skip_difflib", action="store_true")
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.edits, arguments.skip_difflib)
@@ -0,0 +1,251 @@
+"""
+Document operations across document sizes, with stored baselines and a regression check.
+
+Each case runs a real command through Dedlin.execute_command, output is formatted and thrown away.
+
+    python -m benchmarks.bench_document                      # 1k and 100k lines
+    python -m benchmarks.bench_document --sizes 1000000 10000000
+    python -m benchmarks.bench_document --save               # record baselines
+    python -m benchmarks.bench_document --check              # exit 1 on regression
+
+Baselines are seconds per case and size in baselines.json next to this file. They are only
+comparable on the machine that recorded them, record them again before checking elsewhere.
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from benchmarks.common import make_app, make_lines
+from dedlin.basic_types import Command
+from dedlin.main import Dedlin
+from dedlin.parsers import parse_command
+
+BASELINES = Path(__file__).with_name("baselines.json")
+"""Stored seconds per case and size."""
+
+DEFAULT_THRESHOLD = 1.5
+"""A case regressed if it is this many times slower than its baseline."""
+
+NOISE_FLOOR = 0.005
+"""Seconds below which timings are too noisy to call a regression."""
+
+SPELL_LINES = 100
+"""SPELL looks for a correction of every unknown word, so the same few lines are checked at any size."""
+
+ENGLISH = "The quick brown fox jumpz over the lazy dog near the sea."
+"""Line for SPELL with one typo, lorem ipsum is nothing but unknown words."""
+
+
+class Case(NamedTuple):
+    """One benchmark"""
+
+    name: str
+    command: Callable[[int], Command]
+    """Command for a document of n lines."""
+    setup: Optional[Callable[[Dedlin], None]] = None
+    """Untimed, before each run."""
+
+
+def _changed(app: Dedlin) -> None:
+    """Make a change to undo and to save.
+
+    Args:
+        app (Dedlin): The app
+    """
+    assert app.doc is not None
+    app.doc.reverse()
+
+
+def _english(app: Dedlin) -> None:
+    """Put words the spell checker knows at the top.
+
+    Args:
+        app (Dedlin): The app
+    """
+    assert app.doc is not None
+    app.doc.lines[:SPELL_LINES] = [ENGLISH] * SPELL_LINES
+
+
+def _uncached(app: Dedlin) -> None:
+    """Make the text differ from the last run, textstat caches its results by text.
+
+    Args:
+        app (Dedlin): The app
+    """
+    assert app.doc is not None
+    app.doc.lines.append(str(time.perf_counter_ns()))
+
+
+def parsed(text: Callable[[int], str]) -> Callable[[int], Command]:
+    """Command typed at the prompt.
+
+    Args:
+        text (Callable[[int], str]): Command text for a document of n lines
+
+    Returns:
+        Callable[[int], Command]: The parsed command for a document of n lines
+    """
+    return lambda size: parse_command(text(size), current_line=1, document_length=size, headless=True)
+
+
+CASES = [
+    Case("LIST", parsed(lambda size: "1,$ LIST")),
+    Case("SEARCH", parsed(lambda size: "SEARCH voluptatem")),
+    Case("REPLACE", parsed(lambda size: "REPLACE voluptatem walrus")),
+    Case("COPY", parsed(lambda size: f"1,{max(1, size // 100)} COPY {size // 2 + 1}")),
+    Case("MOVE", parsed(lambda size: f"1,{max(1, size // 100)} MOVE {size // 2 + 1}")),
+    Case("DELETE", parsed(lambda size: f"1,{max(1, size // 100)} DELETE")),
+    Case("SORT", parsed(lambda size: "SORT")),
+    Case("UNDO", parsed(lambda size: "UNDO"), setup=_changed),
+    Case("SPELL", parsed(lambda size: f"1,{SPELL_LINES} SPELL"), setup=_english),
+    Case("INFO", parsed(lambda size: "INFO"), setup=_uncached),
+    Case("SAVE", parsed(lambda size: "SAVE"), setup=_changed),
+]
+
+
+def discard(text: Optional[str], end: str = "\n") -> None:
+    """Outputter that formats nothing further and keeps nothing.
+
+    Args:
+        text (Optional[str]): The text
+        end (str): The line end
+    """
+
+
+def time_load(path: Path) -> float:
+    """Time opening a document.
+
+    Args:
+        path (Path): The document
+
+    Returns:
+        float: Seconds
+    """
+    app = make_app([], discard)
+    start = time.perf_counter()
+    app.entry_point(str(path))
+    return time.perf_counter() - start
+
+
+def time_case(case: Case, lines: list[str], path: Path, repeat: int) -> float:
+    """Time a case on a fresh copy of the document, keep the fastest run.
+
+    Args:
+        case (Case): The case
+        lines (list[str]): The document
+        path (Path): Where SAVE writes
+        repeat (int): Runs
+
+    Returns:
+        float: Seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        app = make_app(list(lines), discard)
+        app.file_path = path
+        app.quit_safety = False
+        assert app.doc is not None
+        if case.setup:
+            case.setup(app)
+        command = case.command(len(lines))
+        start = time.perf_counter()
+        app.execute_command(command)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes: list[int], repeat: int) -> dict[str, float]:
+    """Time every case at every size.
+
+    Args:
+        sizes (list[int]): Document sizes in lines
+        repeat (int): Runs per case, the fastest counts
+
+    Returns:
+        dict[str, float]: Seconds by "case@size"
+    """
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "document.txt"
+        for size in sizes:
+            lines = make_lines(size)
+            with open(path, "w", encoding="utf-8") as file:
+                file.writelines(line + "\n" for line in lines)
+            print(f"{size:,} lines", file=sys.stderr)
+            results[f"load@{size}"] = min(time_load(path) for _ in range(repeat))
+            for case in CASES:
+                results[f"{case.name}@{size}"] = time_case(case, lines, path, repeat)
+    return results
+
+
+def regressions(results: dict[str, float], baselines: dict[str, float], threshold: float) -> list[str]:
+    """Cases that got slower than threshold times their baseline.
+
+    Args:
+        results (dict[str, float]): Seconds by case
+        baselines (dict[str, float]): Stored seconds by case
+        threshold (float): Allowed slowdown
+
+    Returns:
+        list[str]: Descriptions of the regressions
+    """
+    found = []
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        if baseline is None or seconds < NOISE_FLOOR:
+            continue
+        if seconds > baseline * threshold:
+            found.append(f"{key} {seconds:.3f}s, baseline {baseline:.3f}s ({seconds / baseline:.1f}x slower)")
+    return found
+
+
+def print_table(results: dict[str, float], baselines: dict[str, float]) -> None:
+    """Print results next to their baselines.
+
+    Args:
+        results (dict[str, float]): Seconds by case
+        baselines (dict[str, float]): Stored seconds by case
+    """
+    for key, seconds in results.items():
+        baseline = baselines.get(key)
+        compared = f"  ({seconds / baseline:.2f}x the baseline time)" if baseline else ""
+        print(f"{key:<24} {seconds:10.4f}s{compared}")
+
+
+def main() -> int:
+    """Command line entry point.
+
+    Returns:
+        int: Exit code, 1 if --check found a regression
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="store these results as the baselines")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a case regressed")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    arguments = parser.parse_args()
+
+    baselines: dict[str, float] = json.loads(BASELINES.read_text(encoding="utf-8")) if BASELINES.exists() else {}
+    results = run(arguments.sizes, arguments.repeat)
+    print_table(results, baselines)
+
+    if arguments.save:
+        baselines.update(results)
+        BASELINES.write_text(json.dumps(dict(sorted(baselines.items())), indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baselines to {BASELINES}", file=sys.stderr)
+    if arguments.check:
+        found = regressions(results, baselines, arguments.threshold)
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Peak memory of EXPORT to html, the whole document at once against a block at a time.
+
+Pass --megabytes 500 for the large document case, the whole document render needs several GB.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import mistune
+
+from benchmarks.common import report
+from dedlin.tools.export import stream_markdown
+
+
+def whole_document(lines: list[str], path: Path) -> None:
+    """Export the way it used to be done.
+
+    Args:
+        lines (list[str]): The markdown
+        path (Path): Where to write
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(mistune.create_markdown()("\n".join(lines)))
+
+
+def streamed(lines: list[str], path: Path) -> None:
+    """Export a block at a time.
+
+    Args:
+        lines (list[str]): The markdown
+        path (Path): Where to write
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        file.writelines(stream_markdown(lines, "\n"))
+
+
+def measure(export: Callable[[list[str], Path], None], lines: list[str], path: Path) -> tuple[float, int]:
+    """Time an export and trace its peak allocation.
+
+    Args:
+        export (Callable[[list[str], Path], None]): The export
+        lines (list[str]): The markdown
+        path (Path): Where to write
+
+    Returns:
+        tuple[float, int]: Seconds and peak bytes
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    export(lines, path)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run(megabytes: float) -> None:
+    """Export the same document both ways.
+
+    Args:
+        megabytes (float): Document size
+    """
+    section = [
+        "## Walrus sighting",
+        "",
+        "A *walrus* was seen near the **ice**, see [notes](http://example.com).",
+        "",
+        "- tusks",
+        "- whiskers",
+        "",
+    ]
+    section_size = sum(len(line) + 1 for line in section)
+    lines = section * max(1, int(megabytes * 1024 * 1024) // section_size)
+    print(f"{megabytes:,.1f} MB, {len(lines):,} lines", file=sys.stderr)
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "export.html"
+        whole_seconds, whole_peak = measure(whole_document, lines, path)
+        stream_seconds, stream_peak = measure(streamed, lines, path)
+
+    report("whole document", whole_seconds)
+    report("block at a time", stream_seconds, baseline=whole_seconds)
+    print(f"peak memory {whole_peak / 1024 / 1024:,.1f} MB whole, {stream_peak / 1024 / 1024:,.1f} MB streamed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=float, default=5)
+    arguments = parser.parse_args()
+    run(arguments.megabytes)
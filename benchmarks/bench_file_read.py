@@ -0,0 +1,67 @@
+"""
+Load time of a big file, text mode line by line versus the block reader.
+
+Pass --megabytes 1024 for the 1 GB case, it needs a few GB of free memory and disk.
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.common import best_of, make_lines, report
+from dedlin import file_system
+
+
+def line_by_line(path: Path) -> list[str]:
+    """The reader before block reading.
+
+    Args:
+        path (Path): The path
+
+    Returns:
+        list[str]: The lines
+    """
+    with open(str(path), encoding="utf-8") as file:
+        return [line.rstrip("\r\n") for line in file]
+
+
+def write_sample(path: Path, megabytes: int, line_break: str) -> None:
+    """Write lorem ipsum until the file is big enough.
+
+    Args:
+        path (Path): Where
+        megabytes (int): How big
+        line_break (str): Line break to use
+    """
+    chunk = (line_break.join(make_lines(10_000)) + line_break).encode("utf-8")
+    with open(str(path), "wb") as file:
+        for _ in range(max(1, megabytes * 1024 * 1024 // len(chunk))):
+            file.write(chunk)
+
+
+def run(megabytes: int, repeat: int) -> None:
+    """Compare readers on LF and CRLF files.
+
+    Args:
+        megabytes (int): File size
+        repeat (int): Runs per measurement
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        for label, line_break in (("LF", "\n"), ("CRLF", "\r\n")):
+            path = Path(folder) / f"sample_{label}.txt"
+            write_sample(path, megabytes, line_break)
+            print(f"Reading {path.stat().st_size / 1024 / 1024:,.0f} MB, {label}", file=sys.stderr)
+            old = best_of(repeat, lambda: line_by_line(path))
+            new = best_of(repeat, lambda: file_system.read_file_with_format(path))
+            report(f"text mode line by line, {label}", old)
+            report(f"block reader, {label}", new, baseline=old)
+            path.unlink()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=128)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    run(arguments.megabytes, arguments.repeat)
@@ -0,0 +1,76 @@
+"""
+Headless macro throughput, output going to a NullPrinter versus a do-nothing callable.
+
+A NullPrinter, which is what --quiet --no_display --headless sets up, lets Dedlin skip
+formatting display text and status lines. A do-nothing callable gets everything formatted
+and then thrown away, like before.
+
+SPELL is left out of the macro, its overlay costs seconds per line and would drown out
+everything else (the fast path skips it entirely).
+"""
+
+import argparse
+import sys
+from typing import Optional
+
+from benchmarks.common import best_of, make_app, make_lines, report
+from dedlin.basic_types import NullPrinter, Printable
+from dedlin.command_sources import StringCommandGenerator
+
+MACRO = [
+    "1,$ REPLACE dolor DOLOR",
+    "1,$ SEARCH voluptatem",
+    "1,$ LIST",
+    "1,$ REPLACE DOLOR dolor",
+    "1 CURRENT",
+]
+
+
+def discard(text: Optional[str], end: str = "\n") -> None:
+    """Throw output away without Dedlin knowing.
+
+    Args:
+        text (Optional[str]): The text
+        end (str): The end
+    """
+
+
+def run_macro(lines: list[str], commands: int, outputter: Printable, quiet: bool) -> None:
+    """Run the macro once.
+
+    Args:
+        lines (list[str]): The document
+        commands (int): How many commands to run
+        outputter (Printable): The outputter
+        quiet (bool): Quiet mode
+    """
+    script = "\n".join(MACRO[index % len(MACRO)] for index in range(commands))
+    app = make_app(list(lines), outputter)
+    app.quiet = quiet
+    app.run_command_source(StringCommandGenerator(script))
+
+
+def run(line_count: int, commands: int, repeat: int) -> None:
+    """Compare with and without the fast path.
+
+    Args:
+        line_count (int): Document size
+        commands (int): Commands in the macro
+        repeat (int): Runs per measurement
+    """
+    lines = make_lines(line_count)
+    print(f"{commands:,} headless commands on {line_count:,} lines", file=sys.stderr)
+    slow = best_of(repeat, lambda: run_macro(lines, commands, discard, quiet=False))
+    fast = best_of(repeat, lambda: run_macro(lines, commands, NullPrinter(), quiet=True))
+    report("formatted then discarded", slow)
+    report("NullPrinter fast path", fast, baseline=slow)
+    print(f"{commands / fast:,.0f} commands per second on the fast path")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--commands", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.commands, arguments.repeat)
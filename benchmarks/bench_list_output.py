@@ -0,0 +1,43 @@
+"""
+LIST 1,$ to /dev/null, one print() per line versus the buffered printer.
+
+Standard out is line buffered on a terminal, so the line buffered numbers are the
+ones closer to interactive use.
+"""
+
+import argparse
+import sys
+
+from benchmarks.common import best_of, make_app, make_lines, report, to_devnull
+from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.outputters.buffered import BufferedPrinter
+from dedlin.outputters.plain import plain_printer
+
+
+def run(line_count: int, repeat: int) -> None:
+    """Compare outputters for a full LIST.
+
+    Args:
+        line_count (int): Document size
+        repeat (int): Runs per measurement
+    """
+    lines = make_lines(line_count)
+    command = Command(Commands.LIST, LineRange(start=1, offset=line_count - 1))
+    print(f"LIST 1,$ of {line_count:,} lines to /dev/null", file=sys.stderr)
+    for line_buffered in (False, True):
+        label = "line buffered" if line_buffered else "block buffered"
+        with to_devnull(line_buffered):
+            plain_app = make_app(lines, plain_printer)
+            plain = best_of(repeat, lambda: plain_app.execute_command(command))
+            buffered_app = make_app(lines, BufferedPrinter())
+            buffered = best_of(repeat, lambda: buffered_app.execute_command(command))
+        report(f"plain_printer, {label}", plain)
+        report(f"BufferedPrinter, {label}", buffered, baseline=plain)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.repeat)
@@ -0,0 +1,77 @@
+"""
+Scaling of UPPER over a big range with worker count, threads and processes against one thread.
+
+Threads only scale on a free-threaded python, the string commands use them automatically there.
+Processes are measured to show why they aren't used: the main process has to build every result
+string again from what the workers send back, which costs about as much as UPPER itself.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable
+
+from benchmarks.common import best_of, make_lines, report
+from dedlin.string_comands import CHUNK_LINES, gil_enabled, parallel_map
+
+
+def _apply(transform: Callable[[str], str], chunk: list[str]) -> list[str]:
+    """Transform a chunk in a worker process.
+
+    Args:
+        transform (Callable[[str], str]): Applied to each line
+        chunk (list[str]): The lines
+
+    Returns:
+        list[str]: The transformed lines
+    """
+    return list(map(transform, chunk))
+
+
+def process_map(transform: Callable[[str], str], lines: list[str], workers: int) -> list[str]:
+    """Transform chunks on a process pool, results in order.
+
+    Args:
+        transform (Callable[[str], str]): Applied to each line
+        lines (list[str]): The lines
+        workers (int): Processes
+
+    Returns:
+        list[str]: The transformed lines
+    """
+    chunks = [lines[start : start + CHUNK_LINES] for start in range(0, len(lines), CHUNK_LINES)]
+    result: list[str] = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(_apply, repeat(transform), chunks):
+            result.extend(chunk)
+    return result
+
+
+def run(line_count: int, worker_counts: list[int], repeat_count: int) -> None:
+    """Time one thread, then each worker count both ways.
+
+    Args:
+        line_count (int): Document size
+        worker_counts (list[int]): Worker counts to try
+        repeat_count (int): Runs per measurement
+    """
+    lines = make_lines(line_count)
+    print(f"{line_count:,} lines, {os.cpu_count()} CPUs, GIL {'on' if gil_enabled() else 'off'}", file=sys.stderr)
+    serial = best_of(repeat_count, lambda: list(map(str.upper, lines)))
+    report("one thread", serial)
+    for workers in worker_counts:
+        threads = best_of(repeat_count, lambda: parallel_map(str.upper, lines, workers))
+        report(f"{workers} threads", threads, baseline=serial)
+        processes = best_of(repeat_count, lambda: process_map(str.upper, lines, workers))
+        report(f"{workers} processes", processes, baseline=serial)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=1)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.workers, arguments.repeat)
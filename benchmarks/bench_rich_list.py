@@ -0,0 +1,65 @@
+"""
+LIST of a large Python file, plain versus rich, line by line versus batched.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+from rich.console import Console
+from rich.syntax import Syntax
+
+from benchmarks.common import best_of, make_app, report, to_devnull
+from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.outputters.buffered import BufferedPrinter
+from dedlin.outputters.rich_output import RichPrinter
+
+
+def python_lines(count: int) -> list[str]:
+    """Repeat dedlin's own source until it is long enough.
+
+    Args:
+        count (int): How many lines
+
+    Returns:
+        list[str]: The lines
+    """
+    source = (Path(__file__).parent.parent / "dedlin" / "main.py").read_text(encoding="utf-8").splitlines()
+    return [source[index % len(source)] for index in range(count)]
+
+
+def run(line_count: int, repeat: int) -> None:
+    """Compare outputters for a full LIST of a python file.
+
+    Args:
+        line_count (int): Document size
+        repeat (int): Runs per measurement
+    """
+    lines = python_lines(line_count)
+    command = Command(Commands.LIST, LineRange(start=1, offset=line_count - 1))
+    print(f"LIST 1,$ of {line_count:,} lines of python to /dev/null", file=sys.stderr)
+    with open(os.devnull, "w", encoding="utf-8") as devnull, to_devnull():
+        console = Console(file=devnull, force_terminal=True)
+
+        def per_line(text: Optional[str], end: str = "\n") -> None:
+            """How the rich outputter used to work, a Syntax and a lexer lookup per line."""
+            console.print(Syntax(text or "", "python", line_numbers=False), end="")
+
+        plain = best_of(repeat, lambda: make_app(lines, BufferedPrinter()).execute_command(command))
+        old_rich = best_of(repeat, lambda: make_app(lines, per_line).execute_command(command))
+        batched_rich = best_of(
+            repeat, lambda: make_app(lines, RichPrinter(console=console)).execute_command(command)
+        )
+    report("plain", plain)
+    report("rich, Syntax per line", old_rich)
+    report("rich, batched", batched_rich, baseline=old_rich)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=1)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.repeat)
@@ -0,0 +1,49 @@
+"""
+SAVE latency for a big file with one line changed near the end.
+
+Pass --megabytes 2048 for the 2 GB case, it needs a few GB of free memory and twice that in disk.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import make_lines, report
+from dedlin import file_system
+
+
+def run(megabytes: int) -> None:
+    """Time a full rewrite against rewriting the tail.
+
+    Args:
+        megabytes (int): File size
+    """
+    line = make_lines(1)[0]
+    lines = [line] * max(1, megabytes * 1024 * 1024 // (len(line) + 1))
+    with tempfile.TemporaryDirectory() as folder:
+        path = Path(folder) / "big.log"
+        file_system.save_and_overwrite(path, lines, "\n")
+        print(f"{path.stat().st_size / 1024 / 1024:,.0f} MB, {len(lines):,} lines", file=sys.stderr)
+
+        lines[-1] = "one line changed"
+        start = time.perf_counter()
+        file_system.save_and_overwrite(path, lines, "\n")
+        full = time.perf_counter() - start
+
+        signature = file_system.file_signature(path)
+        lines[-1] = "one more line changed"
+        start = time.perf_counter()
+        file_system.save_document(path, lines, "\n", unchanged_lines=len(lines) - 1, signature=signature)
+        tail = time.perf_counter() - start
+
+    report("temp file and rename", full)
+    report("rewrite changed tail", tail, baseline=full)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--megabytes", type=int, default=256)
+    arguments = parser.parse_args()
+    run(arguments.megabytes)
@@ -0,0 +1,63 @@
+"""
+SORT NOCASE on a big range, all keys at once against runs merged from temporary files.
+
+Pass --lines 10000000 for the 10M line case, that needs a few GB for the document itself.
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import report
+from dedlin.tools.sorting import EXTERNAL_SORT_LINES, SortOptions, sorted_lines
+
+
+def measure(lines: list[str], options: SortOptions, run_size: int) -> tuple[float, int]:
+    """Time a sort and trace its peak allocation, the document itself not included.
+
+    Args:
+        lines (list[str]): The lines
+        options (SortOptions): How to sort
+        run_size (int): Lines per run
+
+    Returns:
+        tuple[float, int]: Seconds and peak bytes
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    sorted_lines(lines, options, run_size=run_size)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def run(line_count: int, run_size: int) -> None:
+    """Sort the same lines both ways.
+
+    Args:
+        line_count (int): Document size
+        run_size (int): Lines per run for the external sort
+    """
+    generator = random.Random(0)
+    words = ["Walrus", "seal", "ORCA", "narwhal", "Beluga", "otter"]
+    lines = [f"{generator.choice(words)} {generator.randrange(1_000_000)} tusk" for _ in range(line_count)]
+    options = SortOptions(ignore_case=True)
+    print(f"{line_count:,} lines, runs of {run_size:,}", file=sys.stderr)
+
+    memory_seconds, memory_peak = measure(lines, options, run_size=len(lines))
+    external_seconds, external_peak = measure(lines, options, run_size=run_size)
+
+    report("all keys in memory", memory_seconds)
+    report("merged runs", external_seconds, baseline=memory_seconds)
+    print(f"peak memory {memory_peak / 1024 / 1024:,.1f} MB in memory, {external_peak / 1024 / 1024:,.1f} MB merged")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--run_size", type=int, default=EXTERNAL_SORT_LINES // 10)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.run_size)
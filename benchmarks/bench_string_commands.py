@@ -0,0 +1,57 @@
+"""
+UPPER and STRIP over a big range, the old per line if/elif chain against the resolved transform.
+
+The default is the 5M line case, pass a smaller --lines for a quick run.
+"""
+
+import argparse
+import sys
+
+from benchmarks.common import best_of, make_lines, report
+from dedlin.basic_types import Command, Commands
+from dedlin.string_comands import process_strings
+
+
+def per_line_chain(lines: list[str], command: Command) -> None:
+    """How string commands used to run, the chain is evaluated again for every line.
+
+    Args:
+        lines (list[str]): The lines
+        command (Command): The command
+    """
+    for index, line in enumerate(lines):
+        if command.command == Commands.STRIP:
+            lines[index] = line.strip()
+        elif command.command == Commands.LSTRIP:
+            lines[index] = line.lstrip()
+        elif command.command == Commands.RSTRIP:
+            lines[index] = line.rstrip()
+        elif command.command == Commands.LOWER:
+            lines[index] = line.lower()
+        elif command.command == Commands.UPPER:
+            lines[index] = line.upper()
+
+
+def run(line_count: int, repeat: int) -> None:
+    """Time both ways for each command.
+
+    Args:
+        line_count (int): Document size
+        repeat (int): Runs per measurement
+    """
+    template = [f"  {line}  " for line in make_lines(line_count)]
+    print(f"{line_count:,} lines", file=sys.stderr)
+    for kind in (Commands.UPPER, Commands.STRIP):
+        command = Command(kind)
+        old = best_of(repeat, lambda: per_line_chain(list(template), command))
+        new = best_of(repeat, lambda: process_strings(list(template), command))
+        report(f"{kind.name} if/elif per line", old)
+        report(f"{kind.name} resolved once", new, baseline=old)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=5_000_000)
+    parser.add_argument("--repeat", type=int, default=2)
+    arguments = parser.parse_args()
+    run(arguments.lines, arguments.repeat)
@@ -0,0 +1,99 @@
+"""
+Shared helpers for the benchmark scripts.
+"""
+
+import os
+import time
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, Iterator, Optional
+
+from dedlin.basic_types import CommandGeneratorProtocol, Printable
+from dedlin.command_sources import InMemoryCommandGenerator
+from dedlin.document_sources import InMemoryInputter
+from dedlin.main import Dedlin
+from dedlin.tools.lorem_data import LOREM_IPSUM
+
+
+def make_lines(count: int) -> list[str]:
+    """Generate a document of lorem ipsum lines.
+
+    Args:
+        count (int): How many lines
+
+    Returns:
+        list[str]: The lines
+    """
+    return [LOREM_IPSUM[index % len(LOREM_IPSUM)] for index in range(count)]
+
+
+def make_app(
+    lines: list[str], outputter: Printable, inputter: Optional[CommandGeneratorProtocol] = None
+) -> Dedlin:
+    """Make a headless Dedlin with a document already loaded.
+
+    Args:
+        lines (list[str]): The document
+        outputter (Printable): The outputter
+        inputter (Optional[CommandGeneratorProtocol]): Command source. Defaults to no commands.
+
+    Returns:
+        Dedlin: The app
+    """
+    app = Dedlin(
+        inputter=inputter if inputter is not None else InMemoryCommandGenerator([]),
+        insert_document_inputter=InMemoryInputter([]),
+        edit_document_inputter=InMemoryInputter([]),
+        outputter=outputter,
+        headless=True,
+        history=False,
+    )
+    app.entry_point(os.devnull)
+    assert app.doc is not None
+    app.doc.lines = lines
+    app.doc.current_line = 1 if lines else 0
+    return app
+
+
+@contextmanager
+def to_devnull(line_buffered: bool = False) -> Iterator[None]:
+    """Send standard out to /dev/null for the duration.
+
+    Args:
+        line_buffered (bool): Flush on every newline, like stdout on a terminal. Defaults to False.
+
+    Yields:
+        None: Nothing
+    """
+    buffering = 1 if line_buffered else -1
+    with open(os.devnull, "w", buffering=buffering, encoding="utf-8") as devnull, redirect_stdout(devnull):
+        yield
+
+
+def best_of(repeat: int, action: Callable[[], object]) -> float:
+    """Time an action, keep the fastest run.
+
+    Args:
+        repeat (int): How many runs
+        action (Callable[[], object]): The action
+
+    Returns:
+        float: Seconds for the fastest run
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str, seconds: float, baseline: Optional[float] = None) -> None:
+    """Print one result row.
+
+    Args:
+        name (str): The name of the measurement
+        seconds (float): How long it took
+        baseline (Optional[float]): Another measurement to compare against
+    """
+    speedup = f"  ({baseline / seconds:.1f}x)" if baseline else ""
+    print(f"{name:<40} {seconds:10.3f}s{speedup}")
@@ -14,6 +14,7 @@ from dedlin.flash import title_screen
 from dedlin.logging_utils import configure_logging
 from dedlin.main import Dedlin
 from dedlin.outputters import rich_output, talking_outputter
+from dedlin.outputters.buffered import BufferedPrinter, buffered_printer
 from dedlin.outputters.plain import plain_printer
 
 # All the parts necessary to implement an alternative to __main__
@@ -30,4 +31,6 @@ __all__ = [
     "rich_output",
     "talking_outputter",
     "plain_printer",
+    "BufferedPrinter",
+    "buffered_printer",
 ]
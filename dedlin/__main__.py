@@ -15,15 +15,30 @@ Options:
   --halt_on_error    End program on error.
   --promptless_quit  Skip prompt on quit.
   --vim_mode         User hostile, no feedback.
+  --quiet            No feedback, only output of display commands.
   --verbose          Displaying all debugging info.
   --blind_mode       Optimize for blind users (experimental).
   --headless         Run without interactive prompts.
+  --pager            LIST shows one screen at a time.
+  --no_display       With --headless, apply edits but show no document text.
+  --autosave=<sec>   Write a recovery file every so many seconds.
+  --timing=<json>    Time each command, write the totals to a JSON file at exit.
+  --profile=<file>   Profile the whole session, write a pstats file at exit.
+  --trace_memory     Trace allocations with tracemalloc, INFO shows where memory went.
+  --max_memory=<mb>  Refuse commands that add lines once the process uses this many megabytes.
+  --buffer_memory=<mb>  Evict buffers not in use once open buffers take this many megabytes.
+  --async_loop       Run commands on an asyncio loop, Ctrl-C cancels a slow command such as BROWSE.
+  --concurrent_reads  With --async_loop, SEARCH, SPELL, INFO, EXPORT and DIFF run on a snapshot while edits go on.
+  --trace=<jsonl>    Append OpenTelemetry spans for each macro, command and file operation to a file.
+  --metrics=<prom>   Keep Prometheus metrics in a file for node_exporter's textfile collector.
+  --web_cache=<dir>  Keep pages BROWSE fetched in a folder, fetched again only when they changed.
 """
 
 import logging
 import logging.config
 import sys
 import traceback
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Optional
 
@@ -36,11 +51,16 @@ from dedlin.flash import title_screen
 from dedlin.logging_utils import configure_logging
 from dedlin.main import Dedlin
 from dedlin.outputters import rich_output, talking_outputter
-from dedlin.outputters.plain import plain_printer
+from dedlin.outputters.buffered import buffered_printer
+from dedlin.tools import memory, metrics, profiling, tracing, web
+from dedlin.tools.timing import CommandTimings
 from dedlin.ui_exit import confirm_exit
 
 logger = logging.getLogger(__name__)
 
+SPEECH_EXIT_TIMEOUT = 5.0
+"""Seconds to let queued speech finish on exit."""
+
 
 def main() -> None:
     """Main function."""
@@ -53,9 +73,23 @@ def main() -> None:
         macro_file_name=arguments["--macro"],
         quit_safety=not arguments["--promptless_quit"],
         vim_mode=bool(arguments["--vim_mode"]),
+        quiet=bool(arguments["--quiet"]),
+        no_display=bool(arguments["--no_display"]),
         verbose=bool(arguments["--verbose"]),
         blind_mode=bool(arguments["--blind_mode"]),
         headless=bool(arguments["--headless"]),
+        pager=bool(arguments["--pager"]),
+        autosave=float(arguments["--autosave"]) if arguments["--autosave"] else None,
+        timing=arguments["--timing"],
+        profile=arguments["--profile"],
+        trace_memory=bool(arguments["--trace_memory"]),
+        max_memory=float(arguments["--max_memory"]) if arguments["--max_memory"] else None,
+        buffer_memory=float(arguments["--buffer_memory"]) if arguments["--buffer_memory"] else None,
+        async_loop=bool(arguments["--async_loop"]),
+        concurrent_reads=bool(arguments["--concurrent_reads"]),
+        trace=arguments["--trace"],
+        metrics_file=arguments["--metrics"],
+        web_cache=arguments["--web_cache"],
     )
     sys.exit(0)
 
@@ -67,9 +101,23 @@ def run(
     halt_on_error: bool = False,
     quit_safety: bool = False,
     vim_mode: bool = False,
+    quiet: bool = False,
+    no_display: bool = False,
     verbose: bool = False,
     blind_mode: bool = False,
     headless: bool = False,
+    pager: bool = False,
+    autosave: Optional[float] = None,
+    timing: Optional[str] = None,
+    profile: Optional[str] = None,
+    trace_memory: bool = False,
+    max_memory: Optional[float] = None,
+    buffer_memory: Optional[float] = None,
+    async_loop: bool = False,
+    concurrent_reads: bool = False,
+    trace: Optional[str] = None,
+    metrics_file: Optional[str] = None,
+    web_cache: Optional[str] = None,
 ) -> Dedlin:
     """Set up everything except things from command line.
 
@@ -80,9 +128,26 @@ def run(
         halt_on_error (bool): Whether to halt on error. Defaults to False.
         quit_safety (bool): Whether to quit safely. Defaults to False.
         vim_mode (bool): Whether to use vim mode. Defaults to False.
+        quiet (bool): Whether to suppress feedback. Defaults to False.
+        no_display (bool): Whether to discard document text in headless runs. Defaults to False.
         verbose (bool): Whether to be verbose. Defaults to False.
         blind_mode (bool): Whether to use blind mode. Defaults to False.
         headless (bool): Whether to run headless. Defaults to False.
+        pager (bool): Whether LIST shows one screen at a time. Defaults to False.
+        autosave (Optional[float]): Seconds between recovery file writes. Defaults to None, no autosave.
+        timing (Optional[str]): File to write per command timings to at exit. Defaults to None, no timing.
+        profile (Optional[str]): File to write a pstats profile of the session to. Defaults to None, no profile.
+        trace_memory (bool): Trace allocations with tracemalloc. Defaults to False.
+        max_memory (Optional[float]): Megabytes the process may use before commands that add lines are refused.
+            Defaults to None, no limit.
+        buffer_memory (Optional[float]): Megabytes the lines of all open buffers may take before the least recently
+            used are evicted. Defaults to None, no limit.
+        async_loop (bool): Run commands on an asyncio loop, cancellable with Ctrl-C. Defaults to False.
+        concurrent_reads (bool): With async_loop, run read-only commands on a snapshot without waiting for them.
+            Defaults to False.
+        trace (Optional[str]): File to append trace spans to as JSON lines. Defaults to None, no tracing.
+        metrics_file (Optional[str]): File to keep Prometheus metrics in. Defaults to None, no metrics.
+        web_cache (Optional[str]): Folder to cache fetched pages in. Defaults to None, no cache.
 
     Returns:
         Dedlin: The dedlin object.
@@ -97,14 +162,14 @@ def run(
 
     if blind_mode:
         logger.info("Blind mode. UI should talk.")
-        printer = talking_outputter.printer
+        printer = talking_outputter.talking_printer
         echo = True
     elif file_name and file_name.endswith(".py"):
         logger.info("Rich mode. UI should be colorful.")
-        printer = rich_output.printer
+        printer = rich_output.rich_printer
     else:
         logger.info("Plain mode. UI should be dull.")
-        printer = plain_printer
+        printer = buffered_printer
 
     if macro_file_name:
         the_command_generator = CommandGenerator(Path(macro_file_name))
@@ -135,24 +200,56 @@ def run(
     dedlin.echo = echo
     dedlin.quit_safety = quit_safety
     dedlin.vim_mode = vim_mode
+    dedlin.quiet = quiet
+    dedlin.no_display = no_display
     dedlin.verbose = verbose
-    while True:
-        # pylint: disable=broad-except
-        try:
-            sys.excepthook = dedlin.save_on_crash
-            dedlin.entry_point(file_name, macro_file_name)
-            if not vim_mode:
-                break
-        except KeyboardInterrupt:
-            confirm_exit(-1, None)
-            if not vim_mode:
-                break
+    dedlin.pager = pager
+    dedlin.autosave_interval = autosave
+    dedlin.async_loop = async_loop
+    dedlin.concurrent_reads = concurrent_reads
+    if trace_memory:
+        memory.start_tracing()
+    if max_memory:
+        dedlin.memory_ceiling = memory.MemoryCeiling(int(max_memory * memory.MEGABYTE))
+        if memory.process_bytes() is None:
+            # no /proc to read the process size from
+            memory.start_tracing()
+    if buffer_memory:
+        dedlin.buffers.budget = int(buffer_memory * memory.MEGABYTE)
+    if timing:
+        dedlin.timings = CommandTimings()
+        dedlin.timing_path = Path(timing)
+    if profile:
+        dedlin.profile_path = Path(profile)
+    if trace:
+        tracing.start(Path(trace))
+    if metrics_file:
+        metrics.start(Path(metrics_file))
+    if web_cache:
+        web.start_cache(Path(web_cache))
+    with profiling.profiled(dedlin.profiler, Path(profile)) if profile else nullcontext():
+        while True:
+            # pylint: disable=broad-except
+            try:
+                sys.excepthook = dedlin.save_on_crash
+                dedlin.entry_point(file_name, macro_file_name)
+                if not vim_mode:
+                    break
+            except KeyboardInterrupt:
+                confirm_exit(-1, None)
+                if not vim_mode:
+                    break
 
-        except Exception as the_exception:
-            dedlin.save_on_crash(type(the_exception), the_exception, None)
-            print(traceback.format_exc())
-            break
+            except Exception as the_exception:
+                dedlin.save_on_crash(type(the_exception), the_exception, None)
+                print(traceback.format_exc())
+                break
     dedlin.final_report()
+    tracing.stop()
+    metrics.stop()
+    if blind_mode:
+        # let the last words out, but don't hang on a stuck speech driver
+        talking_outputter.talking_printer.wait(timeout=SPEECH_EXIT_TIMEOUT)
     return dedlin
 
 
@@ -5,7 +5,7 @@ Basic classes and mypy types
 import dataclasses
 import logging
 from enum import Enum, auto
-from typing import Generator, Optional, Protocol, runtime_checkable
+from typing import AsyncIterator, ContextManager, Generator, Optional, Protocol, runtime_checkable
 
 from pydantic import field_validator
 from pydantic.dataclasses import dataclass
@@ -26,6 +26,7 @@ class Commands(Enum):
     SEARCH = auto()
     SPELL = auto()
     CURRENT = auto()
+    DIFF = auto()
 
     # edit commands
     INSERT = auto()
@@ -52,6 +53,7 @@ class Commands(Enum):
     SHUFFLE = auto()
     SORT = auto()
     REVERSE = auto()
+    DEDUPE = auto()
 
     # Commands and Macros
     HISTORY = auto()
@@ -63,6 +65,9 @@ class Commands(Enum):
     UNDO = auto()
     UNKNOWN = auto()
     INFO = auto()
+    TIMING = auto()
+    PROFILE = auto()
+    BUFFER = auto()
     CRASH = auto()
 
     # print
@@ -409,6 +414,21 @@ class Printable(Protocol):
         """
 
 
+@runtime_checkable
+class BatchingPrintable(Printable, Protocol):
+    """A printable that can hold output back and write it as one block"""
+
+    def batch(self) -> ContextManager[None]:
+        """Defer writes until the end of the block.
+
+        Returns:
+            ContextManager[None]: Flushes pending output on exit
+        """
+
+    def flush(self) -> None:
+        """Write out anything pending."""
+
+
 class NullPrinter:
     """Something that acts like print()"""
 
@@ -460,3 +480,38 @@ class StringGeneratorProtocol(Protocol):
         Returns:
             Generator[str, None, None]: The strings
         """
+
+
+@runtime_checkable
+class AsyncCommandGeneratorProtocol(Protocol):
+    """Something stateful that can generate commands without blocking the event loop"""
+
+    prompt: str
+    document_length: int
+    current_line: int
+
+    def generate(
+        self,
+    ) -> AsyncIterator[Command]:
+        """Generate commands.
+
+        Returns:
+            AsyncIterator[Command]: The commands
+        """
+
+
+@runtime_checkable
+class AsyncStringGeneratorProtocol(Protocol):
+    """Something stateful that can generate strings without blocking the event loop"""
+
+    prompt: str
+    default: str
+
+    def generate(
+        self,
+    ) -> AsyncIterator[str]:
+        """Generate strings.
+
+        Returns:
+            AsyncIterator[str]: The strings
+        """
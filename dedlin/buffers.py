@@ -0,0 +1,347 @@
+"""
+Several documents open in one session, one of them active.
+
+Dedlin's document, file and file format attributes read through to the active buffer, so switching
+buffers changes one reference. Everything else, caches included, is shared by all buffers.
+
+Under a memory budget the least recently used inactive buffers give up their lines. Lines that
+still match their file are read from it again when the buffer is next used, changed lines are
+spilled to a temporary file.
+"""
+
+import contextvars
+import copy
+import itertools
+import logging
+import marshal
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Generic, Iterator, Optional, TypeVar
+
+import dedlin.file_system as file_system
+from dedlin.document import Document
+from dedlin.tools.memory import POINTER_BYTES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = "main"
+"""Name of the first buffer when there is no file."""
+
+STRING_BYTES = sys.getsizeof("")
+"""Size of an empty line, each character of an ascii line adds a byte."""
+
+T = TypeVar("T")
+
+class Buffer:
+    """A document and the file it came from"""
+
+    def __init__(self, name: str) -> None:
+        """Set up initial state.
+
+        Args:
+            name (str): Name to switch to it by
+        """
+        self.name = name
+        self.doc: Optional[Document] = None
+        self.file_path: Optional[Path] = None
+        self.preferred_line_break = "\n"
+        self.encoding = "utf-8"
+        self.file_signature: Optional[file_system.FileSignature] = None
+        self.last_used = 0
+        """Bigger is more recent"""
+        self.evicted = False
+        """Lines given up to save memory, see load()"""
+        self.evicted_lines = 0
+        self.spill_path: Optional[Path] = None
+        """Where changed lines went when evicted"""
+        self.chars_per_line = 0.0
+        """Measured when the lines were read, for estimated_bytes()"""
+
+    @property
+    def line_count(self) -> int:
+        """Lines in the buffer, evicted or not.
+
+        Returns:
+            int: The count
+        """
+        if self.evicted:
+            return self.evicted_lines
+        return len(self.doc.lines) if self.doc else 0
+
+    def measure(self) -> None:
+        """Note the average line length, one pass over the lines."""
+        lines = self.doc.lines if self.doc else []
+        self.chars_per_line = sum(map(len, lines)) / len(lines) if lines else 0.0
+
+    def estimated_bytes(self) -> int:
+        """Memory the lines take up, without a pass over them.
+
+        Returns:
+            int: Bytes, 0 if evicted
+        """
+        if self.evicted or self.doc is None:
+            return 0
+        return int(len(self.doc.lines) * (POINTER_BYTES + STRING_BYTES + self.chars_per_line))
+
+    def evict(self, folder: Path) -> bool:
+        """Give up the lines, spilling them to a file in folder if the document's own file won't do.
+
+        Args:
+            folder (Path): Where spill files go
+
+        Returns:
+            bool: False if the lines couldn't be spilled and were kept
+        """
+        doc = self.doc
+        if doc is None or self.evicted:
+            return True
+        lines = doc.release()
+        unchanged_on_disk = (
+            not doc.dirty
+            and self.file_signature is not None
+            and file_system.file_signature(self.file_path) == self.file_signature
+        )
+        if not unchanged_on_disk:
+            handle, name = tempfile.mkstemp(dir=str(folder), suffix=".lines")
+            try:
+                with os.fdopen(handle, "wb") as file:
+                    marshal.dump(lines, file)
+            except OSError as exception:
+                logger.warning(f"Couldn't spill buffer {self.name}: {exception}")
+                Path(name).unlink(missing_ok=True)
+                doc.restore(lines)
+                return False
+            self.spill_path = Path(name)
+        self.evicted = True
+        self.evicted_lines = len(lines)
+        return True
+
+    def load(self) -> None:
+        """Take back the lines given up by evict()."""
+        if not self.evicted or self.doc is None:
+            return
+        if self.spill_path is not None:
+            with open(self.spill_path, "rb") as file:
+                lines = marshal.load(file)
+            self.discard()
+        else:
+            lines = file_system.read_file(self.file_path)
+            # someone may have changed the file since, then that is what was read
+            self.file_signature = file_system.file_signature(self.file_path)
+        self.doc.restore(lines)
+        self.evicted = False
+
+    def discard(self) -> None:
+        """Delete the spill file, if any."""
+        if self.spill_path is not None:
+            self.spill_path.unlink(missing_ok=True)
+            self.spill_path = None
+
+    def view(self) -> "Buffer":
+        """Read-only copy of the buffer as it is now, its document a view, see Document.view().
+
+        The file, its format and signature are captured along with the lines, switching buffers
+        or saving later doesn't change them.
+
+        Returns:
+            Buffer: The view
+        """
+        view = copy.copy(self)
+        view.doc = self.doc.view() if self.doc is not None else None
+        return view
+
+
+VIEW: contextvars.ContextVar[Optional[Buffer]] = contextvars.ContextVar("dedlin_view", default=None)
+"""Read-only view of a buffer the commands of the current context run against instead of the active buffer."""
+
+
+class BufferManager:
+    """The open buffers and which one is active"""
+
+    def __init__(self, budget: Optional[int] = None) -> None:
+        """Set up initial state.
+
+        Args:
+            budget (Optional[int]): Bytes the lines of all buffers may take up. Defaults to None, no limit.
+        """
+        self.budget = budget
+        self.buffers: dict[str, Buffer] = {}
+        self.uses = itertools.count(1)
+        self.spill_folder: Optional[Path] = None
+        self.current = self.add(DEFAULT_NAME)
+        self.current.last_used = next(self.uses)
+
+    def __iter__(self) -> Iterator[Buffer]:
+        """Buffers in the order they were opened.
+
+        Returns:
+            Iterator[Buffer]: The buffers
+        """
+        return iter(self.buffers.values())
+
+    def __len__(self) -> int:
+        """How many buffers are open.
+
+        Returns:
+            int: The count
+        """
+        return len(self.buffers)
+
+    def unique_name(self, name: str) -> str:
+        """A name no buffer has, numbered if taken, e.g. notes.txt<2>.
+
+        Args:
+            name (str): The name wanted
+
+        Returns:
+            str: The name to use
+        """
+        if name not in self.buffers:
+            return name
+        for number in itertools.count(2):
+            candidate = f"{name}<{number}>"
+            if candidate not in self.buffers:
+                return candidate
+        raise AssertionError("unreachable")
+
+    def add(self, name: str) -> Buffer:
+        """Add an empty buffer, without switching to it.
+
+        Args:
+            name (str): The name wanted
+
+        Returns:
+            Buffer: The buffer
+        """
+        buffer = Buffer(self.unique_name(name))
+        self.buffers[buffer.name] = buffer
+        return buffer
+
+    def rename(self, buffer: Buffer, name: str) -> None:
+        """Give a buffer another name.
+
+        Args:
+            buffer (Buffer): The buffer
+            name (str): The name wanted
+        """
+        del self.buffers[buffer.name]
+        buffer.name = self.unique_name(name)
+        self.buffers[buffer.name] = buffer
+
+    def switch(self, name: str) -> Optional[Buffer]:
+        """Make a buffer the active one, reading its lines back in if they were evicted.
+
+        Args:
+            name (str): The buffer
+
+        Returns:
+            Optional[Buffer]: The buffer, None if there is no such buffer
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None:
+            return None
+        buffer.load()
+        buffer.last_used = next(self.uses)
+        self.current = buffer
+        self.enforce_budget()
+        return buffer
+
+    def close(self, name: str) -> bool:
+        """Close a buffer, switching to the most recently used other one if it was active.
+
+        Args:
+            name (str): The buffer
+
+        Returns:
+            bool: False if there is no such buffer or it is the only one
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None or len(self.buffers) == 1:
+            return False
+        buffer.discard()
+        del self.buffers[name]
+        if buffer is self.current:
+            latest = max(self.buffers.values(), key=lambda other: other.last_used)
+            self.switch(latest.name)
+        return True
+
+    def enforce_budget(self) -> list[str]:
+        """Evict the least recently used inactive buffers until the estimated total fits the budget.
+
+        Returns:
+            list[str]: Names of the buffers evicted
+        """
+        if self.budget is None:
+            return []
+        inactive = [buffer for buffer in self.buffers.values() if buffer is not self.current and not buffer.evicted]
+        total = sum(buffer.estimated_bytes() for buffer in inactive) + self.current.estimated_bytes()
+        evicted = []
+        for buffer in sorted(inactive, key=lambda buffer: buffer.last_used):
+            if total <= self.budget:
+                break
+            size = buffer.estimated_bytes()
+            if buffer.evict(self.folder()):
+                total -= size
+                evicted.append(buffer.name)
+        return evicted
+
+    def folder(self) -> Path:
+        """Folder for spill files, made when first needed.
+
+        Returns:
+            Path: The folder
+        """
+        if self.spill_folder is None:
+            self.spill_folder = Path(tempfile.mkdtemp(prefix="dedlin-buffers-"))
+        return self.spill_folder
+
+    def cleanup(self) -> None:
+        """Delete spill files, e.g. at exit."""
+        for buffer in self.buffers.values():
+            buffer.discard()
+        if self.spill_folder is not None:
+            shutil.rmtree(self.spill_folder, ignore_errors=True)
+            self.spill_folder = None
+
+
+class BufferAttribute(Generic[T]):
+    """Attribute of Dedlin that belongs to the active buffer, so it changes when buffers are switched"""
+
+    name = ""
+
+    def __init__(self, override: Optional[contextvars.ContextVar[Any]] = None) -> None:
+        """Set up initial state.
+
+        Args:
+            override (Optional[contextvars.ContextVar[Any]]): Buffer read instead when set, e.g. VIEW. Defaults to None.
+        """
+        self.override = override
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> T:
+        if instance is None:
+            return self  # type: ignore[return-value]
+        return getattr(self.owner(instance), self.name)  # type: ignore[no-any-return]
+
+    def __set__(self, instance: Any, value: T) -> None:
+        setattr(self.owner(instance), self.name, value)
+
+    def owner(self, instance: Any) -> Buffer:
+        """The buffer the attribute is read from, the override's if set, else the active one.
+
+        Args:
+            instance (Any): The Dedlin
+
+        Returns:
+            Buffer: The buffer
+        """
+        if self.override is not None:
+            view = self.override.get()
+            if view is not None:
+                return view  # type: ignore[no-any-return]
+        return instance.buffers.current  # type: ignore[no-any-return]
@@ -4,8 +4,9 @@ Interactive command input methods.
 These handle history, syntax highlighting, and auto-suggestion.
 """
 
+import asyncio
 from pathlib import Path
-from typing import Any, Generator, Iterable, Optional
+from typing import Any, AsyncIterator, Generator, Iterable, Optional
 
 import questionary
 from prompt_toolkit import PromptSession
@@ -16,7 +17,9 @@ from prompt_toolkit.styles.pygments import style_from_pygments_cls
 from pydantic import ValidationError
 from pygments.styles import get_style_by_name
 
+import dedlin.basic_types as basic_types
 from dedlin.basic_types import Command
+from dedlin.file_system import open_text
 from dedlin.parsers import parse_command
 from dedlin.pygments_code import EdLexer
 
@@ -150,7 +153,8 @@ class CommandGenerator:
             Generator[Command, None, None]: The commands
         """
 
-        with open(str(self.macro_path), encoding="utf-8") as file:
+        # compressed macros are decompressed as they are read
+        with open_text(self.macro_path) as file:
             for line in file:
                 command = parse_command(
                     line.strip("\n").strip("\r"),
@@ -212,3 +216,65 @@ class StringCommandGenerator:
                 line.strip("\r"), current_line=self.current_line, document_length=self.document_length, headless=True
             )
             yield command
+
+
+class AsyncCommandGenerator:
+    """Any command source as an async one, each command is waited for on a worker thread
+
+    Implements AsyncCommandGeneratorProtocol. The worker thread has no event loop of its own,
+    so prompt_toolkit can still prompt there while the loop carries on with output.
+    """
+
+    def __init__(self, source: basic_types.CommandGeneratorProtocol, blocking: bool = True) -> None:
+        """Initialize the generator.
+
+        Args:
+            source (basic_types.CommandGeneratorProtocol): The synchronous source
+            blocking (bool): Whether the source waits, e.g. for typing. Macro files and strings don't,
+                they are read on the loop, skipping a thread hop per command. Defaults to True.
+        """
+        self.source = source
+        self.blocking = blocking
+
+    @property
+    def prompt(self) -> str:
+        """The source's prompt."""
+        return self.source.prompt
+
+    @prompt.setter
+    def prompt(self, value: str) -> None:
+        self.source.prompt = value
+
+    @property
+    def current_line(self) -> int:
+        """The source's current line, for parsing relative ranges."""
+        return self.source.current_line
+
+    @current_line.setter
+    def current_line(self, value: int) -> None:
+        self.source.current_line = value
+
+    @property
+    def document_length(self) -> int:
+        """The source's document length, for parsing relative ranges."""
+        return self.source.document_length
+
+    @document_length.setter
+    def document_length(self, value: int) -> None:
+        self.source.document_length = value
+
+    async def generate(
+        self,
+    ) -> AsyncIterator[Command]:
+        """Pull commands from the source off the event loop.
+
+        Returns:
+            AsyncIterator[Command]: The commands
+        """
+        commands = self.source.generate()
+        done = object()
+        while True:
+            command = await asyncio.to_thread(next, commands, done) if self.blocking else next(commands, done)
+            if command is done:
+                return
+            yield command
@@ -2,6 +2,7 @@
 Abstract document class.
 """
 
+import copy
 import logging
 import random
 from typing import Any, Generator, Optional
@@ -9,13 +10,18 @@ from typing import Any, Generator, Optional
 import icontract
 from pydantic.dataclasses import dataclass
 
+import dedlin.tools.dedupe as dedupe
 import dedlin.tools.lorem_data as lorem_data
+import dedlin.tools.sorting as sorting
 import dedlin.tools.spelling_overlay as spelling_overlay
 from dedlin.basic_types import LineRange, Phrases, StringGeneratorProtocol
 from dedlin.utils.exceptions import DedlinException
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PAGE_SIZE = 5
+"""Lines in a page when there is no terminal to size it to."""
+
 
 @dataclass(frozen=True)
 class EditStatus:
@@ -72,12 +78,23 @@ class Document:
         self.previous_lines = lines
         self.previous_current_line = 0
         self.dirty = False
-
-    def list_doc(self, line_range: Optional[LineRange] = None) -> Generator[tuple[str, str], None, None]:
+        self.dirty_from: Optional[int] = None
+        """Index of the first line that may differ from the file, None if none do."""
+        self.tracked_lines = lines
+        """The list dirty_from is about. If self.lines is replaced wholesale, everything may differ."""
+        self.version = 0
+        """Goes up with every change, to tell snapshots apart."""
+        self.shared = False
+        """A view or snapshot holds self.lines, the next edit works on a copy instead."""
+
+    def list_doc(
+        self, line_range: Optional[LineRange] = None, window: Optional[int] = None
+    ) -> Generator[tuple[str, str], None, None]:
         """Display lines specified by range, do not advance current line.
 
         Args:
             line_range (Optional[LineRange]): The range. Defaults to None.
+            window (Optional[int]): Show at most this many lines from the start of the range. Defaults to all.
 
         Raises:
             ValueError: If line_range is invalid
@@ -91,6 +108,14 @@ class Document:
 
         # self.current_line = line_range.start
 
+        if window is not None:
+            # only the window is sliced out, gutter wide enough for the whole range
+            first = max(line_range.start, 1)
+            width = len(str(min(line_range.end, len(self.lines))))
+            for line_number, line_text in enumerate(self.lines[first - 1 : first - 1 + window], start=first):
+                yield f"   {line_number:>{width}} : {line_text}", "\n"
+            return
+
         # slice handles the case where the range is beyond the end of the document
         line_number = line_range.start
         for line_text in self.lines[line_range.to_slice()]:
@@ -143,8 +168,9 @@ class Document:
         self.current_line = line_range.start - 1
         for index, line_text in zip(range(line_range.start - 1, end_of_range + 1), parts):
             if line_text:
+                self._unshare()
                 self.lines[index] = line_text
-                self.dirty = True  # this is ugly
+                self.mark_dirty(index)
                 self.current_line += 1
             else:
                 break
@@ -165,58 +191,93 @@ class Document:
         Returns:
             Generator[str, None, None]: The lines
         """
+        for index in self.replace_quietly(line_range, target, replacement):
+            yield f"   {index + 1} : {self.lines[index]}"
+
+    def replace_quietly(
+        self,
+        line_range: Optional[LineRange],
+        target: str,
+        replacement: str,
+    ) -> list[int]:
+        """Replace target with replacement in lines, without formatting anything for display.
+
+        Args:
+            line_range (Optional[LineRange]): The range
+            target (str): The target
+            replacement (str): The replacement
 
+        Returns:
+            list[int]: Indexes of the lines that changed
+        """
         if not line_range:
             line_range = LineRange(1, len(self.lines) - 1)
-        self.current_line = line_range.start - 1
+        first_index = line_range.start - 1
+        window = self.lines[line_range.to_slice()]
 
-        for line_text in self.lines[line_range.to_slice()]:
+        changed = []
+        for index, line_text in enumerate(window, start=first_index):
             if target in line_text:
-                line_text = line_text.replace(target, replacement)
-                self.lines[self.current_line] = line_text
-                self.dirty = True  # this is ugly
-                yield f"   {self.current_line + 1 } : {line_text}"
-            if self.current_line <= len(self.lines):
-                self.current_line += 1
-            else:
-                break
-
-    def page(self, page_size: int = 5) -> Generator[tuple[str, str], None, None]:
-        """Display lines in pages.
+                self._unshare()
+                self.lines[index] = line_text.replace(target, replacement)
+                changed.append(index)
+        if changed:
+            self.mark_dirty(changed[0])
+        self.current_line = first_index + len(window)
+        return changed
+
+    def page(
+        self, page_size: int = DEFAULT_PAGE_SIZE, start: Optional[int] = None
+    ) -> Generator[tuple[str, str], None, None]:
+        """Display lines in pages, only the window is ever touched.
 
         Args:
             page_size (int): The page size. Defaults to 5.
+            start (Optional[int]): Jump to this line first. Defaults to the current line.
 
         Returns:
             Generator[tuple[str, str], None, None]: The lines
         """
+        if start is not None:
+            self.current_line = max(1, min(start, len(self.lines)))
+        first = max(self.current_line, 1)
+        window = self.lines[first - 1 : first - 1 + page_size]
 
-        # TODO: add asterix to new current line
-        for line_text in self.lines[self.current_line - 1 : self.current_line + page_size - 1]:
-            yield f"   {self.current_line} : {line_text}", "\n"
-            self.current_line += 1
-            if self.current_line - 1 >= len(self.lines):
-                break
+        # next page starts after this one
+        self.current_line = min(first + len(window), len(self.lines))
 
-        # repair if necessary
-        self.current_line = min(self.current_line, len(self.lines))
+        # TODO: add asterix to new current line
+        # gutter wide enough for the last line number in the document
+        width = len(str(len(self.lines)))
+        for line_number, line_text in enumerate(window, start=first):
+            yield f"   {line_number:>{width}} : {line_text}", "\n"
 
     def spell(self, line_range: LineRange) -> Generator[tuple[str, str], None, None]:
-        """Show spelling errors in range.
+        """Show spelling errors in range. Moves the current line past the range right away.
 
         Args:
             line_range (LineRange): The range
 
         Returns:
-            Generator[tuple[str, str], None, None]: The lines
+            Generator[tuple[str, str], None, None]: The lines, checked only as they are read
         """
+        window = self.lines[line_range.start - 1 : line_range.end]
+        self.current_line = min(line_range.start + len(window), len(self.lines) + 1)
+        return self._spell_lines(window, line_range.start)
 
-        # reset current line to start of range.
-        self.current_line = line_range.start
-        for line_text in self.lines[line_range.start - 1 : line_range.end]:
+    def _spell_lines(self, window: list[str], first_line: int) -> Generator[tuple[str, str], None, None]:
+        """Spelling overlay for lines of the document.
+
+        Args:
+            window (list[str]): The lines
+            first_line (int): Line number of the first line
+
+        Returns:
+            Generator[tuple[str, str], None, None]: The lines
+        """
+        for line_number, line_text in enumerate(window, start=first_line):
             end = "" if line_text[:-1] == "\n" else "\n"
-            yield f"   {self.current_line} : {spelling_overlay.check(line_text)}", end
-            self.current_line += 1
+            yield f"   {line_number} : {spelling_overlay.check(line_text)}", end
 
     def copy(self, line_range: Optional[LineRange], target_line: int) -> None:
         """Copy lines to target_line.
@@ -229,10 +290,9 @@ class Document:
             line_range = LineRange(1, len(self.lines) - 1)
 
         to_copy = self.lines[line_range.start - 1 : line_range.end].copy()
-        # doesn't seem efficient but no obvious built-in way to do this
         self.backup()
-        self.lines = self.lines[0 : target_line - 1] + to_copy + self.lines[target_line - 1 :]
-        self.dirty = True  # this is ugly
+        self.lines[target_line - 1 : target_line - 1] = to_copy
+        self.mark_dirty(target_line - 1)
         self.current_line = target_line
         logger.debug(f"Copied {line_range} to {target_line}")
 
@@ -275,8 +335,8 @@ class Document:
             # This should be covered by the validation above, but just in case
             raise ValueError("Invalid target line for move")
 
-        self.lines = new_lines
-        self.dirty = True
+        self.lines[:] = new_lines
+        self.mark_dirty(min(target_line, line_range.start) - 1)
         self.current_line = target_line
         logger.debug(f"Moving {line_range} to {target_line}")
 
@@ -306,11 +366,11 @@ class Document:
         try:
             if line_range.start == line_range.end:
                 self.lines.pop(line_range.start - 1)
-                self.dirty = True  # this is ugly
+                self.mark_dirty(line_range.start - 1)
             else:
                 for index in range(line_range.end - 1, line_range.start - 2, -1):
                     self.lines.pop(index)
-                    self.dirty = True  # this is ugly
+                    self.mark_dirty(index)
         except IndexError:
             logger.debug(f"Can't delete {line_range}")
             return False
@@ -331,7 +391,7 @@ class Document:
         self.current_line = line_range.start
         for index in range(line_range.start, line_range.end):
             self.lines.insert(index, value)
-            self.dirty = True  # this is ugly
+            self.mark_dirty(index)
             self.current_line += 1
         logger.debug(f"Filled {line_range} with {value}")
 
@@ -376,7 +436,7 @@ class Document:
             return EditStatus(can_edit_again=False, text=None, line_edited=None)
 
         self.lines[line_number - 1] = new_line
-        self.dirty = True  # this is ugly
+        self.mark_dirty(line_number - 1)
         self.current_line = line_number
         logger.debug(f"Edited {line_number}")
         if self.current_line >= len(self.lines):
@@ -394,7 +454,7 @@ class Document:
         self.backup()
         for line in lines:
             self.lines.insert(line_number - 1, line)
-            self.dirty = True  # this is ugly
+            self.mark_dirty(line_number - 1)
             self.current_line = line_number
             line_number += 1
             logger.debug(f"Pushed at {line_number}")
@@ -424,7 +484,7 @@ class Document:
         if phrases:
             for phrase in phrases.as_list():
                 self.lines.insert(line_number - 1, phrase)
-                self.dirty = True
+                self.mark_dirty(line_number - 1)
                 self.current_line = line_number + 1
                 line_number += 1
             # HACK: if you don't do this, sequential scripted INSERT skip lines.
@@ -446,7 +506,7 @@ class Document:
             if user_input_text is not None:
                 accumulated_lines.append(user_input_text)
                 self.lines.insert(line_number - 1, user_input_text)
-                self.dirty = True  # this is ugly
+                self.mark_dirty(line_number - 1)
                 self.current_line = line_number
                 line_number += 1
         logger.debug(f"Inserted at {line_number}")
@@ -469,7 +529,7 @@ class Document:
         for i in range(lines_to_generate):
             text = lorem_data.LOREM_IPSUM[i % len(lorem_data.LOREM_IPSUM)]
             self.lines.insert(start_line - 1 + i, text)
-            self.dirty = True
+            self.mark_dirty(start_line - 1 + i)
             self.current_line = start_line + i
 
         logger.debug(f"Generated {lines_to_generate} lines")
@@ -477,37 +537,168 @@ class Document:
     def undo(self) -> None:
         """Undo last change"""
         self.lines = self.previous_lines
+        # the same list as previous_lines now, which views may hold
+        self.shared = True
+        self.version += 1
         if self.previous_current_line < 1:
             self.current_line = 1
         else:
             self.current_line = self.previous_current_line
         logger.debug("Undid last step")
 
-    def sort(self) -> None:
-        """Sort lines"""
+    def sort(self, line_range: Optional[LineRange] = None, options: Optional[sorting.SortOptions] = None) -> None:
+        """Sort lines
+
+        Args:
+            line_range (Optional[LineRange]): Lines to sort. Defaults to all.
+            options (Optional[sorting.SortOptions]): Keys, order, uniqueness. Defaults to plain text order.
+        """
         self.backup()
-        self.lines.sort()
-        self.dirty = True  # this is ugly
+        start, end = (line_range.start - 1, line_range.end) if line_range else (0, len(self.lines))
+        # slice assignment keeps the list, so tail saves still see lines before the range as unchanged
+        self.lines[start:end] = sorting.sorted_lines(self.lines[start:end], options or sorting.SortOptions())
+        self.current_line = min(self.current_line, len(self.lines))
+        self.mark_dirty(start)
         logger.debug("Sorted")
 
+    def dedupe(self, line_range: Optional[LineRange] = None, count: bool = False) -> int:
+        """Drop repeated lines, keeping the first of each
+
+        Args:
+            line_range (Optional[LineRange]): Lines to dedupe. Defaults to all.
+            count (bool): Prefix each kept line with how many times it occurred. Defaults to False.
+
+        Returns:
+            int: How many lines were dropped
+        """
+        start, end = (line_range.start - 1, line_range.end) if line_range else (0, len(self.lines))
+        kept, counts = dedupe.dedupe_lines(self.lines[start:end])
+        dropped = sum(counts) - len(kept)
+        if not dropped and not count:
+            return 0
+        self.backup()
+        self.lines[start:end] = dedupe.with_counts(kept, counts) if count else kept
+        self.current_line = min(self.current_line, len(self.lines))
+        self.mark_dirty(start)
+        logger.debug(f"Deduped, dropped {dropped}")
+        return dropped
+
     def reverse(self) -> None:
         """Reverse lines"""
         self.backup()
-        self.lines = list(reversed(self.lines))
-        self.dirty = True  # this is ugly
+        self.lines.reverse()
+        self.mark_dirty(0)
         logger.debug("Reversed")
 
     def shuffle(self) -> None:
         """Shuffle lines"""
         self.backup()
         random.shuffle(self.lines)
-        self.dirty = True  # this is ugly
+        self.mark_dirty(0)
         logger.debug("Shuffled")
 
+    def mark_dirty(self, from_index: int = 0) -> None:
+        """Note that lines from from_index on may no longer match the file.
+
+        Args:
+            from_index (int): Index of the first changed line. Defaults to 0, everything.
+        """
+        from_index = max(from_index, 0)
+        first_changed = self.first_changed_line()
+        self.version += 1
+        self.dirty = True
+        self.dirty_from = from_index if first_changed is None else min(first_changed, from_index)
+        self.tracked_lines = self.lines
+
+    def mark_clean(self) -> None:
+        """Note that all lines match the file, e.g. after saving."""
+        self.dirty = False
+        self.dirty_from = None
+        self.tracked_lines = self.lines
+
+    def first_changed_line(self) -> Optional[int]:
+        """Index of the first line that may differ from the file.
+
+        Returns:
+            Optional[int]: The index, None if nothing changed
+        """
+        if self.lines is not self.tracked_lines:
+            # replaced wholesale, e.g. by undo
+            return 0
+        return self.dirty_from
+
+    def snapshot(self) -> list[str]:
+        """The lines as they are now, later edits won't touch them.
+
+        Nothing is copied, the next edit copies the list instead, see backup().
+
+        Returns:
+            list[str]: The lines, don't change them
+        """
+        self.shared = True
+        return self.lines
+
+    def view(self) -> "Document":
+        """Read-only document as it is now, for commands that run on another thread while edits continue.
+
+        Shares the lines, current line and change tracking, nothing is copied until the next edit.
+        Edits to the view itself work on copies too, they never reach this document.
+
+        Returns:
+            Document: The view
+        """
+        self.shared = True
+        return copy.copy(self)
+
+    def _unshare(self) -> None:
+        """Make self.lines a list of our own before changing it in place."""
+        if not self.shared:
+            return
+        lines = self.lines.copy()
+        if self.tracked_lines is self.lines:
+            self.tracked_lines = lines
+        self.lines = lines
+        self.shared = False
+
+    def paste(self, target_line: int, lines: list[str]) -> None:
+        """Insert lines from elsewhere, e.g. another buffer, before target_line.
+
+        Args:
+            target_line (int): The target line
+            lines (list[str]): The lines
+        """
+        self.backup()
+        self.lines[target_line - 1 : target_line - 1] = lines
+        self.mark_dirty(target_line - 1)
+        self.current_line = target_line
+
+    def release(self) -> list[str]:
+        """Give up the lines and the undo copy, to free memory while the document isn't in use.
+
+        Returns:
+            list[str]: The lines, for restore()
+        """
+        lines = self.lines
+        self.lines = self.previous_lines = self.tracked_lines = []
+        return lines
+
+    def restore(self, lines: list[str]) -> None:
+        """Take back lines given up by release(). What was changed stays changed, UNDO has nothing to undo.
+
+        Args:
+            lines (list[str]): The lines
+        """
+        self.lines = self.previous_lines = self.tracked_lines = lines
+
     def backup(self) -> None:
         """Backup current state"""
         # TODO: call a mutator method instead of assigning to self.previous_lines
-        self.previous_lines = self.lines.copy()
+        if self.shared:
+            # the shared list can't change, so it is the backup and the edit goes to the copy
+            self.previous_lines = self.lines
+            self._unshare()
+        else:
+            self.previous_lines = self.lines.copy()
         self.previous_current_line = self.current_line
 
     def print(self, line_range: Optional[LineRange]) -> Generator[tuple[str, str], None, None]:
@@ -6,11 +6,14 @@ Python doesn't do this out of the box and there is a different solution
 for linux than for windows.
 """
 
-from typing import Generator, Iterable
+import asyncio
+from typing import Any, AsyncIterator, Generator, Iterable
 from unittest.mock import MagicMock
 
 import questionary
 
+from dedlin.basic_types import AsyncStringGeneratorProtocol, StringGeneratorProtocol
+
 PROBABLY_WINDOWS_ = False
 try:
     import readline
@@ -160,3 +163,122 @@ class PrefillInputter:
             yield value
         except KeyboardInterrupt:
             yield ""
+
+
+class AsyncStringGenerator:
+    """Any string source as an async one, each string is waited for on a worker thread
+
+    Implements AsyncStringGeneratorProtocol
+    """
+
+    def __init__(self, source: StringGeneratorProtocol) -> None:
+        """Set up the inputter.
+
+        Args:
+            source (StringGeneratorProtocol): The synchronous source
+        """
+        self.source = source
+
+    @property
+    def prompt(self) -> str:
+        """The source's prompt."""
+        return self.source.prompt
+
+    @prompt.setter
+    def prompt(self, value: str) -> None:
+        self.source.prompt = value
+
+    @property
+    def default(self) -> str:
+        """The source's prefilled text."""
+        return self.source.default
+
+    @default.setter
+    def default(self, value: str) -> None:
+        self.source.default = value
+
+    async def generate(
+        self,
+    ) -> AsyncIterator[str]:
+        """Pull strings from the source off the event loop.
+
+        Returns:
+            AsyncIterator[str]: The input
+        """
+        strings = self.source.generate()
+        done = object()
+        while True:
+            value = await asyncio.to_thread(next, strings, done)
+            if value is done:
+                return
+            yield value
+
+
+async def _next(iterator: AsyncIterator[str], done: Any) -> Any:
+    """anext() as a coroutine, for run_coroutine_threadsafe.
+
+    Args:
+        iterator (AsyncIterator[str]): The iterator
+        done (Any): Returned when it is exhausted
+
+    Returns:
+        Any: The next string or done
+    """
+    return await anext(iterator, done)
+
+
+class BlockingStringGenerator:
+    """An async string source for INSERT and EDIT, which run on a worker thread of the async command loop
+
+    Implements StringGeneratorProtocol. Each string is awaited on the event loop while the worker blocks,
+    so never call generate() on the loop's own thread.
+    """
+
+    def __init__(self, source: AsyncStringGeneratorProtocol, loop: asyncio.AbstractEventLoop) -> None:
+        """Set up the inputter.
+
+        Args:
+            source (AsyncStringGeneratorProtocol): The async source
+            loop (asyncio.AbstractEventLoop): The loop the source runs on
+        """
+        self.source = source
+        self.loop = loop
+
+    @property
+    def prompt(self) -> str:
+        """The source's prompt."""
+        return self.source.prompt
+
+    @prompt.setter
+    def prompt(self, value: str) -> None:
+        self.source.prompt = value
+
+    @property
+    def default(self) -> str:
+        """The source's prefilled text."""
+        return self.source.default
+
+    @default.setter
+    def default(self, value: str) -> None:
+        self.source.default = value
+
+    def generate(
+        self,
+    ) -> Generator[str, None, None]:
+        """Wait for each string from the async source.
+
+        Returns:
+            Generator[str, None, None]: The input
+        """
+        strings = self.source.generate()
+        done = object()
+        try:
+            while True:
+                value = asyncio.run_coroutine_threadsafe(_next(strings, done), self.loop).result()
+                if value is done:
+                    return
+                yield value
+        finally:
+            aclose = getattr(strings, "aclose", None)
+            if aclose is not None and self.loop.is_running():
+                asyncio.run_coroutine_threadsafe(aclose(), self.loop).result()
@@ -1,15 +1,47 @@
 """Primitive printing support"""
 
+from functools import lru_cache
 from pathlib import Path
-from typing import cast
+from typing import Generator, cast
 
 from markdown_it import MarkdownIt
 
+from dedlin.tools.export import markdown_block_texts
+
 # Support these?
 # from mdit_py_plugins.front_matter import front_matter_plugin
 # from mdit_py_plugins.footnote import footnote_plugin
 
 
+@lru_cache(maxsize=1)
+def get_markdown_it() -> MarkdownIt:
+    """Markdown-it parser, creating one is costly.
+
+    Returns:
+        MarkdownIt: The parser
+    """
+    return (
+        MarkdownIt("commonmark", {"breaks": True, "html": True})
+        # .use(front_matter_plugin)
+        # .use(footnote_plugin)
+        .enable("table")
+    )
+
+
+def render_blocks(lines: list[str]) -> Generator[str, None, None]:
+    """Render markdown to html a block at a time.
+
+    Args:
+        lines (list[str]): The lines
+
+    Returns:
+        Generator[str, None, None]: Html for each block
+    """
+    md = get_markdown_it()
+    for text in markdown_block_texts(lines, "\n"):
+        yield cast(str, md.render(text))
+
+
 def write_to_markdown(filename: str, lines: list[str]) -> str:
     """Write to html if markdown.
 
@@ -18,19 +50,13 @@ def write_to_markdown(filename: str, lines: list[str]) -> str:
         lines (list[str]): The lines
 
     Returns:
-        str: The html
+        str: The html file written, or for files that aren't markdown, the html itself
     """
-    md = (
-        MarkdownIt("commonmark", {"breaks": True, "html": True})
-        # .use(front_matter_plugin)
-        # .use(footnote_plugin)
-        .enable("table")
-    )
-    html_text = md.render("\n".join(lines))
     path = Path(filename)
     if path.suffix == ".md":
-        path.rename(path.with_suffix(".html"))
-        path.write_text(html_text, encoding="utf-8")
-    else:
-        print("Not markdown!")
-    return cast(str, html_text)
+        html_path = path.with_suffix(".html")
+        with open(html_path, "w", encoding="utf-8") as file:
+            file.writelines(render_blocks(lines))
+        return str(html_path)
+    print("Not markdown!")
+    return "".join(render_blocks(lines))
@@ -4,10 +4,109 @@ Class for reading and writing lines to disk.
 This could be document lines or macro lines.
 """
 
+import bz2
+import codecs
+import gzip
+import io
+import itertools
+import lzma
+import os
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Optional
+from typing import IO, Any, Callable, Optional
 
-from dedlin.tools.export import export_markdown
+from pydantic.dataclasses import dataclass
+
+from dedlin.tools import metrics, tracing
+from dedlin.tools.export import stream_markdown
+
+BLOCK_SIZE = 1024 * 1024
+"""Bytes to read and decode at a time."""
+
+COMPRESSED_SUFFIXES: dict[str, Callable[..., Any]] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+"""Documents and macros with these suffixes are streamed through the decompressor."""
+
+NOT_LINE_BREAKS = "\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+"""str.splitlines() splits on these too, text mode with universal newlines doesn't."""
+
+BYTE_ORDER_MARKS = (
+    # utf-32 first, its little endian mark starts with the utf-16 one
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+ASCII_COMPATIBLE = {"utf-8": "utf-8", "utf-8-sig": "utf-8", "latin-1": "latin-1"}
+"""Encodings where a line's byte length is cheap to work out, and what to encode a tail with."""
+
+MAX_TAIL_FRACTION = 0.5
+"""Rewrite in place only if the changed tail is at most this much of the file, else write a new file."""
+
+WRITE_CHUNK_LINES = 10_000
+"""Lines to encode and write at a time."""
+
+
+@dataclass(frozen=True)
+class FileSignature:
+    """Enough to tell if a file was changed by someone else since we last wrote it."""
+
+    path: str
+    size: int
+    modified_ns: int
+
+
+@dataclass(frozen=True)
+class TextFormat:
+    """How a file was stored, so that it can be saved the same way."""
+
+    encoding: str = "utf-8"
+    line_break: str = os.linesep
+    """What the platform uses, unless the file says otherwise"""
+    uniform: bool = True
+    """False if the file mixes line breaks, then byte offsets can't be worked out from the lines"""
+
+
+def open_binary(path: Path, mode: str = "rb") -> IO[bytes]:
+    """Open a file, decompressing or compressing on the fly if the suffix says so.
+
+    Args:
+        path (Path): The path
+        mode (str): "rb" or "wb". Defaults to "rb".
+
+    Returns:
+        IO[bytes]: The file
+    """
+    opener = COMPRESSED_SUFFIXES.get(path.suffix.lower())
+    if opener is None:
+        return open(str(path), mode)  # pylint: disable=consider-using-with
+    if "w" in mode:
+        # (de)compressors are happier with big chunks than with one line at a time
+        return io.BufferedWriter(opener(str(path), mode), buffer_size=BLOCK_SIZE)
+    return io.BufferedReader(opener(str(path), mode), buffer_size=BLOCK_SIZE)
+
+
+def open_text(path: Path, mode: str = "r", encoding: str = "utf-8", newline: Optional[str] = None) -> IO[str]:
+    """Open a text file, decompressing or compressing on the fly if the suffix says so.
+
+    Args:
+        path (Path): The path
+        mode (str): "r" or "w". Defaults to "r".
+        encoding (str): The encoding. Defaults to "utf-8".
+        newline (Optional[str]): Same as for open(). Defaults to None.
+
+    Returns:
+        IO[str]: The file
+    """
+    return io.TextIOWrapper(open_binary(path, mode + "b"), encoding=encoding, newline=newline)
 
 
 def read_or_create_file(path: Optional[Path]) -> list[str]:
@@ -19,15 +118,26 @@ def read_or_create_file(path: Optional[Path]) -> list[str]:
     Returns:
         list[str]: The lines
     """
+    return read_or_create_file_with_format(path)[0]
+
+
+def read_or_create_file_with_format(path: Optional[Path]) -> tuple[list[str], TextFormat]:
+    """Attempt to read file, create if it doesn't exist.
+
+    Args:
+        path (Optional[Path]): The path
+
+    Returns:
+        tuple[list[str], TextFormat]: The lines and how they were stored
+    """
 
     if path:
         if not path.exists():
-            with open(str(path.absolute()), "w", encoding="utf-8"):
+            # an empty archive for compressed suffixes
+            with open_binary(path.absolute(), "wb"):
                 pass
-        lines = read_file(path)
-    else:
-        lines = []
-    return lines
+        return read_file_with_format(path)
+    return [], TextFormat()
 
 
 def read_file(path: Optional[Path]) -> list[str]:
@@ -41,26 +151,291 @@ def read_file(path: Optional[Path]) -> list[str]:
     """
     if path is None:
         return []
-    with open(str(path), encoding="utf-8") as file:
-        return [line.rstrip("\r\n") for line in file]
+    return read_file_with_format(path)[0]
+
+
+def detect_encoding(head: bytes) -> str:
+    """Pick an encoding from the byte order mark, if any.
+
+    Args:
+        head (bytes): The first bytes of the file
+
+    Returns:
+        str: The encoding, utf-8 if there is no byte order mark
+    """
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return encoding
+    return "utf-8"
+
+
+def read_file_with_format(path: Path) -> tuple[list[str], TextFormat]:
+    """Read a file in large blocks, detecting encoding and line break on the way.
+
+    Files that are not valid utf-8 and have no byte order mark are read as latin-1.
+
+    Args:
+        path (Path): The path
+
+    Returns:
+        tuple[list[str], TextFormat]: The lines and how they were stored
+    """
+    with tracing.span("file.read", {"file.path": str(path)}) as span:
+        with open_binary(path) as file:
+            encoding = detect_encoding(file.read(4))
+        try:
+            lines, text_format = _read_blocks(path, encoding)
+        except UnicodeDecodeError:
+            lines, text_format = _read_blocks(path, "latin-1")
+        span.set("dedlin.file.lines", len(lines))
+        span.set("dedlin.file.encoding", text_format.encoding)
+        if metrics.METRICS is not None:
+            metrics.METRICS.read(len(lines))
+        return lines, text_format
+
+
+def detect_line_break(text: str) -> Optional[str]:
+    """Find the most common line break.
+
+    Args:
+        text (str): A sample of the file
+
+    Returns:
+        Optional[str]: The line break, None if there are none. Ties go to \\n.
+    """
+    crlf = text.count("\r\n")
+    lf = text.count("\n") - crlf
+    cr = text.count("\r") - crlf
+    most = max(crlf, lf, cr)
+    if not most:
+        return None
+    if lf == most:
+        return "\n"
+    return "\r\n" if crlf == most else "\r"
 
 
-def save_and_overwrite(path: Path, lines: list[str], preferred_line_break: str) -> None:
+def _read_blocks(path: Path, encoding: str) -> tuple[list[str], TextFormat]:
+    """Decode and split a file a block at a time, like text mode with universal newlines.
+
+    Args:
+        path (Path): The path
+        encoding (str): The encoding
+
+    Returns:
+        tuple[list[str], TextFormat]: The lines and how they were stored
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    lines: list[str] = []
+    line_break: Optional[str] = None
+    uniform = True
+    carry = ""
+    with open_binary(path) as file:
+        while True:
+            block = file.read(BLOCK_SIZE)
+            text = carry + decoder.decode(block, final=not block)
+            if block and text.endswith("\r"):
+                # might be the first half of a \r\n
+                text, tail = text[:-1], "\r"
+            else:
+                tail = ""
+            if line_break is None:
+                # the first block with any line breaks decides for the whole file
+                line_break = detect_line_break(text)
+
+            if any(character in text for character in NOT_LINE_BREAKS):
+                parts = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+                carry = parts.pop()
+            else:
+                parts = text.splitlines()
+                carry = parts.pop() if parts and not text.endswith(("\n", "\r")) else ""
+            if uniform and line_break is not None:
+                uniform = _has_only(text, line_break, len(parts))
+            lines.extend(parts)
+            carry += tail
+            if not block:
+                break
+    if carry:
+        lines.append(carry)
+
+    if line_break is None:
+        return lines, TextFormat(encoding=encoding)
+    return lines, TextFormat(encoding=encoding, line_break=line_break, uniform=uniform)
+
+
+def _has_only(text: str, line_break: str, break_count: int) -> bool:
+    """Check that a block uses no other line break.
+
+    Args:
+        text (str): The block, split into break_count lines and a partial line
+        line_break (str): The line break to expect
+        break_count (int): How many line breaks there are in all
+
+    Returns:
+        bool: False if other line breaks are mixed in
+    """
+    if line_break == "\n":
+        return "\r" not in text
+    if line_break == "\r":
+        return "\n" not in text
+    return text.count("\r\n") == break_count
+
+
+def save_and_overwrite(path: Path, lines: list[str], preferred_line_break: str, encoding: str = "utf-8") -> None:
     """Save a file and overwrite it.
 
+    An existing file is replaced atomically, the new one is written next to it and renamed over it.
+
     Args:
         path (Path): The path
         lines (list[str]): The lines
         preferred_line_break (str): The preferred line break
+        encoding (str): The encoding. Defaults to "utf-8".
 
     Raises:
         TypeError: If there is no file path
     """
     if not path:
         raise TypeError("No file path")
-    with open(str(path), "w", encoding="utf-8") as file:
-        file.seek(0)
+    with tracing.span("file.write", {"file.path": str(path), "dedlin.file.lines": len(lines)}):
+        if not path.is_file():
+            # new files have nothing to protect, devices like /dev/null must not be renamed over
+            _write_lines(path, lines, preferred_line_break, encoding)
+            return
+
+        handle, temp_name = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=path.suffix)
+        os.close(handle)
+        temp_path = Path(temp_name)
+        try:
+            _write_lines(temp_path, lines, preferred_line_break, encoding)
+            shutil.copymode(str(path), temp_name)
+            os.replace(temp_name, str(path))
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+
+def _write_lines(path: Path, lines: list[str], preferred_line_break: str, encoding: str) -> None:
+    """Write all lines to a file, flushed to disk.
+
+    Args:
+        path (Path): The path
+        lines (list[str]): The lines
+        preferred_line_break (str): The preferred line break
+        encoding (str): The encoding
+    """
+    # newline="" writes the line break as is, \n isn't turned into \r\n on windows
+    with open_text(path, "w", encoding=encoding, newline="") as file:
         file.writelines(line + preferred_line_break for line in lines)
+        file.flush()
+        # compressors hold the last block until closed, those only get the atomic rename
+        if path.is_file() and path.suffix.lower() not in COMPRESSED_SUFFIXES:
+            os.fsync(file.fileno())
+    if metrics.METRICS is not None:
+        metrics.METRICS.written(len(lines))
+
+
+def file_signature(path: Optional[Path]) -> Optional[FileSignature]:
+    """Size and modification time of a file.
+
+    Args:
+        path (Optional[Path]): The path
+
+    Returns:
+        Optional[FileSignature]: The signature, None if there is no such file
+    """
+    if path is None or not path.is_file():
+        return None
+    stat = path.stat()
+    return FileSignature(path=str(path.resolve()), size=stat.st_size, modified_ns=stat.st_mtime_ns)
+
+
+def encoded_length(lines: list[str], line_count: int, line_break: str, encoding: str) -> int:
+    """Bytes taken up by the first lines of a file, without encoding all of them.
+
+    Args:
+        lines (list[str]): The lines
+        line_count (int): How many lines from the start
+        line_break (str): The line break
+        encoding (str): An ascii compatible encoding
+
+    Returns:
+        int: The byte length
+    """
+    prefix = lines[:line_count]
+    length = sum(map(len, prefix)) + len(prefix) * len(line_break)
+    if encoding == "utf-8-sig":
+        length += len(codecs.BOM_UTF8)
+    if encoding == "latin-1":
+        # one byte per character
+        return length
+    # only lines that aren't plain ascii take more bytes than characters
+    return length + sum(len(line.encode("utf-8")) - len(line) for line in itertools.filterfalse(str.isascii, prefix))
+
+
+def save_document(
+    path: Path,
+    lines: list[str],
+    preferred_line_break: str,
+    encoding: str = "utf-8",
+    unchanged_lines: int = 0,
+    signature: Optional[FileSignature] = None,
+) -> Optional[FileSignature]:
+    """Save a document, rewriting only the changed tail when that is safe.
+
+    The tail is rewritten in place if the file is still as we last saw it, is not compressed,
+    uses an ascii compatible encoding and the tail is small enough. Otherwise see save_and_overwrite.
+
+    Args:
+        path (Path): The path
+        lines (list[str]): The lines
+        preferred_line_break (str): The preferred line break
+        encoding (str): The encoding. Defaults to "utf-8".
+        unchanged_lines (int): Lines at the start that are known to match the file. Defaults to 0.
+        signature (Optional[FileSignature]): The file as we last read or wrote it. Defaults to None.
+
+    Returns:
+        Optional[FileSignature]: The file as we wrote it
+    """
+    if (
+        unchanged_lines
+        and signature is not None
+        and encoding in ASCII_COMPATIBLE
+        and path.suffix.lower() not in COMPRESSED_SUFFIXES
+        and file_signature(path) == signature
+    ):
+        offset = encoded_length(lines, unchanged_lines, preferred_line_break, encoding)
+        if signature.size * (1 - MAX_TAIL_FRACTION) <= offset <= signature.size:
+            attributes = {"file.path": str(path), "dedlin.file.lines": len(lines) - unchanged_lines}
+            with tracing.span("file.write_tail", attributes):
+                _rewrite_tail(path, lines, unchanged_lines, offset, preferred_line_break, ASCII_COMPATIBLE[encoding])
+            return file_signature(path)
+    save_and_overwrite(path, lines, preferred_line_break, encoding)
+    return file_signature(path)
+
+
+def _rewrite_tail(
+    path: Path, lines: list[str], unchanged_lines: int, offset: int, preferred_line_break: str, encoding: str
+) -> None:
+    """Overwrite a file from offset on with the lines from unchanged_lines on.
+
+    Args:
+        path (Path): The path
+        lines (list[str]): The lines
+        unchanged_lines (int): Index of the first line to write
+        offset (int): Byte offset of that line in the file
+        preferred_line_break (str): The preferred line break
+        encoding (str): The encoding, without byte order mark
+    """
+    with open(str(path), "r+b") as file:
+        file.seek(offset)
+        for start in range(unchanged_lines, len(lines), WRITE_CHUNK_LINES):
+            chunk = lines[start : start + WRITE_CHUNK_LINES]
+            file.write((preferred_line_break.join(chunk) + preferred_line_break).encode(encoding))
+        file.truncate()
+        file.flush()
+        os.fsync(file.fileno())
+    if metrics.METRICS is not None:
+        metrics.METRICS.written(len(lines) - unchanged_lines)
 
 
 def export(path: Path | None, lines: list[str], preferred_line_break: str) -> None:
@@ -73,14 +448,15 @@ def export(path: Path | None, lines: list[str], preferred_line_break: str) -> No
     """
     if not path:
         raise TypeError("No file path")
-    if path.suffix.lower() == ".html":
-        html_name = path.rename(path.with_suffix(".html"))
-        with open(str(html_name), "w", encoding="utf-8") as file:
-            file.seek(0)
-            file.write(export_markdown(lines, preferred_line_break))
-    else:
-        # BUG: Isn't this the same as SAVE/WRITE/QUIT/EXIT?
-        with open(str(path), "w", encoding="utf-8") as file:
-            file.seek(0)
-            # TODO: make this use preferred line break
-            file.writelines(line + "\n" for line in lines)
+    with tracing.span("file.export", {"file.path": str(path), "dedlin.file.lines": len(lines)}):
+        if path.suffix.lower() == ".html":
+            html_name = path.rename(path.with_suffix(".html"))
+            with open(str(html_name), "w", encoding="utf-8") as file:
+                # one block at a time, never the whole document as html
+                file.writelines(stream_markdown(lines, preferred_line_break))
+        else:
+            # BUG: Isn't this the same as SAVE/WRITE/QUIT/EXIT?
+            with open(str(path), "w", encoding="utf-8") as file:
+                file.seek(0)
+                # TODO: make this use preferred line break
+                file.writelines(line + "\n" for line in lines)
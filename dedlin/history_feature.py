@@ -5,6 +5,7 @@ Manage history on file system
 from pathlib import Path
 from typing import Optional
 
+from dedlin.tools import metrics
 from dedlin.utils.file_utils import locate_file
 
 
@@ -83,6 +84,8 @@ class HistoryLog:
             return
         if self.history_file is None:
             return
-        with open(self.history_file, "a", encoding="utf-8") as file_handle:
+        with open(self.history_file, "a", encoding="utf-8", newline="") as file_handle:
             file_handle.write(command)
             file_handle.write(preferred_line_break)
+        if metrics.METRICS is not None:
+            metrics.METRICS.history_written()
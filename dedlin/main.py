@@ -6,15 +6,27 @@ Handles UI and links command parser to the document object
 
 """
 
+import asyncio
 import logging
+import shutil
 import signal
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 from types import TracebackType
-from typing import Optional
+from typing import Any, Iterator, Optional
 
 import dedlin.file_system as file_system
 import dedlin.text.help_text as help_text
+import dedlin.tools.diff as diff
+import dedlin.tools.memory as memory
+import dedlin.tools.metrics as metrics
+import dedlin.tools.profiling as profiling
+import dedlin.tools.sorting as sorting
+import dedlin.tools.tracing as tracing
 from dedlin.basic_types import (
+    AsyncCommandGeneratorProtocol,
     Command,
     CommandGeneratorProtocol,
     Commands,
@@ -24,17 +36,23 @@ from dedlin.basic_types import (
     Printable,
     StringGeneratorProtocol,
 )
-from dedlin.command_sources import CommandGenerator
-from dedlin.document import Document
+from dedlin.buffers import VIEW, Buffer, BufferAttribute, BufferManager
+from dedlin.command_sources import AsyncCommandGenerator, CommandGenerator, InteractiveGenerator
+from dedlin.document import DEFAULT_PAGE_SIZE, Document
 from dedlin.history_feature import HistoryLog
-from dedlin.string_comands import process_strings
+from dedlin.outputters.buffered import batched
+from dedlin.outputters.queued import QueuedPrinter
+from dedlin.string_comands import BLOCK_COMMANDS, STRING_COMMANDS, process_strings, string_transform
+from dedlin.tools.autosave import AutosaveWorker, sidecar_path
 from dedlin.tools.info_bar import display_info
+from dedlin.tools.timing import CommandTimings
 from dedlin.tools.web import fetch_page_as_rows
 from dedlin.ui_exit import confirm_exit, setup_signal_handlers
 from dedlin.utils.exceptions import DedlinException
 
 logger = logging.getLogger(__name__)
 MAX_MACRO_DEPTH = 3
+AUTOSAVE_STOP_TIMEOUT = 5.0
 
 HIGH_TRUST_TOOLS = [
     Commands.BROWSE,  # Web browsing
@@ -43,8 +61,48 @@ HIGH_TRUST_TOOLS = [
     Commands.MACRO,  # Read/Write arbitrary files
     Commands.CRASH,  # Halts application
     Commands.PRINT,  # Either prints to device or to new file (unimplemented)
+    Commands.PROFILE,  # Writes a file named in the command
+    Commands.BUFFER,  # Read arbitrary files
 ]
 
+DISPLAY_ONLY = (
+    Commands.LIST,
+    Commands.PRINT,
+    Commands.SEARCH,
+    Commands.INFO,
+    Commands.DIFF,
+)
+"""Commands that do nothing but send text to the document outputter"""
+
+ALLOCATING = (
+    Commands.INSERT,
+    Commands.PUSH,
+    Commands.EDIT,
+    Commands.LOREM,
+    Commands.REPLACE,
+    Commands.TRANSFER,
+    Commands.BROWSE,
+    Commands.MOVE,
+    Commands.COPY,
+    Commands.SHUFFLE,
+    Commands.SORT,
+    Commands.REVERSE,
+    Commands.DEDUPE,
+    Commands.BUFFER,
+    *STRING_COMMANDS,
+    *BLOCK_COMMANDS,
+)
+"""Commands that add lines or copy the document for UNDO, refused over the memory ceiling"""
+
+SNAPSHOT_COMMANDS = (
+    Commands.SEARCH,
+    Commands.SPELL,
+    Commands.INFO,
+    Commands.EXPORT,
+    Commands.DIFF,
+)
+"""Read-only and possibly slow, with concurrent_reads they run on a view of the document while edits continue"""
+
 
 class Dedlin:
     """Application for Dedlin
@@ -55,6 +113,13 @@ class Dedlin:
     https://en.wikipedia.org/wiki/Command_pattern
     """
 
+    # the active buffer's, or the view's a read-only command runs on, see dedlin.buffers
+    doc: BufferAttribute[Optional[Document]] = BufferAttribute(override=VIEW)
+    file_path: BufferAttribute[Optional[Path]] = BufferAttribute(override=VIEW)
+    preferred_line_break: BufferAttribute[str] = BufferAttribute(override=VIEW)
+    encoding: BufferAttribute[str] = BufferAttribute(override=VIEW)
+    file_signature: BufferAttribute[Optional[file_system.FileSignature]] = BufferAttribute(override=VIEW)
+
     def __init__(
         self,
         inputter: CommandGeneratorProtocol,  # OR Union[InMemoryCommandGenerator, CommandGenerator]
@@ -79,6 +144,9 @@ class Dedlin:
             history (bool): Whether to save history. Defaults to True.
         """
 
+        self.buffers = BufferManager()
+        """Open documents, the attributes about the document and its file are the active one's"""
+
         self.disabled_commands = disabled_commands if disabled_commands else []
         """Disable list of commands for any reason"""
 
@@ -95,7 +163,7 @@ class Dedlin:
         self.command_outputter: Printable = outputter
         self.document_outputter: Printable = outputter
 
-        self.doc: Optional[Document] = None
+        self.doc = None
 
         self.halt_on_error = headless  # Halt if headless.
         """Stop on errors, useful for macros."""
@@ -121,9 +189,63 @@ class Dedlin:
         self.headless = headless
         """No interactive features"""
 
+        self.pager = False
+        """LIST shows one screen at a time, like PAGE"""
+
+        self.no_display = False
+        """Headless only, send document text nowhere, for batch edits"""
+
         self.preferred_line_break = "\n"
+        """Set from the file when it is read, so saving keeps its line breaks"""
+
+        self.encoding = "utf-8"
+        """Set from the file when it is read, so saving keeps its encoding"""
+
+        self.file_signature = None
+        """The file as last read or saved, if it changed since then the whole file is saved"""
+
+        self.autosave_interval: Optional[float] = None
+        """Seconds between writes of a recovery file, None for no autosave"""
+        self.autosave_buffer: Optional[Buffer] = None
+        """The buffer autosave protects, the one dedlin was started with"""
+
+        self.timings: Optional[CommandTimings] = None
+        """Per command timing, None when off so commands aren't slowed down at all"""
+
+        self.timing_path: Optional[Path] = None
+        """Where to write the timings as JSON at exit"""
+
+        self.profiler = profiling.Profiler()
+        """cProfile for PROFILE START and STOP, or the whole session"""
 
-        self.file_path: Optional[Path] = None
+        self.profile_path: Optional[Path] = None
+        """Set when the whole session is profiled to this file, then PROFILE commands do nothing"""
+
+        self.memory_ceiling: Optional[memory.MemoryCeiling] = None
+        """Refuses ALLOCATING commands near a memory limit, None for no limit"""
+
+        self.command_lock = threading.RLock()
+        """Held while a command runs, so autosave snapshots fall between commands"""
+
+        self.async_loop = False
+        """Run commands with run_command_source_async, so Ctrl-C cancels a slow command"""
+
+        self.cancel_requested = threading.Event()
+        """Set by cancel_command(), slow commands and macros stop at the next line or command"""
+
+        self.command_task: Optional[asyncio.Future[Optional[int]]] = None
+        """The command running on a worker thread, in the async command loop"""
+
+        self.concurrent_reads = False
+        """In the async command loop, run SNAPSHOT_COMMANDS on a view of the document without waiting for them"""
+
+        self.read_tasks: set[asyncio.Future[Optional[int]]] = set()
+        """SNAPSHOT_COMMANDS still running"""
+
+        self.previous_sigint: Any = None
+        """Ctrl-C handler to put back when the async command loop ends"""
+
+        self.file_path = None
         self.history: list[Command] = []
         self.history_log = HistoryLog(persist=history)
         self.macro_file_name: Optional[Path] = None
@@ -159,21 +281,92 @@ class Dedlin:
             self.echo = False
             self.command_outputter = NullPrinter()
 
+        if self.no_display and self.headless:
+            # batch edits, nobody is looking at the document
+            self.document_outputter = NullPrinter()
+
         self.macro_file_name = Path(macro_file_name).resolve() if macro_file_name else None
-        self.file_path = Path(file_name) if file_name else None
-        if self.file_path:
-            self.feedback(f"Editing {self.file_path.absolute()}")
+        if file_name:
+            self.buffers.rename(self.buffers.current, Path(file_name).name)
+            self.feedback(f"Editing {Path(file_name).absolute()}")
+        self.load_file(Path(file_name) if file_name else None)
+        self.command_inputter.prompt = " * "
+        autosave = self.start_autosave()
+        try:
+            if self.async_loop:
+                exit_code = asyncio.run(
+                    self.run_command_source_async(
+                        AsyncCommandGenerator(
+                            self.command_inputter, blocking=isinstance(self.command_inputter, InteractiveGenerator)
+                        ),
+                        active_macro=self.macro_file_name,
+                    )
+                )
+            else:
+                exit_code = self.run_command_source(self.command_inputter, active_macro=self.macro_file_name)
+        finally:
+            if autosave is not None:
+                autosave.stop(timeout=AUTOSAVE_STOP_TIMEOUT)
+        return exit_code if exit_code is not None else 0
 
-        lines = file_system.read_or_create_file(self.file_path)
+    def load_file(self, path: Optional[Path]) -> None:
+        """Read a file into the active buffer, an empty document if there is no file.
+
+        Args:
+            path (Optional[Path]): The file, created if missing
+        """
+        lines, text_format = file_system.read_or_create_file_with_format(path)
+        self.file_path = path
+        self.preferred_line_break = text_format.line_break
+        self.encoding = text_format.encoding
+        # mixed line breaks get normalized by one full save first
+        self.file_signature = file_system.file_signature(path) if text_format.uniform else None
 
         self.doc = Document(
             insert_inputter=self.insert_document_inputter,
             edit_inputter=self.edit_document_inputter,
             lines=lines,
         )
-        self.command_inputter.prompt = " * "
-        exit_code = self.run_command_source(self.command_inputter, active_macro=self.macro_file_name)
-        return exit_code if exit_code is not None else 0
+        self.buffers.current.measure()
+
+    def start_autosave(self) -> Optional[AutosaveWorker]:
+        """Start writing a recovery file in the background, if enabled.
+
+        Returns:
+            Optional[AutosaveWorker]: The worker, None if not autosaving
+        """
+        if not self.autosave_interval or self.file_path is None:
+            return None
+        recovery_path = sidecar_path(self.file_path)
+        if recovery_path.exists():
+            self.feedback(f"Found {recovery_path}, it may have changes that were never saved")
+        # the file dedlin was started with, even while another buffer is active
+        self.autosave_buffer = self.buffers.current
+        autosave = AutosaveWorker(self.autosave_snapshot, self.write_autosave, self.autosave_interval)
+        autosave.start()
+        return autosave
+
+    def autosave_snapshot(self) -> Optional[tuple[int, list[str]]]:
+        """Snapshot for the autosave thread, taken between commands.
+
+        Returns:
+            Optional[tuple[int, list[str]]]: Version and lines, None if there is nothing to save
+        """
+        with self.command_lock:
+            buffer = self.autosave_buffer
+            if buffer is None or buffer.doc is None or buffer.evicted or not buffer.doc.dirty:
+                return None
+            return buffer.doc.version, buffer.doc.snapshot()
+
+    def write_autosave(self, lines: list[str]) -> None:
+        """Write the recovery file, called on the autosave thread.
+
+        Args:
+            lines (list[str]): The lines
+        """
+        buffer = self.autosave_buffer
+        if buffer is not None and buffer.file_path is not None:
+            file_system.save_and_overwrite(sidecar_path(buffer.file_path), lines, buffer.preferred_line_break, buffer.encoding)
 
     def run_command_source(
         self, command_inputter: CommandGeneratorProtocol, active_macro: Optional[Path] = None
@@ -182,13 +375,11 @@ class Dedlin:
         if self.doc is None:
             raise TypeError("Document not initialized")
 
-        active_macro_path = active_macro.resolve() if active_macro else None
-        if active_macro_path is not None:
-            self.macro_stack.append(active_macro_path)
-
         command_generator = command_inputter.generate()
-        try:
+        with self.macro_scope(active_macro):
             while True:
+                if self.macro_stack and self.cancel_requested.is_set():
+                    return None
                 command_inputter.document_length = len(self.doc.lines)
                 command_inputter.current_line = self.doc.current_line
                 try:
@@ -199,16 +390,267 @@ class Dedlin:
                 except StopIteration:
                     return None
 
-                exit_code = self.execute_command(command)
+                if not self.headless and not self.macro_stack:
+                    # a person typed something, what is still being said is stale
+                    self.interrupt_output()
+                with self.command_lock:
+                    exit_code = self.execute_command(command)
                 if exit_code is not None:
                     return exit_code
 
-                self.feedback(self.status_message())
+                if not self.status_is_discarded():
+                    self.feedback(self.status_message())
+
+    async def run_command_source_async(
+        self, command_inputter: AsyncCommandGeneratorProtocol, active_macro: Optional[Path] = None
+    ) -> Optional[int]:
+        """Run commands from an async command source until it finishes or exits the app.
+
+        Each command runs as a task on a worker thread, so the loop stays free to print output
+        from a queue and to cancel the command on Ctrl-C, see cancel_command().
+        """
+        if self.doc is None:
+            raise TypeError("Document not initialized")
+
+        loop = asyncio.get_running_loop()
+        outputters = self.command_outputter, self.document_outputter
+        queues = self.queue_outputters(loop)
+        drains = [asyncio.create_task(queue.drain()) for queue in queues]
+        handles_sigint = self.handle_sigint(loop)
+
+        command_generator = command_inputter.generate()
+        try:
+            with self.macro_scope(active_macro):
+                while True:
+                    command_inputter.document_length = len(self.doc.lines)
+                    command_inputter.current_line = self.doc.current_line
+                    try:
+                        command = await anext(command_generator)
+                    except KeyboardInterrupt:
+                        confirm_exit(-1, None)
+                        return 0
+                    except StopAsyncIteration:
+                        return None
+
+                    if not self.headless and not self.macro_stack:
+                        # a person typed something, what is still being said is stale
+                        self.interrupt_output()
+                    if self.concurrent_reads and command is not None and command.command in SNAPSHOT_COMMANDS:
+                        self.start_snapshot_command(command)
+                        continue
+                    if command is not None and command.command == Commands.PROFILE:
+                        # on the loop's thread, the profiler adds in what the worker threads record
+                        exit_code = self.locked_command(command)
+                    else:
+                        exit_code = await self.execute_command_async(command)
+                    if exit_code is not None:
+                        return exit_code
+
+                    if not self.status_is_discarded():
+                        self.feedback(self.status_message())
+                    if not self.headless:
+                        # shown before the next prompt
+                        for queue in queues:
+                            await queue.join()
+        finally:
+            results = await asyncio.gather(*self.read_tasks, return_exceptions=True)
+            if handles_sigint:
+                self.restore_sigint(loop)
+            for queue in queues:
+                await queue.join()
+            for drain in drains:
+                drain.cancel()
+            self.command_outputter, self.document_outputter = outputters
+            failures = [result for result in results if isinstance(result, Exception)]
+            if failures:
+                # as if the command had failed in turn
+                raise failures[0]
+
+    def queue_outputters(self, loop: asyncio.AbstractEventLoop) -> list[QueuedPrinter]:
+        """Send output through queues printed on the loop, NullPrinters stay as they are so nothing is formatted.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop running commands
+
+        Returns:
+            list[QueuedPrinter]: The queues, to drain
+        """
+        queues: dict[int, QueuedPrinter] = {}
+        for name in ("command_outputter", "document_outputter"):
+            printer = getattr(self, name)
+            if isinstance(printer, NullPrinter):
+                continue
+            # one queue per printer keeps feedback and document text in order when they share one
+            if id(printer) not in queues:
+                queues[id(printer)] = QueuedPrinter(printer, loop)
+            setattr(self, name, queues[id(printer)])
+        return list(queues.values())
+
+    async def execute_command_async(self, command: Optional[Command]) -> Optional[int]:
+        """Execute one parsed command as a task on a worker thread. Returns an exit code when the app should stop."""
+        task = asyncio.ensure_future(asyncio.to_thread(self.locked_command, command))
+        self.command_task = task
+        try:
+            return await task
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                # the loop itself is being cancelled, not just the command
+                raise
+            self.feedback("Cancelled")
+            return None
+        finally:
+            self.command_task = None
+
+    def start_snapshot_command(self, command: Command) -> None:
+        """Run a read-only command on a view of the document as it is now, without waiting for it.
+
+        Args:
+            command (Command): One of SNAPSHOT_COMMANDS
+        """
+        if self.doc is None:
+            raise TypeError("Document not initialized")
+        with self.command_lock:
+            # the lines with the file they belong to, a BUFFER switch while it runs changes neither
+            view = self.buffers.current.view()
+        task = asyncio.ensure_future(asyncio.to_thread(self.snapshot_command, command, view))
+        self.read_tasks.add(task)
+        task.add_done_callback(self.read_tasks.discard)
+
+    def snapshot_command(self, command: Command, view: Buffer) -> Optional[int]:
+        """Execute a read-only command against a view, on a worker thread and without the command lock.
+
+        Args:
+            command (Command): One of SNAPSHOT_COMMANDS
+            view (Buffer): The buffer as it was when the command was read, file and format included
+
+        Returns:
+            Optional[int]: Always None, read-only commands don't exit the app
+        """
+        token = VIEW.set(view)
+        try:
+            with self.profiler.worker():
+                return self.execute_command(command)
         finally:
-            if active_macro_path is not None:
-                self.macro_stack.pop()
+            VIEW.reset(token)
+
+    def locked_command(self, command: Optional[Command]) -> Optional[int]:
+        """Execute one parsed command between autosave snapshots. Returns an exit code when the app should stop."""
+        with self.command_lock:
+            # a cancelled command may have held the lock until now, it has seen the request
+            self.cancel_requested.clear()
+            with self.profiler.worker():
+                return self.execute_command(command)
+
+    def cancel_command(self) -> bool:
+        """Cancel the commands running in the async command loop, e.g. on Ctrl-C, read-only ones on views too.
+
+        The command's thread stops at its next check of cancel_requested and the lock keeps the
+        next command waiting until it has.
+
+        Returns:
+            bool: False if no command was running
+        """
+        tasks = [task for task in (self.command_task, *self.read_tasks) if task is not None and not task.done()]
+        if not tasks:
+            return False
+        self.cancel_requested.set()
+        for task in tasks:
+            task.cancel()
+        return True
+
+    def handle_sigint(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """Let Ctrl-C cancel the running command instead of asking to exit.
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop running commands
+
+        Returns:
+            bool: False where the loop can't handle signals, e.g. Windows or not the main thread
+        """
+        if self.vim_mode or threading.current_thread() is not threading.main_thread():
+            return False
+        self.previous_sigint = signal.getsignal(signal.SIGINT)
+        try:
+            loop.add_signal_handler(signal.SIGINT, self.cancel_command)
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+
+    def restore_sigint(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Put back the Ctrl-C handler from before handle_sigint().
+
+        Args:
+            loop (asyncio.AbstractEventLoop): The loop running commands
+        """
+        loop.remove_signal_handler(signal.SIGINT)
+        signal.signal(signal.SIGINT, self.previous_sigint)
+
+    @contextmanager
+    def macro_scope(self, active_macro: Optional[Path]) -> Iterator[None]:
+        """Track a running macro for relative paths and recursion checks, and trace it.
+
+        Args:
+            active_macro (Optional[Path]): The macro file, None for the outermost command source
+
+        Yields:
+            None: Nothing
+        """
+        if active_macro is None:
+            yield
+            return
+        active_macro_path = active_macro.resolve()
+        self.macro_stack.append(active_macro_path)
+        try:
+            with tracing.span(
+                "macro", {"dedlin.macro.path": str(active_macro_path), "dedlin.macro.depth": len(self.macro_stack)}
+            ):
+                yield
+        finally:
+            self.macro_stack.pop()
 
     def execute_command(self, command: Optional[Command]) -> Optional[int]:
+        """Execute one parsed command, counting it if metrics are on. Returns an exit code when the app should stop."""
+        recorder = metrics.METRICS
+        if recorder is None or command is None:
+            return self.traced_command(command)
+        started = time.perf_counter()
+        try:
+            return self.traced_command(command)
+        finally:
+            recorder.command(command.command.name, time.perf_counter() - started)
+
+    def traced_command(self, command: Optional[Command]) -> Optional[int]:
+        """Execute one parsed command, tracing it if tracing is on. Returns an exit code when the app should stop."""
+        if tracing.TRACER is None or command is None or self.doc is None:
+            return self.timed_command(command)
+        attributes = {
+            "dedlin.command": command.command.name,
+            "dedlin.range.lines": command.line_range.count() if command.line_range else 0,
+            "dedlin.document.lines": len(self.doc.lines),
+        }
+        with tracing.span(command.command.name, attributes) as span:
+            exit_code = self.timed_command(command)
+            span.set("dedlin.document.lines_after", len(self.doc.lines) if self.doc else 0)
+            return exit_code
+
+    def timed_command(self, command: Optional[Command]) -> Optional[int]:
+        """Execute one parsed command, timing it if timing is on. Returns an exit code when the app should stop."""
+        timings = self.timings
+        if timings is None or command is None or self.doc is None:
+            return self.dispatch_command(command)
+        length_before = len(self.doc.lines)
+        started = timings.start()
+        try:
+            return self.dispatch_command(command)
+        finally:
+            if command.line_range:
+                lines = command.line_range.count()
+            else:
+                lines = abs(len(self.doc.lines) - length_before) if self.doc else 0
+            timings.stop(command.command.name, started, lines)
+
+    def dispatch_command(self, command: Optional[Command]) -> Optional[int]:
         """Execute one parsed command. Returns an exit code when the app should stop."""
         if self.doc is None:
             raise TypeError("Document not initialized")
@@ -239,6 +681,12 @@ class Dedlin:
             self.log_history(command)
             self.echo_if_needed(command.original_text or "")
 
+        if self.display_is_discarded(command):
+            return None
+
+        if self.memory_ceiling is not None and command.command in ALLOCATING and not self.memory_allows(command):
+            return None
+
         if command.command == Commands.BROWSE:
             if self.doc.dirty:
                 self.feedback("Discarding current document")
@@ -246,26 +694,41 @@ class Dedlin:
                 self.feedback("No URL, can't browse")
             elif command.phrases and command.phrases.first:
                 page_as_rows = fetch_page_as_rows(command.phrases.first)
+                if self.cancel_requested.is_set():
+                    return None
                 phrases = Phrases(parts=tuple(page_as_rows))
                 self.doc.insert(self.doc.current_line, phrases)
 
         elif command.command == Commands.HISTORY:
-            for history_command in self.history:
-                self.feedback(history_command.format(), no_comment=True)
+            with batched(self.command_outputter):
+                for history_command in self.history:
+                    self.feedback(history_command.format(), no_comment=True)
         elif command.command == Commands.EMPTY:
             pass
         elif command.command == Commands.LIST and command.line_range:
-            for line, end in self.doc.list_doc(command.line_range):
-                self.document_outputter(line, end)
+            page_size = self.page_size()
+            window = page_size if self.pager and command.line_range.count() > page_size else None
+            lines = self.doc.list_doc(command.line_range, window=window)
+            with batched(self.document_outputter) as output:
+                for line, end in lines:
+                    output(line, end)
         elif command.command == Commands.PAGE:
-            for line, end in self.doc.page():
-                self.document_outputter(line, end)
+            start = self.jump_target(command.line_range)
+            with batched(self.document_outputter) as output:
+                for line, end in self.doc.page(self.page_size(), start=start):
+                    output(line, end)
         elif command.command == Commands.SPELL and command.line_range:
-            for line, end in self.doc.spell(command.line_range):
-                self.document_outputter(line, end=end)
+            lines = self.doc.spell(command.line_range)
+            # the current line has moved already, the overlay is only built if shown
+            if not isinstance(self.document_outputter, NullPrinter):
+                for line, end in lines:
+                    if self.cancel_requested.is_set():
+                        break
+                    self.document_outputter(line, end=end)
         elif command.command == Commands.PRINT:
-            for line, end in self.doc.print(command.line_range):
-                self.document_outputter(line, end=end)
+            with batched(self.document_outputter) as output:
+                for line, end in self.doc.print(command.line_range):
+                    output(line, end=end)
         elif command.command == Commands.DELETE and command.line_range:
             if self.doc.delete(command.line_range):
                 self.feedback(f"Deleted lines {command.line_range.start} to {command.line_range.end}")
@@ -278,9 +741,10 @@ class Dedlin:
                 return None
             if command.command == Commands.QUIT and self.doc.dirty and self.quit_safety:
                 self.save_document()
-                return 0
             if command.command == Commands.EXIT:
                 self.save_document(command.phrases)
+            if command.command == Commands.EXIT or self.quit_safety:
+                self.save_other_buffers()
             return 0
         elif command.command == Commands.INSERT:
             line_number = command.line_range.start if command.line_range else 1
@@ -301,8 +765,11 @@ class Dedlin:
             line_number = command.line_range.start if command.line_range else 1
             self.doc.push(line_number, command.phrases.as_list())
         elif command.command == Commands.COPY and command.phrases and command.line_range and command.phrases.first:
-            self.doc.copy(command.line_range, int(command.phrases.first))
-            self.feedback("Copied")
+            if command.phrases.second:
+                self.copy_to_buffer(command.line_range, int(command.phrases.first), command.phrases.second)
+            else:
+                self.doc.copy(command.line_range, int(command.phrases.first))
+                self.feedback("Copied")
         elif command.command == Commands.MOVE and command.phrases and command.line_range and command.phrases.first:
             self.doc.move(command.line_range, int(command.phrases.first))
             self.feedback("Moved")
@@ -330,11 +797,14 @@ class Dedlin:
 
                 self.command_outputter("")
         elif command.command == Commands.SEARCH and command.line_range and command.phrases and command.phrases.first:
-            for text in self.doc.search(command.line_range, value=command.phrases.first):
-                self.document_outputter(text, "\n")
+            with batched(self.document_outputter) as output:
+                for text in self.doc.search(command.line_range, value=command.phrases.first):
+                    output(text, "\n")
         elif command.command == Commands.INFO:
             for info, end in display_info(self.doc):
                 self.document_outputter(info, end)
+            for info, end in memory.memory_report(self.doc):
+                self.document_outputter(info, end)
         elif (
             command.command == Commands.REPLACE
             and command.phrases
@@ -343,20 +813,48 @@ class Dedlin:
             and command.phrases.second is not None
         ):
             self.feedback("Replacing")
-            for line in self.doc.replace(
-                command.line_range,
-                target=command.phrases.first,
-                replacement=command.phrases.second,
-            ):
-                self.document_outputter(line, end="\n")
+            if isinstance(self.document_outputter, NullPrinter):
+                # same edit, without formatting the changed lines
+                self.doc.replace_quietly(
+                    command.line_range,
+                    target=command.phrases.first,
+                    replacement=command.phrases.second,
+                )
+            else:
+                for line in self.doc.replace(
+                    command.line_range,
+                    target=command.phrases.first,
+                    replacement=command.phrases.second,
+                ):
+                    self.document_outputter(line, end="\n")
         elif command.command == Commands.LOREM:
             self.doc.lorem(command.line_range)
         elif command.command == Commands.UNDO:
             self.doc.undo()
             self.feedback("Undone")
         elif command.command == Commands.SORT:
-            self.doc.sort()
-            self.feedback("Sorted")
+            options = sorting.parse_sort_options(command.phrases)
+            if options is None:
+                self.feedback("SORT options are NUMERIC, NOCASE, REVERSE, UNIQUE, FIELD n or COLUMN n")
+            else:
+                self.doc.sort(command.line_range, options)
+                self.feedback("Sorted")
+        elif command.command == Commands.PROFILE:
+            self.profile(command.phrases)
+        elif command.command == Commands.BUFFER:
+            self.buffer(command.phrases)
+        elif command.command == Commands.TIMING:
+            self.timing(command.phrases.first if command.phrases else None)
+        elif command.command == Commands.DIFF:
+            against = command.phrases.first if command.phrases else None
+            self.diff(against_undo=against is not None and against.upper() == "UNDO")
+        elif command.command == Commands.DEDUPE:
+            words = [part.upper() for part in command.phrases.parts] if command.phrases else []
+            if words not in ([], ["COUNT"]):
+                self.feedback("DEDUPE takes no options but COUNT")
+            else:
+                dropped = self.doc.dedupe(command.line_range, count=bool(words))
+                self.feedback(f"Dropped {dropped} duplicate line{'' if dropped == 1 else 's'}")
         elif command.command == Commands.REVERSE:
             self.doc.reverse()
             self.feedback("Reversed")
@@ -383,22 +881,15 @@ class Dedlin:
         elif command.command == Commands.EXPORT:
             file_system.export(self.file_path, self.doc.lines, self.preferred_line_break)
             self.feedback("Exported to")
-        elif command.command in (
-            Commands.TITLE,
-            Commands.SWAPCASE,
-            Commands.CASEFOLD,
-            Commands.CAPITALIZE,
-            Commands.UPPER,
-            Commands.LOWER,
-            Commands.EXPANDTABS,
-            Commands.RJUST,
-            Commands.LJUST,
-            Commands.CENTER,
-            Commands.RSTRIP,
-            Commands.LSTRIP,
-            Commands.STRIP,
-        ):
-            process_strings(self.doc.lines, command)
+        elif command.command in STRING_COMMANDS or command.command in BLOCK_COMMANDS:
+            if command.command in STRING_COMMANDS and string_transform(command) is None:
+                # checked before the backup, so UNDO still reaches the last real edit
+                self.feedback(f"{command.command.name} needs a width, e.g. 1,5 {command.command.name} 40")
+            else:
+                self.doc.backup()
+                process_strings(self.doc.lines, command, command.line_range)
+                self.doc.current_line = min(self.doc.current_line, len(self.doc.lines))
+                self.doc.mark_dirty(command.line_range.start - 1 if command.line_range else 0)
         elif command.command == Commands.UNKNOWN:
             self.feedback("Unknown command, type HELP for help")
             if self.halt_on_error:
@@ -408,6 +899,32 @@ class Dedlin:
 
         return None
 
+    def page_size(self) -> int:
+        """Lines in a page, a terminal full less room for the prompt and status.
+
+        Returns:
+            int: The page size
+        """
+        if self.headless:
+            # macros should not depend on the size of the window
+            return DEFAULT_PAGE_SIZE
+        return max(shutil.get_terminal_size().lines - 2, 1)
+
+    def jump_target(self, line_range: Optional[LineRange]) -> Optional[int]:
+        """Where PAGE starts, None means continue from the current line.
+
+        Args:
+            line_range (Optional[LineRange]): Range of the command, a bare command has the whole document
+
+        Returns:
+            Optional[int]: Line to jump to
+        """
+        if self.doc is None or line_range is None:
+            return None
+        if line_range.start == 1 and line_range.end >= len(self.doc.lines):
+            return None
+        return line_range.start
+
     def resolve_macro_path(self, macro_file_name: str) -> Path:
         """Resolve macro paths relative to the active macro, then the working directory."""
         candidate = Path(macro_file_name).expanduser()
@@ -445,6 +962,51 @@ class Dedlin:
         if self.halt_on_error:
             raise DedlinException(message)
 
+    def memory_allows(self, command: Command) -> bool:
+        """Check a command fits under the memory ceiling, refuse it if not.
+
+        Args:
+            command (Command): An ALLOCATING command
+
+        Returns:
+            bool: True if the command can run
+        """
+        if self.doc is None or self.memory_ceiling is None:
+            return True
+        # the UNDO copy of the line list, plus a pointer per line the command adds
+        lines = len(self.doc.lines) + (command.line_range.count() if command.line_range else 0)
+        if self.memory_ceiling.allows(lines * memory.POINTER_BYTES):
+            return True
+        used = memory.human(self.memory_ceiling.used or 0)
+        self.fail_command(
+            f"{command.command.name} refused, {used} in use of a {memory.human(self.memory_ceiling.limit)} "
+            "memory ceiling, DELETE lines or SAVE and QUIT"
+        )
+        return False
+
+    def display_is_discarded(self, command: Command) -> bool:
+        """Check if a display command would only format text for a NullPrinter.
+
+        Args:
+            command (Command): The command
+
+        Returns:
+            bool: True if the command can be skipped
+        """
+        if command.command == Commands.HISTORY:
+            return isinstance(self.command_outputter, NullPrinter)
+        if command.command not in DISPLAY_ONLY:
+            return False
+        return isinstance(self.document_outputter, NullPrinter)
+
+    def status_is_discarded(self) -> bool:
+        """Quiet headless runs show status lines to no one, so skip building them.
+
+        Returns:
+            bool: True if the status line would go nowhere
+        """
+        return self.headless and not self.verbose and isinstance(self.command_outputter, NullPrinter)
+
     def status_message(self) -> str:
         """Build the status line shown after each command."""
         if self.doc is None:
@@ -484,6 +1046,16 @@ class Dedlin:
         if self.verbose:
             logger.info(string)
 
+    def interrupt_output(self) -> None:
+        """Let outputters that lag behind, e.g. speech, skip output from the previous command.
+
+        Only for interactive input, macros and headless scripts should be heard in full.
+        """
+        for outputter in (self.command_outputter, self.document_outputter):
+            interrupt = getattr(outputter, "interrupt", None)
+            if interrupt is not None:
+                interrupt()
+
     def echo_if_needed(self, string: str, end: str = "\n") -> None:
         """Echos a string to the outputter if needed.
 
@@ -506,8 +1078,7 @@ class Dedlin:
         if self.file_path is None:
             self.feedback("Can't save, no initial file name specified")
             return
-        file_system.save_and_overwrite(self.file_path, self.doc.lines, self.preferred_line_break)
-        self.doc.dirty = False
+        self.save_to_file(self.file_path)
 
     def save_document(self, phrases: Optional[Phrases] = None) -> None:
         """Save the document to the file.
@@ -538,8 +1109,194 @@ class Dedlin:
         if not self.file_path or self.file_path.is_dir():
             self.feedback("Need file path before saving, can't save.")
             return
-        file_system.save_and_overwrite(self.file_path, self.doc.lines, self.preferred_line_break)
-        self.doc.dirty = False
+        self.save_to_file(self.file_path)
+
+    def save_to_file(self, path: Path) -> None:
+        """Save the document, only the changed tail if the file is still as we left it.
+
+        Args:
+            path (Path): The path
+        """
+        if self.doc is None:
+            raise TypeError("Document not initialized")
+        first_changed = self.doc.first_changed_line()
+        started = time.perf_counter()
+        self.file_signature = file_system.save_document(
+            path,
+            self.doc.lines,
+            self.preferred_line_break,
+            self.encoding,
+            unchanged_lines=len(self.doc.lines) if first_changed is None else first_changed,
+            signature=self.file_signature,
+        )
+        if metrics.METRICS is not None:
+            metrics.METRICS.saved(time.perf_counter() - started)
+        self.doc.mark_clean()
+        # saved for real, nothing to recover
+        sidecar_path(path).unlink(missing_ok=True)
+
+    def diff(self, against_undo: bool = False) -> None:
+        """Show a unified diff of the document against the file on disk or the last undo point.
+
+        Args:
+            against_undo (bool): Compare to the state UNDO would restore. Defaults to False.
+        """
+        if self.doc is None:
+            raise TypeError("Document not initialized")
+        if against_undo:
+            old_lines, old_name, skip = self.doc.previous_lines, "before last change", 0
+        elif self.file_path is None or not self.file_path.is_file():
+            self.feedback("Nothing on disk to compare to")
+            return
+        else:
+            unchanged_on_disk = self.file_signature is not None and self.file_signature == file_system.file_signature(
+                self.file_path
+            )
+            if unchanged_on_disk and not self.doc.dirty:
+                self.feedback("No changes")
+                return
+            first_changed = self.doc.first_changed_line()
+            # lines before the first edit still match the file, if no one else wrote to it
+            skip = first_changed if unchanged_on_disk and first_changed is not None else 0
+            old_lines, old_name = file_system.read_file(self.file_path), str(self.file_path)
+        changed = False
+        with batched(self.document_outputter) as output:
+            for line in diff.unified_diff(old_lines, self.doc.lines, old_name, "current document", skip=skip):
+                changed = True
+                output(line, "\n")
+        if not changed:
+            self.feedback("No changes")
+
+    def profile(self, phrases: Optional[Phrases]) -> None:
+        """Profile a window of the session with PROFILE START, then PROFILE STOP [file].
+
+        Args:
+            phrases (Optional[Phrases]): START, or STOP and an optional pstats file
+        """
+        if self.profile_path is not None:
+            self.feedback(f"Already profiling the whole session to {self.profile_path}")
+            return
+        option = phrases.first.upper() if phrases and phrases.first else ""
+        if option == "START":
+            if self.profiler.start():
+                self.feedback("Profiling, PROFILE STOP [file] to stop")
+            else:
+                self.feedback("Already profiling")
+        elif option == "STOP":
+            path = Path(phrases.second if phrases and phrases.second else profiling.DEFAULT_PROFILE)
+            stats = self.profiler.stop(path)
+            if stats is None:
+                self.feedback("Not profiling, PROFILE START first")
+                return
+            with batched(self.document_outputter) as output:
+                for row in profiling.top_functions(stats):
+                    output(row, "\n")
+            self.feedback(f"Profile saved to {path}")
+        else:
+            self.feedback("PROFILE START or PROFILE STOP [file]")
+
+    def buffer(self, phrases: Optional[Phrases]) -> None:
+        """List, open, switch to or close buffers.
+
+        Args:
+            phrases (Optional[Phrases]): LIST, OPEN file [name], SWITCH name, CLOSE [name], or a buffer name
+        """
+        parts = list(phrases.parts) if phrases else []
+        option = parts[0].upper() if parts else "LIST"
+        if option == "LIST":
+            with batched(self.document_outputter) as output:
+                for buffer in self.buffers:
+                    marker = "*" if buffer is self.buffers.current else " "
+                    flags = "".join(
+                        (" modified" if buffer.doc and buffer.doc.dirty else "", " evicted" if buffer.evicted else "")
+                    )
+                    output(f"{marker} {buffer.name}: {buffer.line_count} lines{flags} {buffer.file_path or ''}", "\n")
+        elif option == "OPEN" and len(parts) > 1:
+            self.open_buffer(Path(parts[1]), parts[2] if len(parts) > 2 else None)
+        elif option == "CLOSE":
+            buffer = self.buffers.buffers.get(parts[1]) if len(parts) > 1 else self.buffers.current
+            if buffer is None:
+                self.feedback(f"No buffer named {parts[1]}, BUFFER LIST shows them")
+            elif buffer.doc is not None and buffer.doc.dirty:
+                self.feedback(f"{buffer.name} has unsaved changes, SAVE it first")
+            elif not self.buffers.close(buffer.name):
+                self.feedback("Can't close the only buffer")
+            else:
+                self.feedback(f"Closed {buffer.name}, now editing {self.buffers.current.name}")
+        else:
+            name = parts[1] if option == "SWITCH" and len(parts) > 1 else parts[0]
+            if self.buffers.switch(name) is None:
+                self.feedback(f"No buffer named {name}, BUFFER LIST shows them")
+            else:
+                self.feedback(f"Now editing {name}")
+
+    def open_buffer(self, path: Path, name: Optional[str] = None) -> None:
+        """Read a file into a new buffer and switch to it.
+
+        Args:
+            path (Path): The file, created if missing
+            name (Optional[str]): Name to switch to it by. Defaults to the file name.
+        """
+        previous = self.buffers.current
+        buffer = self.buffers.add(name or path.name)
+        self.buffers.switch(buffer.name)
+        try:
+            self.load_file(path)
+        except OSError as exception:
+            self.buffers.close(buffer.name)
+            self.buffers.switch(previous.name)
+            self.feedback(f"Couldn't open {path}: {exception}")
+            return
+        evicted = self.buffers.enforce_budget()
+        self.feedback(f"Opened {path} as {buffer.name}, {len(self.doc.lines) if self.doc else 0} lines")
+        if evicted:
+            self.feedback(f"Over the buffer memory budget, evicted {', '.join(evicted)}")
+
+    def copy_to_buffer(self, line_range: LineRange, target_line: int, name: str) -> None:
+        """Copy lines of the active buffer into another buffer.
+
+        Args:
+            line_range (LineRange): Lines of the active buffer
+            target_line (int): Line of the other buffer to insert before
+            name (str): The other buffer
+        """
+        if self.doc is None:
+            raise TypeError("Document not initialized")
+        target = self.buffers.buffers.get(name)
+        if target is None or target.doc is None:
+            self.feedback(f"No buffer named {name}, BUFFER LIST shows them")
+            return
+        target.load()
+        target.doc.paste(target_line, self.doc.lines[line_range.start - 1 : line_range.end])
+        self.feedback(f"Copied to {name}")
+
+    def save_other_buffers(self) -> None:
+        """Save the changes of buffers other than the active one, switching back afterwards."""
+        active = self.buffers.current
+        for buffer in list(self.buffers):
+            if buffer is active or buffer.doc is None or not buffer.doc.dirty or buffer.file_path is None:
+                continue
+            self.buffers.switch(buffer.name)
+            self.save_to_file(buffer.file_path)
+        self.buffers.switch(active.name)
+
+    def timing(self, option: Optional[str]) -> None:
+        """Turn per command timing on or off, or show what was timed.
+
+        Args:
+            option (Optional[str]): OFF, RESET, or None to show the table, turning timing on if it is off
+        """
+        option = (option or "").upper()
+        if option == "OFF":
+            self.timings = None
+            self.feedback("Timing off")
+        elif option == "RESET" or self.timings is None:
+            self.timings = CommandTimings()
+            self.feedback("Timing on, TIMING again shows the table, TIMING OFF stops")
+        else:
+            with batched(self.document_outputter) as output:
+                for row in self.timings.summary():
+                    output(row, "\n")
 
     def save_macro(self) -> None:
         """Save the document to the file"""
@@ -552,6 +1309,10 @@ class Dedlin:
         """Print out the final report"""
         if self.history:
             self.feedback(f"History saved to {self.history_log.history_file_string}")
+        if self.timings is not None and self.timing_path is not None:
+            self.timings.write_json(self.timing_path)
+            self.feedback(f"Timings saved to {self.timing_path}")
+        self.buffers.cleanup()
 
     def save_on_crash(
         self, _exception_type: type[BaseException], _value: BaseException, _tb: Optional[TracebackType]
@@ -564,4 +1325,5 @@ class Dedlin:
             _tb (Optional[TracebackType]): The traceback
         """
         self.save_document()
+        self.save_other_buffers()
         # raise exception_type
@@ -0,0 +1,109 @@
+"""
+Print-to-standard-out, but with batched writes.
+
+Listing a big document one `print()` per line means one write per line. Inside a
+`batch()` block, output is collected in memory and written in large chunks instead.
+"""
+
+import io
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional, TextIO
+
+from dedlin.basic_types import BatchingPrintable, Printable
+
+DEFAULT_FLUSH_THRESHOLD = 256 * 1024
+"""Characters to accumulate before writing a block to the stream."""
+
+
+class BufferedPrinter:
+    """Printable that writes straight through, except inside a batch.
+
+    Implements BatchingPrintable
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, flush_threshold: int = DEFAULT_FLUSH_THRESHOLD) -> None:
+        """Set up initial state.
+
+        Args:
+            stream (Optional[TextIO]): Where to write. Defaults to sys.stdout at time of writing.
+            flush_threshold (int): Characters to buffer before writing. Defaults to 256k.
+        """
+        self.stream = stream
+        self.flush_threshold = flush_threshold
+        self.buffer = io.StringIO()
+        self.pending = 0
+        self.depth = 0
+
+    def __call__(self, text: Optional[str], end: str = "\n") -> None:
+        """Same rules as plain_printer, but may hold the text back.
+
+        Args:
+            text (Optional[str]): The text to print
+            end (str): The end. Defaults to "\n".
+        """
+        text = "" if text is None else text
+        if text.endswith("\n"):
+            text = text[:-1]
+            end = ""
+        if not self.depth:
+            self._target().write(text + end)
+            return
+        self.pending += self.buffer.write(text)
+        self.pending += self.buffer.write(end)
+        if self.pending >= self.flush_threshold:
+            self.flush()
+
+    def _target(self) -> TextIO:
+        """Resolve the stream late so that redirected stdout is honored.
+
+        Returns:
+            TextIO: The stream
+        """
+        return self.stream if self.stream is not None else sys.stdout
+
+    def flush(self) -> None:
+        """Write out everything held back so far."""
+        if not self.pending:
+            return
+        target = self._target()
+        target.write(self.buffer.getvalue())
+        target.flush()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.pending = 0
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Buffer output until the end of the block. Blocks can nest.
+
+        Yields:
+            None: Nothing, use the printer as usual
+        """
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.flush()
+
+
+@contextmanager
+def batched(printer: Printable) -> Iterator[Printable]:
+    """Batch output if the printer supports it, otherwise pass it through.
+
+    Args:
+        printer (Printable): Any printable
+
+    Yields:
+        Printable: The same printer
+    """
+    if isinstance(printer, BatchingPrintable):
+        with printer.batch():
+            yield printer
+    else:
+        yield printer
+
+
+buffered_printer = BufferedPrinter()
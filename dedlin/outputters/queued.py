@@ -0,0 +1,130 @@
+"""
+Print through the event loop, for the async command loop.
+
+Commands run on worker threads and print into a queue, a task on the loop prints what is queued
+to the real printer. A burst of output costs one wakeup of the loop and is printed as one batch.
+Output of a batch() block is queued as one piece, so commands running at the same time don't
+interleave their lines.
+"""
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from dedlin.basic_types import Printable
+from dedlin.outputters.buffered import batched
+
+QueuedText = list[tuple[Optional[str], str]]
+
+MAX_HELD = 10_000
+"""Lines a batch() block holds back at most, a long LIST is queued in pieces this size."""
+
+
+class QueuedPrinter:
+    """Printable that queues text for a task on the event loop to print
+
+    Implements BatchingPrintable
+    """
+
+    def __init__(self, printer: Printable, loop: asyncio.AbstractEventLoop) -> None:
+        """Set up initial state.
+
+        Args:
+            printer (Printable): Where the text ends up
+            loop (asyncio.AbstractEventLoop): The loop drain() runs on
+        """
+        self.printer = printer
+        self.loop = loop
+        self.queue: asyncio.Queue[QueuedText] = asyncio.Queue()
+        self.pending: QueuedText = []
+        """Printed but not handed to the loop yet"""
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        """Text held back by a batch() block of this thread"""
+
+    def __call__(self, text: Optional[str], end: str = "\n") -> None:
+        """Queue text, from any thread.
+
+        Args:
+            text (Optional[str]): The text to print
+            end (str): The end. Defaults to "\n".
+        """
+        held: Optional[QueuedText] = getattr(self.local, "held", None)
+        if held is None:
+            self._queue([(text, end)])
+            return
+        held.append((text, end))
+        if len(held) >= MAX_HELD:
+            self.flush()
+
+    def _queue(self, items: QueuedText) -> None:
+        """Add text to what the loop will pick up next.
+
+        Args:
+            items (QueuedText): Text and line ends
+        """
+        with self.lock:
+            was_empty = not self.pending
+            self.pending.extend(items)
+        if was_empty:
+            # else the loop hasn't picked up the earlier text yet, it will take this too
+            self.loop.call_soon_threadsafe(self._hand_over)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Queue the output of the block as one piece. Blocks can nest.
+
+        Yields:
+            None: Nothing, use the printer as usual
+        """
+        if getattr(self.local, "held", None) is not None:
+            yield
+            return
+        self.local.held = []
+        try:
+            yield
+        finally:
+            self.flush()
+            self.local.held = None
+
+    def flush(self) -> None:
+        """Queue what this thread's batch() block held back so far."""
+        held: Optional[QueuedText] = getattr(self.local, "held", None)
+        if held:
+            self.local.held = []
+            self._queue(held)
+
+    def _hand_over(self) -> None:
+        """Move pending text to the queue, on the loop."""
+        with self.lock:
+            items, self.pending = self.pending, []
+        if items:
+            self.queue.put_nowait(items)
+
+    def interrupt(self) -> None:
+        """Skip what hasn't been printed yet, on the loop."""
+        with self.lock:
+            self.pending = []
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        interrupt = getattr(self.printer, "interrupt", None)
+        if interrupt is not None:
+            interrupt()
+
+    async def drain(self) -> None:
+        """Print queued text until cancelled."""
+        while True:
+            items = await self.queue.get()
+            try:
+                with batched(self.printer) as output:
+                    for text, end in items:
+                        output(text, end)
+            finally:
+                self.queue.task_done()
+
+    async def join(self) -> None:
+        """Wait until everything queued so far has been printed, on the loop."""
+        self._hand_over()
+        await self.queue.join()
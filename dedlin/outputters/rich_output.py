@@ -1,17 +1,74 @@
 """Make the output of the program more readable."""
 
-from typing import Optional
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
 
+from pygments import highlight
+from pygments.formatter import Formatter
+from pygments.formatters import Terminal256Formatter, TerminalFormatter, TerminalTrueColorFormatter
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
 from rich.console import Console
 from rich.syntax import Syntax
+from rich.text import Text
+
+MAX_BLOCK_LINES = 2_000
+"""Lines to highlight in one go before streaming out a block."""
+
+
+@lru_cache(maxsize=16)
+def get_lexer(language: str) -> Lexer:
+    """Pygments lexers are costly to look up, so keep them around.
+
+    Args:
+        language (str): Name or alias of a pygments lexer
+
+    Returns:
+        Lexer: The lexer
+    """
+    return get_lexer_by_name(language)
+
+
+@lru_cache(maxsize=4)
+def get_formatter(color_system: str) -> Formatter:
+    """Terminal formatter using the same theme as rich.syntax.Syntax, limited to the console's colors.
+
+    Args:
+        color_system (str): Color system of the rich console
+
+    Returns:
+        Formatter: The formatter
+    """
+    if color_system == "truecolor":
+        return TerminalTrueColorFormatter(style="monokai")
+    if color_system == "256":
+        return Terminal256Formatter(style="monokai")
+    # "standard" and "windows" only have the 16 basic colors
+    return TerminalFormatter()
 
 
 class RichPrinter:
-    """Make the output of the program more readable."""
+    """Make the output of the program more readable.
+
+    Implements BatchingPrintable
+    """
 
-    def __init__(self) -> None:
-        """Set up initial state"""
-        self.console = Console()
+    def __init__(
+        self, console: Optional[Console] = None, language: str = "python", max_block_lines: int = MAX_BLOCK_LINES
+    ) -> None:
+        """Set up initial state
+
+        Args:
+            console (Optional[Console]): The console. Defaults to a new console.
+            language (str): Language to highlight. Defaults to "python".
+            max_block_lines (int): Lines to hold back in a batch before writing. Defaults to 2000.
+        """
+        self.console = console if console is not None else Console()
+        self.language = language
+        self.max_block_lines = max_block_lines
+        self.pending: list[str] = []
+        self.depth = 0
 
     def print(self, text: str, end: Optional[str]) -> None:
         """Syntax highlighting
@@ -27,12 +84,66 @@ class RichPrinter:
             text = text[:-1]
         syntax = Syntax(
             text,
-            "python",
+            get_lexer(self.language),
             # theme="monokai",
             line_numbers=False,
+            # match batched output, which has no background
+            background_color="default",
         )
         self.console.print(syntax, end=end)
 
+    def __call__(self, text: Optional[str], end: str = "\n") -> None:
+        """Print one line, or hold it back for a block if batching.
+
+        Args:
+            text (Optional[str]): The text to print
+            end (str): Ignored, each call is a line. Defaults to "\n".
+        """
+        text = "" if text is None else text
+        if not self.depth:
+            self.print(text, end="")
+            return
+        self.pending.append(text[:-1] if text.endswith("\n") else text)
+        if len(self.pending) >= self.max_block_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        """Lex and write everything held back as one block.
+
+        Rich renders a Syntax line by line, which costs far more than the lexing, so
+        blocks go through the pygments terminal formatter and out in one write.
+        """
+        if not self.pending:
+            return
+        block = "\n".join(self.pending) + "\n"
+        self.pending = []
+        color_system = self.console.color_system
+        if color_system is None:
+            self.console.file.write(block)
+        elif color_system == "windows":
+            # legacy windows console can't show escape codes, let rich translate them
+            ansi = highlight(block, get_lexer(self.language), get_formatter(color_system))
+            self.console.print(Text.from_ansi(ansi), end="")
+            return
+        else:
+            self.console.file.write(highlight(block, get_lexer(self.language), get_formatter(color_system)))
+        self.console.file.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Highlight the lines of the block together.
+
+        Yields:
+            None: Nothing, use the printer as usual
+        """
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if not self.depth:
+                self.flush()
+
 
 rich_printer = RichPrinter()
 
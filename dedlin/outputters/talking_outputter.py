@@ -1,7 +1,13 @@
-"""Make text editor hypothetically usable while blind."""
+"""Make text editor hypothetically usable while blind.
+
+Speech is slow, so text is queued and spoken by a worker thread while the command loop
+carries on. When a new command arrives, anything not yet spoken is stale and skipped.
+"""
 
 import logging
-from typing import Optional
+import queue
+import threading
+from typing import Any, Optional
 
 try:
     import pyttsx3
@@ -10,23 +16,76 @@ except (ImportError, RuntimeError):
 
 logger = logging.getLogger(__name__)
 
+MAX_QUEUED_MESSAGES = 32
+"""Oldest messages are dropped when more than this are waiting to be spoken."""
+
+STATUS_PREFIXES = ("Current line", "--- Current line")
+"""Status lines, only the latest one of a burst is worth saying."""
+
+_START_ENGINE: Any = object()
+"""Default engine, start pyttsx3 on the speech thread. Pass None for no engine at all."""
+
+
+def _init_engine() -> Any:
+    """Start pyttsx3 if possible.
+
+    Returns:
+        Any: The engine or None
+    """
+    if pyttsx3 is None:
+        return None
+    try:
+        return pyttsx3.init()
+    except Exception:
+        return None
+
+
+def coalesce(messages: list[str]) -> list[str]:
+    """Drop repeats and all but the last status line from a burst of messages.
+
+    Args:
+        messages (list[str]): The messages, oldest first
+
+    Returns:
+        list[str]: What is worth saying
+    """
+    last_status = None
+    for index, message in enumerate(messages):
+        if message.startswith(STATUS_PREFIXES):
+            last_status = index
+    kept: list[str] = []
+    for index, message in enumerate(messages):
+        if message.startswith(STATUS_PREFIXES) and index != last_status:
+            continue
+        if kept and kept[-1] == message:
+            continue
+        kept.append(message)
+    return kept
+
 
 class TalkingPrinter:
     """ "Make the output of the program more readable."""
 
-    def __init__(self) -> None:
-        """Set up initial state"""
-        if pyttsx3 is not None:
-            try:
-                self.engine = pyttsx3.init()
-            except Exception:
-                self.engine = None
-        else:
-            self.engine = None
+    def __init__(self, engine: Any = _START_ENGINE, max_queued: int = MAX_QUEUED_MESSAGES) -> None:
+        """Set up initial state
+
+        Args:
+            engine (Any): Something like a pyttsx3 engine, for tests. Defaults to starting pyttsx3 on first use.
+            max_queued (int): Messages to hold before dropping the oldest. Defaults to 32.
+        """
+        if engine is _START_ENGINE and pyttsx3 is None:
+            engine = None
+        self.engine = engine
+        self.messages: queue.Queue[tuple[int, str]] = queue.Queue(maxsize=max_queued)
+        self.generation = 0
+        """Bumped on interrupt, messages from older generations are stale."""
+        self.speaking_generation = 0
+        self.worker: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
 
     # pylint:  disable=unused-argument
     def print(self, text: str, end: Optional[str]) -> None:
-        """Speak.
+        """Queue text to be spoken.
 
         Args:
             text (str): The text to print
@@ -35,8 +94,108 @@ class TalkingPrinter:
         if self.engine is None:
             logger.warning("No pyttsx3 installed, cannot speak")
             return
-        self.engine.say(text)
-        self.engine.runAndWait()
+        self._start_worker()
+        item = (self.generation, text)
+        while True:
+            try:
+                self.messages.put_nowait(item)
+                return
+            except queue.Full:
+                self._discard_one()
+
+    def __call__(self, text: Optional[str], end: str = "\n") -> None:
+        """Speak.
+
+        Args:
+            text (Optional[str]): The text to print
+            end (str): The end. Defaults to "\n".
+        """
+        self.print("" if text is None else text, end=end)
+
+    def interrupt(self) -> None:
+        """Skip everything queued and cut off what is being said."""
+        with self.lock:
+            self.generation += 1
+        while self._discard_one():
+            pass
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued has been spoken or skipped.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait at most. Defaults to forever.
+
+        Returns:
+            bool: False if it timed out
+        """
+        with self.messages.all_tasks_done:
+            return self.messages.all_tasks_done.wait_for(lambda: not self.messages.unfinished_tasks, timeout)
+
+    def _discard_one(self) -> bool:
+        """Drop the oldest queued message.
+
+        Returns:
+            bool: False if there was nothing to drop
+        """
+        try:
+            self.messages.get_nowait()
+        except queue.Empty:
+            return False
+        self.messages.task_done()
+        return True
+
+    def _start_worker(self) -> None:
+        """Start the speech thread on first use."""
+        with self.lock:
+            if self.worker is not None:
+                return
+            self.worker = threading.Thread(target=self._speak_forever, name="dedlin-speech", daemon=True)
+            self.worker.start()
+
+    # pylint: disable=unused-argument
+    def _stop_if_stale(self, name: Any = None, location: int = 0, length: int = 0) -> None:
+        """Engine callback, runs on the speech thread between words.
+
+        Args:
+            name (Any): Utterance name
+            location (int): Where the word starts
+            length (int): Length of the word
+        """
+        if self.speaking_generation != self.generation:
+            self.engine.stop()
+
+    def _speak_forever(self) -> None:
+        """Worker loop, say each burst of messages with one runAndWait."""
+        if self.engine is _START_ENGINE:
+            # pyttsx3 drivers belong to the thread that started them
+            self.engine = _init_engine()
+        if self.engine is None:
+            logger.warning("Could not start pyttsx3, cannot speak")
+            while True:
+                self.messages.get()
+                self.messages.task_done()
+        if hasattr(self.engine, "connect"):
+            self.engine.connect("started-word", self._stop_if_stale)
+        while True:
+            generation, text = self.messages.get()
+            burst = [(generation, text)]
+            while True:
+                try:
+                    burst.append(self.messages.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                current = [message for message_generation, message in burst if message_generation == self.generation]
+                if current:
+                    self.speaking_generation = self.generation
+                    for message in coalesce(current):
+                        self.engine.say(message)
+                    self.engine.runAndWait()
+            except Exception as exception:  # pylint: disable=broad-except
+                logger.warning(f"Speech failed: {exception}")
+            finally:
+                for _ in burst:
+                    self.messages.task_done()
 
 
 talking_printer = TalkingPrinter()
@@ -4,9 +4,11 @@ Code that turns strings to command objects
 
 import logging
 import shlex
+import time
 from typing import Iterable, Optional
 
 from dedlin.basic_types import Command, Commands, LineRange, Phrases, try_parse_int
+from dedlin.tools import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -143,6 +145,8 @@ RANGE_ONLY = {
     Commands.LIST: ("L", "LIST"),
     Commands.PAGE: ("P", "PAGE"),
     Commands.SPELL: ("SPELL",),
+    # before R and S, which BUFFER and others end with
+    Commands.BUFFER: ("BUFFER",),
     Commands.SEARCH: ("S", "SEARCH"),  # 1 phrase
     Commands.REPLACE: ("R", "REPLACE"),  # 2 phrases
     Commands.EXIT: ("X", "EXIT"),
@@ -153,6 +157,7 @@ RANGE_ONLY = {
     Commands.SHUFFLE: ("SHUFFLE",),
     Commands.SORT: ("SORT",),
     Commands.REVERSE: ("REVERSE",),
+    Commands.DEDUPE: ("DEDUPE", "UNIQ"),
     # String Commands
     Commands.TITLE: ("TITLE",),
     Commands.SWAPCASE: ("SWAPCASE",),
@@ -167,6 +172,9 @@ RANGE_ONLY = {
     Commands.RSTRIP: ("RSTRIP",),
     Commands.LSTRIP: ("LSTRIP",),
     Commands.STRIP: ("STRIP",),
+    # Block String Commands
+    Commands.INDENT: ("INDENT",),
+    Commands.DEDENT: ("DEDENT",),
 }
 
 
@@ -244,6 +252,9 @@ COMMANDS_WITH_PHRASES = {
     Commands.CRASH: ("CRASH",),
     Commands.EXPORT: ("EXPORT",),
     Commands.MACRO: ("MACRO",),
+    Commands.DIFF: ("DIFF",),
+    Commands.TIMING: ("TIMING",),
+    Commands.PROFILE: ("PROFILE",),
 }
 
 
@@ -312,6 +323,7 @@ BARE_COMMANDS = {
     Commands.UNDO: ("UNDO",),
     Commands.WRITE: ("W", "WRITE"),
     Commands.SAVE: ("SAVE",),
+    Commands.INFO: ("INFO",),
     Commands.EXIT: ("E", "EXIT"),  # BUG, this takes argument.
     Commands.QUIT: ("Q", "QUIT"),
 }
@@ -335,6 +347,27 @@ def bare_command(command: str) -> Optional[Command]:
 
 
 def parse_command(command: str, current_line: int, document_length: int, headless: bool) -> Command:
+    """Parse a command, timing it if metrics are on.
+
+    Args:
+        command (str): The command
+        current_line (int): The current line
+        document_length (int): The document length
+        headless (bool): Whether headless
+    Returns:
+        Command: The command
+    """
+    recorder = metrics.METRICS
+    if recorder is None:
+        return _parse_command(command, current_line, document_length, headless)
+    started = time.perf_counter()
+    try:
+        return _parse_command(command, current_line, document_length, headless)
+    finally:
+        recorder.parsed(time.perf_counter() - started)
+
+
+def _parse_command(command: str, current_line: int, document_length: int, headless: bool) -> Command:
     """Parse a command.
 
     Args:
@@ -1,14 +1,57 @@
 """Pass string commands to python."""
 
+import os
+import sys
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from operator import methodcaller
+from typing import Callable, Optional
 
-from dedlin.basic_types import Command, Commands
+from dedlin.basic_types import Command, Commands, LineRange
 
 COMMANDS_WITH_PHRASES = {
     # String Commands
     Commands.STRIP: ("STRIP",)
 }
 
+LINE_TRANSFORMS: dict[Commands, Callable[[str], str]] = {
+    # leading and trailing space
+    Commands.STRIP: str.strip,
+    Commands.LSTRIP: str.lstrip,
+    Commands.RSTRIP: str.rstrip,
+    # capitalization
+    Commands.LOWER: str.lower,
+    Commands.UPPER: str.upper,
+    Commands.CAPITALIZE: str.capitalize,
+    Commands.CASEFOLD: str.casefold,
+    Commands.SWAPCASE: str.swapcase,
+    Commands.TITLE: str.title,
+}
+"""Commands that are a str method with no arguments."""
+
+WIDTH_TRANSFORMS: dict[Commands, str] = {
+    Commands.CENTER: "center",
+    Commands.LJUST: "ljust",
+    Commands.RJUST: "rjust",
+    Commands.EXPANDTABS: "expandtabs",
+}
+"""Commands that are a str method taking a width."""
+
+STRING_COMMANDS = (*LINE_TRANSFORMS, *WIDTH_TRANSFORMS)
+"""Commands that change each line on its own."""
+
+BLOCK_COMMANDS = (Commands.INDENT, Commands.DEDENT)
+"""Commands that change the range as a unit."""
+
+DEFAULT_INDENT = "    "
+"""INDENT with no prefix given."""
+
+PARALLEL_MIN_LINES = 500_000
+"""Ranges shorter than this are transformed on one thread, splitting them costs more than it saves."""
+
+CHUNK_LINES = 100_000
+"""Lines per task when transforming in parallel."""
+
 
 def block_commands(lines: list[str], command: Command) -> list[str]:
     """String manipulation for whole range as a unit, not line per line.
@@ -22,52 +65,121 @@ def block_commands(lines: list[str], command: Command) -> list[str]:
 
     # doesn't need to use preferred line break
     block = "\n".join(lines)
-    if command.command == Commands.INDENT and command.phrases and command.phrases.first is not None:
-        block = textwrap.indent(block, command.phrases.first)
+    if command.command == Commands.INDENT:
+        prefix = command.phrases.first if command.phrases and command.phrases.first is not None else DEFAULT_INDENT
+        block = textwrap.indent(block, prefix)
     if command.command == Commands.DEDENT:
         block = textwrap.dedent(block)
     return block.split("\n")
 
 
-def process_strings(lines: list[str], command: Command) -> None:
-    """Apply string function to each line.
+def string_transform(command: Command) -> Optional[Callable[[str], str]]:
+    """Resolve a string command to the function to apply to each line.
+
+    Args:
+        command (Command): The command
+
+    Raises:
+        NotImplementedError: If the command is not a string command
+
+    Returns:
+        Optional[Callable[[str], str]]: The function, None if a width is missing or not a number
+    """
+    if command.command in LINE_TRANSFORMS:
+        return LINE_TRANSFORMS[command.command]
+    if command.command in WIDTH_TRANSFORMS:
+        width = command.phrases.first if command.phrases else None
+        if width is None or not width.isdigit():
+            return None
+        return methodcaller(WIDTH_TRANSFORMS[command.command], int(width))
+    raise NotImplementedError()
+
+
+def range_slice(lines: list[str], line_range: Optional[LineRange]) -> slice:
+    """Slice of the lines a range covers, all of them if there is no range.
+
+    Args:
+        lines (list[str]): The lines
+        line_range (Optional[LineRange]): The range
+
+    Returns:
+        slice: The slice
+    """
+    if line_range is None:
+        return slice(0, len(lines))
+    return line_range.to_slice()
+
+
+def gil_enabled() -> bool:
+    """Whether threads take turns running python, true unless this is a free-threaded build.
+
+    Returns:
+        bool: True if the GIL is on
+    """
+    is_gil_enabled: Callable[[], bool] = getattr(sys, "_is_gil_enabled", lambda: True)
+    return is_gil_enabled()
+
+
+def parallel_map(transform: Callable[[str], str], lines: list[str], workers: int) -> list[str]:
+    """Transform chunks of lines on a thread pool, results in the original order.
+
+    Args:
+        transform (Callable[[str], str]): Applied to each line
+        lines (list[str]): The lines
+        workers (int): Threads
+
+    Returns:
+        list[str]: The transformed lines
+    """
+
+    def apply(start: int) -> list[str]:
+        return list(map(transform, lines[start : start + CHUNK_LINES]))
+
+    result: list[str] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dedlin-strings") as pool:
+        for chunk in pool.map(apply, range(0, len(lines), CHUNK_LINES)):
+            result.extend(chunk)
+    return result
+
+
+def transform_lines(transform: Callable[[str], str], lines: list[str], workers: Optional[int] = None) -> list[str]:
+    """Transform each line, in parallel for big ranges when threads can actually run at once.
+
+    Args:
+        transform (Callable[[str], str]): Applied to each line
+        lines (list[str]): The lines
+        workers (Optional[int]): Threads. Defaults to one per CPU.
+
+    Returns:
+        list[str]: The transformed lines
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(lines) >= PARALLEL_MIN_LINES and not gil_enabled():
+        return parallel_map(transform, lines, workers)
+    return list(map(transform, lines))
+
+
+def process_strings(lines: list[str], command: Command, line_range: Optional[LineRange] = None) -> bool:
+    """Apply string function to each line in the range.
 
     Args:
         lines (list[str]): The lines
         command (Command): The command
+        line_range (Optional[LineRange]): The range. Defaults to all lines.
 
     Raises:
         NotImplementedError: If the command is not implemented
+
+    Returns:
+        bool: False if the command's width is missing, nothing changed
     """
-    for index, line in enumerate(lines):
-        # leading and trailing space
-
-        if command.command == Commands.STRIP:
-            lines[index] = line.strip()
-        elif command.command == Commands.LSTRIP:
-            lines[index] = line.lstrip()
-        elif command.command == Commands.RSTRIP:
-            lines[index] = line.rstrip()
-        elif command.command == Commands.CENTER and command.phrases and command.phrases.first is not None:
-            lines[index] = line.center(int(command.phrases.first))
-        elif command.command == Commands.LJUST and command.phrases and command.phrases.first is not None:
-            lines[index] = line.ljust(int(command.phrases.first))
-        elif command.command == Commands.RJUST and command.phrases and command.phrases.first is not None:
-            lines[index] = line.rjust(int(command.phrases.first))
-        elif command.command == Commands.EXPANDTABS and command.phrases and command.phrases.first is not None:
-            lines[index] = line.expandtabs(int(command.phrases.first))
-        # capitalization
-        elif command.command == Commands.LOWER:
-            lines[index] = line.lower()
-        elif command.command == Commands.UPPER:
-            lines[index] = line.upper()
-        elif command.command == Commands.CAPITALIZE:
-            lines[index] = line.capitalize()
-        elif command.command == Commands.CASEFOLD:
-            lines[index] = line.casefold()
-        elif command.command == Commands.SWAPCASE:
-            lines[index] = line.swapcase()
-        elif command.command == Commands.TITLE:
-            lines[index] = line.title()
-        else:
-            raise NotImplementedError()
+    if command.command in BLOCK_COMMANDS:
+        window = range_slice(lines, line_range)
+        lines[window] = block_commands(lines[window], command)
+        return True
+    transform = string_transform(command)
+    if transform is None:
+        return False
+    window = range_slice(lines, line_range)
+    lines[window] = transform_lines(transform, lines[window])
+    return True
@@ -33,7 +33,9 @@ STRINGS_HELP = """String commands
 [range] CENTER [width] - center text in span of width
 [range] RSTRIP - strip trailing whitespace
 [range] LSTRIP - strip leading whitespace
-[range] STRIP - strip leading and trailing whitespace"""
+[range] STRIP - strip leading and trailing whitespace
+[range] INDENT [prefix] - put prefix, default four spaces, before each line
+[range] DEDENT - remove common leading whitespace"""
 
 
 FILES_HELP = """File System Commands
@@ -47,10 +49,11 @@ MACRO [file] - run commands from a macro file
 SPECIFIC_HELP = {
     "DISPLAY": """Display Commands
 [range] List - display lines, set current to end of range
-[range] Page - repeat to flip through entire document
+[line] Page - repeat to flip through entire document, jump to [line] first if given
 [range] Spell - show spelling mistakes
 [range] Search "[text]"
 [line] Current - set current line to [line]
+Diff [UNDO] - show changes since the file was saved, or since the last undo point
 """,
     "EDIT": """Edit Commands
 [line] - Bare number defaults to Edit at that line. Not available in headless mode.
@@ -71,12 +74,17 @@ HISTORY [file] - list_doc all commands run
 MACRO [file] - run macro from the current session
 REDO - redo last command
 UNDO - undo last command that changed state
+INFO - word counts, and memory used by the document, the undo copy and caches
+TIMING [OFF|RESET] - time each command, show a table of times per command
+PROFILE START|STOP [file] - cProfile the commands in between, save a pstats file
+BUFFER [LIST|OPEN file [name]|SWITCH name|CLOSE [name]] - edit several files, 1,5 COPY 10 name copies to another
 HELP - display this""",
     "REORDER": """Reorder Commands
 [range] Move [target line number] - move range to target
 [range] Copy [target line number] - copy range to target
-[range] Sort - sort lines alphabetically
+[range] Sort [NUMERIC] [NOCASE] [REVERSE] [UNIQUE] [FIELD n|COLUMN n] - sort lines alphabetically or by key
 [range] Reverse - reverse line order
+[range] Dedupe [COUNT] - drop repeated lines, keeping the first, COUNT prefixes how often each occurred (alias UNIQ)
 [range] Shuffle - shuffle lines randomly""",
     "FILE": FILES_HELP,
     "FILES": FILES_HELP,
@@ -102,11 +110,11 @@ Quit - Exit if no modifications
 Exit [file name] - Save and exit
 
 Command Categories
-DISPLAY - List, Page, Spell, Search, Current
+DISPLAY - List, Page, Spell, Search, Current, Diff
 EDIT - Edit, Insert, Delete, Replace
 DATA - Transfer, Lorem, Browse
 META - HISTORY, MACRO, REDO, UNDO, HELP
-REORDER - Move, Copy, Sort, Reverse, Shuffle
+REORDER - Move, Copy, Sort, Reverse, Shuffle, Dedupe
 FILES - File system commands
 """
 
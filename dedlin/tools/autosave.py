@@ -0,0 +1,105 @@
+"""
+Autosave to a recovery file next to the document.
+
+A worker thread wakes up every interval. If the document changed since the last autosave,
+it takes a snapshot between commands and writes it out, so the prompt never waits on the disk.
+"""
+
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_SUFFIX = ".autosave"
+"""Recovery file is the document's name plus this."""
+
+
+def sidecar_path(path: Path) -> Path:
+    """Where the recovery file for a document goes.
+
+    Args:
+        path (Path): The document
+
+    Returns:
+        Path: The recovery file
+    """
+    return path.with_name(path.name + AUTOSAVE_SUFFIX)
+
+
+class AutosaveWorker:
+    """Write snapshots on an interval, coalescing all changes in between into one write."""
+
+    def __init__(
+        self,
+        take_snapshot: Callable[[], Optional[tuple[int, list[str]]]],
+        write: Callable[[list[str]], None],
+        interval: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Set up initial state.
+
+        Args:
+            take_snapshot (Callable[[], Optional[tuple[int, list[str]]]]): Version and lines, None if not dirty
+            write (Callable[[list[str]], None]): Writes the lines to the recovery file
+            interval (float): Seconds between autosaves
+            clock (Callable[[], float]): Seconds, for tests. Defaults to time.monotonic.
+        """
+        self.take_snapshot = take_snapshot
+        self.write = write
+        self.interval = interval
+        self.clock = clock
+        self.next_due = clock() + interval
+        self.saved_version: Optional[int] = None
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def tick(self) -> bool:
+        """Autosave if due and there is something new.
+
+        Returns:
+            bool: True if a snapshot was written
+        """
+        now = self.clock()
+        if now < self.next_due:
+            return False
+        self.next_due = now + self.interval
+        snapshot = self.take_snapshot()
+        if snapshot is None:
+            return False
+        version, lines = snapshot
+        if version == self.saved_version:
+            return False
+        try:
+            self.write(lines)
+        except OSError as exception:
+            # try again next time, don't take the session down over a recovery file
+            logger.warning(f"Autosave failed: {exception}")
+            return False
+        self.saved_version = version
+        return True
+
+    def start(self) -> None:
+        """Tick on a daemon thread until stopped."""
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="dedlin-autosave", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop ticking, waiting for a write in progress.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait at most. Defaults to forever.
+        """
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while not self.stopping.wait(self.interval):
+            self.tick()
@@ -0,0 +1,63 @@
+"""
+Drop duplicate lines in one pass.
+
+Lines are remembered by a fixed size digest instead of their text, so a range full of very
+long lines costs the same memory to dedupe as one of short lines.
+"""
+
+import hashlib
+from typing import Callable, Optional
+
+DIGEST_SIZE = 16
+"""Bytes of blake2b digest kept per distinct line, collisions are vanishingly unlikely."""
+
+
+def line_digest(line: str) -> bytes:
+    """Fixed size fingerprint of a line.
+
+    Args:
+        line (str): The line
+
+    Returns:
+        bytes: The digest
+    """
+    return hashlib.blake2b(line.encode("utf-8", "surrogatepass"), digest_size=DIGEST_SIZE).digest()
+
+
+def dedupe_lines(lines: list[str], digest: Callable[[str], bytes] = line_digest) -> tuple[list[str], list[int]]:
+    """Keep the first occurrence of each line, in order.
+
+    Args:
+        lines (list[str]): The lines, not changed
+        digest (Callable[[str], bytes]): Fingerprint of a line. Defaults to line_digest.
+
+    Returns:
+        tuple[list[str], list[int]]: The kept lines, and how many times each occurred
+    """
+    first_seen: dict[bytes, int] = {}
+    kept: list[str] = []
+    counts: list[int] = []
+    for line in lines:
+        key = digest(line)
+        position: Optional[int] = first_seen.get(key)
+        if position is None:
+            first_seen[key] = len(kept)
+            kept.append(line)
+            counts.append(1)
+        else:
+            counts[position] += 1
+    return kept, counts
+
+
+def with_counts(lines: list[str], counts: list[int]) -> list[str]:
+    """Prefix each line with how many times it occurred, like `uniq -c`.
+
+    Args:
+        lines (list[str]): The kept lines
+        counts (list[int]): Occurrences of each
+
+    Returns:
+        list[str]: The counted lines
+    """
+    width = len(str(max(counts, default=1)))
+    return [f"{count:>{width}} {line}" for line, count in zip(lines, counts)]
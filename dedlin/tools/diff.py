@@ -0,0 +1,299 @@
+"""
+Unified diff between two versions of a document, fast enough for million line files.
+
+The common start and end are trimmed as text, the rest is hashed to integers once and matched with
+patience diff: lines that occur once on each side anchor the match, and the gaps between anchors
+are diffed the same way. Small gaps without anchors fall back to difflib, big ones are halved.
+Lines known to be unchanged, e.g. before the first edit since the last save, aren't compared.
+"""
+
+import difflib
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain, islice
+from operator import lt
+from typing import Generator, Iterable
+
+FALLBACK_LIMIT = 4_000_000
+"""Largest gap, in lines on one side times lines on the other, handed to difflib."""
+
+CONTEXT_LINES = 3
+"""Unchanged lines around each change, same as diff -u."""
+
+Block = tuple[int, int, int]
+"""Matching run, start in old, start in new, length."""
+
+Opcode = tuple[str, int, int, int, int]
+"""Same as difflib, tag and old and new slices."""
+
+
+def line_ids(old: list[str], new: list[str], start: int, old_end: int, new_end: int) -> tuple[list[int], list[int]]:
+    """Replace each line between start and the ends with a small integer, equal lines get equal integers.
+
+    Args:
+        old (list[str]): The old lines
+        new (list[str]): The new lines
+        start (int): Lines before this are the same in both, they are -1
+        old_end (int): Old lines from here on are the same as the new ones at the end, they are -1
+        new_end (int): New lines from here on are the same as the old ones at the end, they are -1
+
+    Returns:
+        tuple[list[int], list[int]]: Old and new as integers
+    """
+    old_middle, new_middle = islice(old, start, old_end), islice(new, start, new_end)
+    ids = {line: number for number, line in enumerate(dict.fromkeys(chain(old_middle, new_middle)))}
+    suffix = [-1] * (len(old) - old_end)
+    old_ids = [-1] * start + list(map(ids.__getitem__, islice(old, start, old_end))) + suffix
+    new_ids = [-1] * start + list(map(ids.__getitem__, islice(new, start, new_end))) + suffix
+    return old_ids, new_ids
+
+
+def _unique_anchors(
+    old: list[int], new: list[int], old_low: int, old_high: int, new_low: int, new_high: int
+) -> list[tuple[int, int]]:
+    """Longest increasing run of lines that occur exactly once on each side.
+
+    Args:
+        old (list[int]): Old line ids
+        new (list[int]): New line ids
+        old_low (int): Start of the old gap
+        old_high (int): End of the old gap
+        new_low (int): Start of the new gap
+        new_high (int): End of the new gap
+
+    Returns:
+        list[tuple[int, int]]: Old and new index of each anchor, in order
+    """
+    old_gap, new_gap = old[old_low:old_high], new[new_low:new_high]
+    new_counts = Counter(new_gap)
+    unique = {line for line, count in Counter(old_gap).items() if count == 1 and new_counts.get(line) == 1}
+    if not unique:
+        return []
+    new_positions = {line: index for index, line in enumerate(new_gap, new_low) if line in unique}
+    pairs = [(index, new_positions[line]) for index, line in enumerate(old_gap, old_low) if line in unique]
+    new_order = [new_index for _, new_index in pairs]
+    if all(map(lt, new_order, islice(new_order, 1, None))):
+        # nothing moved, the usual case
+        return pairs
+
+    # patience sorting, longest run of pairs increasing in new
+    tails: list[int] = []
+    tail_indices: list[int] = []
+    previous = [-1] * len(pairs)
+    for position, (_, new_index) in enumerate(pairs):
+        pile = bisect_left(tails, new_index)
+        if pile:
+            previous[position] = tail_indices[pile - 1]
+        if pile == len(tails):
+            tails.append(new_index)
+            tail_indices.append(position)
+        else:
+            tails[pile] = new_index
+            tail_indices[pile] = position
+    anchors = []
+    position = tail_indices[-1]
+    while position != -1:
+        anchors.append(pairs[position])
+        position = previous[position]
+    anchors.reverse()
+    return anchors
+
+
+def _match(
+    old: list[int], new: list[int], old_low: int, old_high: int, new_low: int, new_high: int, blocks: list[Block]
+) -> None:
+    """Append the matching runs of a gap to blocks, in order.
+
+    Args:
+        old (list[int]): Old line ids
+        new (list[int]): New line ids
+        old_low (int): Start of the old gap
+        old_high (int): End of the old gap
+        new_low (int): Start of the new gap
+        new_high (int): End of the new gap
+        blocks (list[Block]): Where matches go
+    """
+    start = old_low
+    while old_low < old_high and new_low < new_high and old[old_low] == new[new_low]:
+        old_low += 1
+        new_low += 1
+    if old_low > start:
+        blocks.append((start, new_low - (old_low - start), old_low - start))
+
+    suffix = 0
+    while old_high > old_low and new_high > new_low and old[old_high - 1] == new[new_high - 1]:
+        old_high -= 1
+        new_high -= 1
+        suffix += 1
+
+    if old_low < old_high and new_low < new_high:
+        anchors = _unique_anchors(old, new, old_low, old_high, new_low, new_high)
+        if anchors:
+            for old_anchor, new_anchor in anchors:
+                if old_anchor > old_low or new_anchor > new_low:
+                    _match(old, new, old_low, old_anchor, new_low, new_anchor, blocks)
+                last_old, last_new, size = blocks[-1] if blocks else (-1, -1, 0)
+                if last_old + size == old_anchor and last_new + size == new_anchor:
+                    # anchors in a row are one run
+                    blocks[-1] = (last_old, last_new, size + 1)
+                else:
+                    blocks.append((old_anchor, new_anchor, 1))
+                old_low, new_low = old_anchor + 1, new_anchor + 1
+            _match(old, new, old_low, old_high, new_low, new_high, blocks)
+        elif (old_high - old_low) * (new_high - new_low) <= FALLBACK_LIMIT:
+            matcher = difflib.SequenceMatcher(None, old[old_low:old_high], new[new_low:new_high], autojunk=False)
+            for old_index, new_index, size in matcher.get_matching_blocks():
+                if size:
+                    blocks.append((old_low + old_index, new_low + new_index, size))
+        elif old_high - old_low > 1 and new_high - new_low > 1:
+            # repetitive text, lines that are unique in each half likely exist
+            old_middle = (old_low + old_high) // 2
+            new_middle = new_low + (new_high - new_low) * (old_middle - old_low) // (old_high - old_low)
+            _match(old, new, old_low, old_middle, new_low, new_middle, blocks)
+            _match(old, new, old_middle, old_high, new_middle, new_high, blocks)
+
+    if suffix:
+        blocks.append((old_high, new_high, suffix))
+
+
+def opcodes(old: list[str], new: list[str], skip: int = 0) -> list[Opcode]:
+    """How to turn old into new, like difflib.SequenceMatcher.get_opcodes.
+
+    Args:
+        old (list[str]): The old lines
+        new (list[str]): The new lines
+        skip (int): Leading lines known to be the same in both. Defaults to 0.
+
+    Returns:
+        list[Opcode]: The opcodes
+    """
+    # common start and end are compared as text, the rest is hashed
+    shortest = min(len(old), len(new))
+    start = max(0, min(skip, shortest))
+    while start < shortest and old[start] == new[start]:
+        start += 1
+    old_end, new_end = len(old), len(new)
+    while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+        old_end -= 1
+        new_end -= 1
+
+    blocks: list[Block] = [(0, 0, start)] if start else []
+    if start < old_end and start < new_end:
+        old_ids, new_ids = line_ids(old, new, start, old_end, new_end)
+        _match(old_ids, new_ids, start, old_end, start, new_end, blocks)
+    if old_end < len(old):
+        blocks.append((old_end, new_end, len(old) - old_end))
+
+    codes: list[Opcode] = []
+    old_at = new_at = 0
+    for old_index, new_index, size in blocks + [(len(old), len(new), 0)]:
+        if old_at < old_index and new_at < new_index:
+            codes.append(("replace", old_at, old_index, new_at, new_index))
+        elif old_at < old_index:
+            codes.append(("delete", old_at, old_index, new_at, new_index))
+        elif new_at < new_index:
+            codes.append(("insert", old_at, old_index, new_at, new_index))
+        if size:
+            if codes and codes[-1][0] == "equal":
+                # runs that touch, e.g. an anchor right after a matching prefix
+                codes[-1] = ("equal", codes[-1][1], old_index + size, codes[-1][3], new_index + size)
+            else:
+                codes.append(("equal", old_index, old_index + size, new_index, new_index + size))
+        old_at, new_at = old_index + size, new_index + size
+    return codes
+
+
+def grouped(codes: list[Opcode], context: int = CONTEXT_LINES) -> Generator[list[Opcode], None, None]:
+    """Split opcodes into hunks with context lines around each change, like difflib.
+
+    Args:
+        codes (list[Opcode]): The opcodes
+        context (int): Unchanged lines to show around changes. Defaults to CONTEXT_LINES.
+
+    Returns:
+        Generator[list[Opcode], None, None]: The hunks
+    """
+    if not codes or (len(codes) == 1 and codes[0][0] == "equal"):
+        return
+    codes = list(codes)
+    tag, old_low, old_high, new_low, new_high = codes[0]
+    if tag == "equal":
+        codes[0] = tag, max(old_low, old_high - context), old_high, max(new_low, new_high - context), new_high
+    tag, old_low, old_high, new_low, new_high = codes[-1]
+    if tag == "equal":
+        codes[-1] = tag, old_low, min(old_high, old_low + context), new_low, min(new_high, new_low + context)
+
+    hunk: list[Opcode] = []
+    for tag, old_low, old_high, new_low, new_high in codes:
+        if tag == "equal" and old_high - old_low > context * 2:
+            hunk.append((tag, old_low, min(old_high, old_low + context), new_low, min(new_high, new_low + context)))
+            yield hunk
+            hunk = []
+            old_low, new_low = max(old_low, old_high - context), max(new_low, new_high - context)
+        hunk.append((tag, old_low, old_high, new_low, new_high))
+    if hunk and not (len(hunk) == 1 and hunk[0][0] == "equal"):
+        yield hunk
+
+
+def _hunk_range(start: int, stop: int) -> str:
+    """Line numbers of a hunk in diff -u form.
+
+    Args:
+        start (int): 0 based start
+        stop (int): 0 based end
+
+    Returns:
+        str: e.g. 3,4
+    """
+    length = stop - start
+    if length == 1:
+        return f"{start + 1}"
+    return f"{start + 1 if length else start},{length}"
+
+
+def unified_diff(
+    old: list[str], new: list[str], old_name: str, new_name: str, skip: int = 0, context: int = CONTEXT_LINES
+) -> Generator[str, None, None]:
+    """Unified diff, a line at a time, nothing at all if there are no changes.
+
+    Args:
+        old (list[str]): The old lines
+        new (list[str]): The new lines
+        old_name (str): Label for old
+        new_name (str): Label for new
+        skip (int): Leading lines known to be the same in both. Defaults to 0.
+        context (int): Unchanged lines to show around changes. Defaults to CONTEXT_LINES.
+
+    Returns:
+        Generator[str, None, None]: The diff lines, without line breaks
+    """
+    started = False
+    for hunk in grouped(opcodes(old, new, skip), context):
+        if not started:
+            yield f"--- {old_name}"
+            yield f"+++ {new_name}"
+            started = True
+        first, last = hunk[0], hunk[-1]
+        yield f"@@ -{_hunk_range(first[1], last[2])} +{_hunk_range(first[3], last[4])} @@"
+        for tag, old_low, old_high, new_low, new_high in hunk:
+            if tag == "equal":
+                yield from _prefixed(" ", old[old_low:old_high])
+                continue
+            if tag in ("replace", "delete"):
+                yield from _prefixed("-", old[old_low:old_high])
+            if tag in ("replace", "insert"):
+                yield from _prefixed("+", new[new_low:new_high])
+
+
+def _prefixed(prefix: str, lines: Iterable[str]) -> Generator[str, None, None]:
+    """Prefix each line.
+
+    Args:
+        prefix (str): The prefix
+        lines (Iterable[str]): The lines
+
+    Returns:
+        Generator[str, None, None]: The prefixed lines
+    """
+    for line in lines:
+        yield prefix + line
@@ -1,11 +1,136 @@
 """
 Export to file formats, particularly markdown
+
+Big documents are rendered a block at a time, blocks being separated by blank lines, so
+only one block's worth of tokens and html is in memory at once.
 """
 
-from typing import cast
+import re
+from functools import lru_cache
+from typing import Callable, Generator, Iterable, cast
 
 import mistune
 
+FENCE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+"""Start or end of a fenced code block, blank lines inside don't end a block."""
+
+LIST_ITEM = re.compile(r"^ {0,3}([-+*]|\d{1,9}[.)])(\s|$)")
+"""Items of a loose list are separated by blank lines, but it is still one list."""
+
+REFERENCE = re.compile(r"^ {0,3}\[([^\]]+)\]:")
+"""Link reference definition, can be used from any block."""
+
+BRACKETED = re.compile(r"\[([^\[\]]+)\]")
+"""Text in brackets, a link or image may use it as a reference label."""
+
+
+def reference_label(label: str) -> str:
+    """Labels match case-insensitively and with whitespace collapsed.
+
+    Args:
+        label (str): The label as written
+
+    Returns:
+        str: The label to look it up by
+    """
+    return " ".join(label.split()).casefold()
+
+
+@lru_cache(maxsize=1)
+def get_markdown() -> Callable[[str], str]:
+    """Mistune parser, creating one is costly.
+
+    Returns:
+        Callable[[str], str]: Markdown to html
+    """
+    return cast(Callable[[str], str], mistune.create_markdown())
+
+
+def markdown_blocks(lines: Iterable[str]) -> Generator[list[str], None, None]:
+    """Group lines into blocks that render the same on their own as in the whole document.
+
+    Args:
+        lines (Iterable[str]): The lines
+
+    Returns:
+        Generator[list[str], None, None]: The blocks
+    """
+    block: list[str] = []
+    fence = ""
+    first_is_list = False
+    after_blank = False
+    for line in lines:
+        if fence:
+            block.append(line)
+            match = FENCE.match(line)
+            if match and match.group(1).startswith(fence) and not line[match.end() :].strip():
+                fence = ""
+            continue
+        if not line.strip():
+            if block:
+                block.append(line)
+                after_blank = True
+            continue
+        if after_blank:
+            continues_block = line[0] in " \t" or (first_is_list and LIST_ITEM.match(line) is not None)
+            if not continues_block:
+                yield block
+                block = []
+            after_blank = False
+        if not block:
+            first_is_list = LIST_ITEM.match(line) is not None
+        match = FENCE.match(line)
+        if match:
+            fence = match.group(1)
+        block.append(line)
+    if block:
+        yield block
+
+
+def markdown_block_texts(lines: list[str], preferred_line_break: str) -> Generator[str, None, None]:
+    """Markdown of each block, ready to render on its own.
+
+    Args:
+        lines (list[str]): The lines
+        preferred_line_break (str): The preferred line break
+
+    Returns:
+        Generator[str, None, None]: Markdown for each block
+    """
+    references: dict[str, str] = {}
+    for line in lines:
+        match = REFERENCE.match(line) if "]:" in line else None
+        if match:
+            # the first definition of a label wins
+            references.setdefault(reference_label(match.group(1)), line)
+    for block in markdown_blocks(lines):
+        text = preferred_line_break.join(block)
+        if references and "[" in text:
+            # reference definitions render as nothing, but links need them, only the ones this block uses
+            used = dict.fromkeys(
+                references[label]
+                for label in map(reference_label, BRACKETED.findall(text))
+                if label in references
+            )
+            if used:
+                text += preferred_line_break * 2 + preferred_line_break.join(used)
+        yield text
+
+
+def stream_markdown(lines: list[str], preferred_line_break: str) -> Generator[str, None, None]:
+    """Render markdown to html a block at a time.
+
+    Args:
+        lines (list[str]): The lines
+        preferred_line_break (str): The preferred line break
+
+    Returns:
+        Generator[str, None, None]: Html for each block
+    """
+    markdown = get_markdown()
+    for text in markdown_block_texts(lines, preferred_line_break):
+        yield markdown(text)
+
 
 def export_markdown(lines: list[str], preferred_line_break: str) -> str:
     """Write to file.
@@ -16,5 +141,4 @@ def export_markdown(lines: list[str], preferred_line_break: str) -> str:
     Returns:
         str: The markdown
     """
-    markdown = mistune.create_markdown()
-    return cast(str, markdown(preferred_line_break.join(lines)))
+    return "".join(stream_markdown(lines, preferred_line_break))
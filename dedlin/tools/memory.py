@@ -0,0 +1,225 @@
+"""
+Where memory goes: the document, the copy kept for UNDO, library caches, and the process as a whole.
+
+A memory ceiling refuses commands that allocate lines once the process is near it, so a big file
+gets an error message instead of the process being killed. The process size comes from tracemalloc
+when it is tracing, else from /proc on Linux. Elsewhere tracemalloc has to be started to get a size.
+"""
+
+import functools
+import gc
+import struct
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Generator, Optional
+
+from dedlin.document import Document
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # windows
+    resource = None  # type: ignore[assignment]
+
+POINTER_BYTES = struct.calcsize("P")
+"""Bytes per line a list of lines costs, on top of the lines themselves."""
+
+MEGABYTE = 1024 * 1024
+
+STATM = Path("/proc/self/statm")
+"""Linux, size of the process in pages."""
+
+CACHED_MODULES = ("textstat",)
+"""Libraries whose lru_caches keep whole documents alive, textstat caches every text INFO looked at."""
+
+LRU_CACHE_WRAPPER = type(functools.lru_cache(maxsize=1)(len))
+"""What functools.lru_cache returns."""
+
+TOP_ALLOCATIONS = 3
+"""Source files listed by INFO when tracemalloc is tracing."""
+
+
+def human(size: int) -> str:
+    """Bytes in a readable unit.
+
+    Args:
+        size (int): Bytes
+
+    Returns:
+        str: e.g. 12.3 MB
+    """
+    amount = float(size)
+    for unit in ("bytes", "KB", "MB"):
+        if amount < 1024:
+            return f"{amount:.0f} {unit}" if unit == "bytes" else f"{amount:.1f} {unit}"
+        amount /= 1024
+    return f"{amount:.1f} GB"
+
+
+def start_tracing() -> None:
+    """Start tracemalloc, if it isn't already. Allocations are slower while tracing."""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def lines_bytes(lines: list[str]) -> int:
+    """Size of a list of lines, a line that appears more than once as the same object counts once.
+
+    Args:
+        lines (list[str]): The lines
+
+    Returns:
+        int: Bytes
+    """
+    unique = {id(line): line for line in lines}
+    return sys.getsizeof(lines) + sum(map(sys.getsizeof, unique.values()))
+
+
+def undo_bytes(document: Document) -> int:
+    """What the copy kept for UNDO costs on top of the document.
+
+    The copy is shallow, so lines that didn't change since are shared and cost only a pointer.
+
+    Args:
+        document (Document): The document
+
+    Returns:
+        int: Bytes
+    """
+    previous = document.previous_lines
+    if previous is document.lines:
+        return 0
+    current = set(map(id, document.lines))
+    only_previous = {id(line): line for line in previous if id(line) not in current}
+    return sys.getsizeof(previous) + sum(map(sys.getsizeof, only_previous.values()))
+
+
+def cached_functions(prefixes: tuple[str, ...] = CACHED_MODULES) -> list[Any]:
+    """lru_cache wrapped functions in the loaded modules of some libraries.
+
+    Args:
+        prefixes (tuple[str, ...]): Module names. Defaults to CACHED_MODULES.
+
+    Returns:
+        list[Any]: The functions, each once
+    """
+    found: dict[int, Any] = {}
+    for name, module in list(sys.modules.items()):
+        if module is None or not name.startswith(prefixes):
+            continue
+        for value in list(vars(module).values()):
+            if isinstance(value, LRU_CACHE_WRAPPER):
+                found[id(value)] = value
+    return list(found.values())
+
+
+def cache_entries() -> int:
+    """Results held by library caches.
+
+    Returns:
+        int: Entries
+    """
+    return sum(function.cache_info().currsize for function in cached_functions())
+
+
+def clear_caches() -> int:
+    """Empty library caches and collect garbage.
+
+    Returns:
+        int: Entries dropped
+    """
+    dropped = 0
+    for function in cached_functions():
+        dropped += function.cache_info().currsize
+        function.cache_clear()
+    gc.collect()
+    return dropped
+
+
+def process_bytes() -> Optional[int]:
+    """Memory the process uses now.
+
+    Returns:
+        Optional[int]: Bytes traced by tracemalloc if tracing, else resident size on Linux, else None
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        resident_pages = int(STATM.read_text(encoding="ascii").split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * (resource.getpagesize() if resource else 4096)
+
+
+def peak_bytes() -> Optional[int]:
+    """Most memory the process has used.
+
+    Returns:
+        Optional[int]: Peak traced by tracemalloc if tracing, else peak resident size, None on Windows
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[1]
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def memory_report(document: Document) -> Generator[tuple[str, str], None, None]:
+    """Where memory goes, for INFO.
+
+    Args:
+        document (Document): The document
+
+    Yields:
+        tuple[str, str]: The statistic and a newline
+    """
+    # before this function's own allocations
+    snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+    yield f"{human(lines_bytes(document.lines))} document", "\n"
+    yield f"{human(undo_bytes(document))} kept for undo", "\n"
+    yield f"{cache_entries()} cached text statistics", "\n"
+    used, peak = process_bytes(), peak_bytes()
+    source = "traced" if tracemalloc.is_tracing() else "resident"
+    if used is not None:
+        yield f"{human(used)} {source} memory", "\n"
+    if peak is not None:
+        yield f"{human(peak)} peak {source} memory", "\n"
+    if snapshot is not None:
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        for statistic in snapshot.statistics("filename")[:TOP_ALLOCATIONS]:
+            yield f"{human(statistic.size)} allocated in {statistic.traceback[0].filename}", "\n"
+
+
+class MemoryCeiling:
+    """Refuses to let commands allocate once the process is near a limit"""
+
+    def __init__(self, limit: int, usage: Callable[[], Optional[int]] = process_bytes) -> None:
+        """Set up initial state.
+
+        Args:
+            limit (int): Bytes
+            usage (Callable[[], Optional[int]]): Bytes in use now. Defaults to process_bytes.
+        """
+        self.limit = limit
+        self.usage = usage
+        self.used: Optional[int] = None
+        """Bytes in use at the last check"""
+
+    def allows(self, needed: int) -> bool:
+        """Whether there is room for an allocation, emptying library caches first if there isn't.
+
+        Args:
+            needed (int): Bytes the command is expected to allocate
+
+        Returns:
+            bool: True if the allocation fits, or the process size can't be measured
+        """
+        self.used = self.usage()
+        if self.used is None or self.used + needed <= self.limit:
+            return True
+        if clear_caches():
+            self.used = self.usage()
+        return self.used is None or self.used + needed <= self.limit
@@ -0,0 +1,381 @@
+"""
+Counters and histograms for long running or batch sessions, in the Prometheus text format.
+
+The file is rewritten every so often, atomically, so node_exporter's textfile collector can pick
+it up and operators can graph throughput without dedlin serving anything. When metrics are off,
+each hook costs a check of a module global.
+"""
+
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Optional
+
+from dedlin.tools.memory import cached_functions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 15.0
+"""Seconds between rewrites of the metrics file, the default node_exporter scrape interval."""
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+"""Upper bounds in seconds, parsing takes microseconds and saving a big file seconds."""
+
+CACHED_MODULES = ("dedlin", "textstat")
+"""Modules whose lru_caches get hit and miss counts."""
+
+STOP_TIMEOUT = 5.0
+"""Seconds to wait at exit for a write in progress."""
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    """Label set in the text format.
+
+    Args:
+        names (tuple[str, ...]): Label names
+        values (tuple[str, ...]): Label values
+        extra (str): Another label, already formatted. Defaults to "".
+
+    Returns:
+        str: e.g. {command="SORT"}, empty if there are no labels
+    """
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    """A sample value in the text format, exact however big it gets.
+
+    Args:
+        value (float): The value
+
+    Returns:
+        str: Whole numbers as integers, e.g. 12345678, others with every digit repr keeps
+    """
+    if isinstance(value, int):
+        return str(value)
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value.
+
+    Args:
+        value (str): The value
+
+    Returns:
+        str: The value with backslashes, quotes and line breaks escaped
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    """A count that only goes up, one per set of label values"""
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...] = ()) -> None:
+        """Set up initial state.
+
+        Args:
+            name (str): Metric name
+            description (str): HELP text
+            label_names (tuple[str, ...]): Label names. Defaults to none.
+        """
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.values: dict[tuple[str, ...], float] = {} if label_names else {(): 0}
+
+    def inc(self, amount: float = 1, labels: tuple[str, ...] = ()) -> None:
+        """Count up.
+
+        Args:
+            amount (float): How much. Defaults to 1.
+            labels (tuple[str, ...]): Label values. Defaults to none.
+        """
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        """Lines in the text format.
+
+        Returns:
+            Iterable[str]: The lines
+        """
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    """Counts of observations by bucket, with their sum, one per set of label values"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        """Set up initial state.
+
+        Args:
+            name (str): Metric name
+            description (str): HELP text
+            label_names (tuple[str, ...]): Label names. Defaults to none.
+            buckets (tuple[float, ...]): Upper bounds, ascending. Defaults to LATENCY_BUCKETS.
+        """
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self.counts: dict[tuple[str, ...], list[int]] = {}
+        """Per bucket, not cumulative, the last one is +Inf"""
+        self.sums: dict[tuple[str, ...], float] = {}
+        if not label_names:
+            self.counts[()] = [0] * (len(buckets) + 1)
+            self.sums[()] = 0.0
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()) -> None:
+        """Count an observation.
+
+        Args:
+            value (float): e.g. seconds
+            labels (tuple[str, ...]): Label values. Defaults to none.
+        """
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] = self.sums.get(labels, 0.0) + value
+
+    def render(self) -> Iterable[str]:
+        """Lines in the text format, buckets are cumulative there.
+
+        Returns:
+            Iterable[str]: The lines
+        """
+        yield f"# HELP {self.name} {self.description}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, counts in sorted(self.counts.items()):
+            total = 0
+            for bound, count in zip((*(f"{bucket:g}" for bucket in self.buckets), "+Inf"), counts):
+                total += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {total}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(self.sums[labels])}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {total}"
+
+
+class Metrics:
+    """Everything dedlin counts, updated from the hooks and written out as one file"""
+
+    def __init__(self) -> None:
+        """Set up initial state."""
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.commands = Counter("dedlin_commands_total", "Commands executed.", ("command",))
+        self.command_seconds = Histogram("dedlin_command_seconds", "Time to execute a command.", ("command",))
+        self.parse_seconds = Histogram("dedlin_parse_seconds", "Time to parse a command.")
+        self.lines_read = Counter("dedlin_lines_read_total", "Lines read from files.")
+        self.lines_written = Counter("dedlin_lines_written_total", "Lines written to files, recovery files included.")
+        self.save_seconds = Histogram("dedlin_save_seconds", "Time to save the document.")
+        self.history_commands = Counter("dedlin_history_commands_total", "Commands written to the history file.")
+
+    def command(self, name: str, seconds: float) -> None:
+        """Count an executed command.
+
+        Args:
+            name (str): Kind of command
+            seconds (float): How long it took
+        """
+        with self.lock:
+            self.commands.inc(1, (name,))
+            self.command_seconds.observe(seconds, (name,))
+
+    def parsed(self, seconds: float) -> None:
+        """Count a parsed command.
+
+        Args:
+            seconds (float): How long parsing took
+        """
+        with self.lock:
+            self.parse_seconds.observe(seconds)
+
+    def read(self, lines: int) -> None:
+        """Count lines read.
+
+        Args:
+            lines (int): How many
+        """
+        with self.lock:
+            self.lines_read.inc(lines)
+
+    def written(self, lines: int) -> None:
+        """Count lines written.
+
+        Args:
+            lines (int): How many
+        """
+        with self.lock:
+            self.lines_written.inc(lines)
+
+    def saved(self, seconds: float) -> None:
+        """Count a save of the document.
+
+        Args:
+            seconds (float): How long it took
+        """
+        with self.lock:
+            self.save_seconds.observe(seconds)
+
+    def history_written(self) -> None:
+        """Count a command written to the history file."""
+        with self.lock:
+            self.history_commands.inc()
+
+    def cache_lines(self) -> Iterable[str]:
+        """Hits and misses of the lru_caches of dedlin and its libraries.
+
+        Returns:
+            Iterable[str]: The lines
+        """
+        functions = sorted(
+            (f"{function.__module__}.{function.__qualname__}", function.cache_info())
+            for function in cached_functions(CACHED_MODULES)
+        )
+        for kind, index in (("hits", 0), ("misses", 1)):
+            yield f"# HELP dedlin_cache_{kind}_total Cache {kind} by cached function."
+            yield f"# TYPE dedlin_cache_{kind}_total counter"
+            for name, info in functions:
+                yield f'dedlin_cache_{kind}_total{{function="{_escape(name)}"}} {info[index]}'
+
+    def render(self) -> str:
+        """All metrics in the text format.
+
+        Returns:
+            str: The text
+        """
+        lines = [
+            "# HELP dedlin_start_time_seconds When this dedlin process started.",
+            "# TYPE dedlin_start_time_seconds gauge",
+            f"dedlin_start_time_seconds {self.started:.3f}",
+        ]
+        with self.lock:
+            for metric in (
+                self.commands,
+                self.command_seconds,
+                self.parse_seconds,
+                self.lines_read,
+                self.lines_written,
+                self.save_seconds,
+                self.history_commands,
+            ):
+                lines.extend(metric.render())
+        lines.extend(self.cache_lines())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Replace the metrics file, the collector never sees half a file.
+
+        Args:
+            path (Path): The file, should end in .prom for the textfile collector
+        """
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temp_path.write_text(self.render(), encoding="utf-8")
+        os.replace(temp_path, path)
+
+
+class MetricsWriter:
+    """Rewrite the metrics file on an interval, and once more when stopped"""
+
+    def __init__(self, metrics: Metrics, path: Path, interval: float = DEFAULT_INTERVAL) -> None:
+        """Set up initial state.
+
+        Args:
+            metrics (Metrics): What to write
+            path (Path): The file
+            interval (float): Seconds between writes. Defaults to DEFAULT_INTERVAL.
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def write(self) -> bool:
+        """Write the file now.
+
+        Returns:
+            bool: False if it couldn't be written
+        """
+        try:
+            self.metrics.write(self.path)
+        except OSError as exception:
+            # try again next time, don't take the session down over metrics
+            logger.warning(f"Writing metrics failed: {exception}")
+            return False
+        return True
+
+    def start(self) -> None:
+        """Write on a daemon thread until stopped."""
+        if self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._run, name="dedlin-metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop writing on the interval and write the final numbers.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a write in progress at most. Defaults to forever.
+        """
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.write()
+
+    def _run(self) -> None:
+        """Worker loop."""
+        while not self.stopping.wait(self.interval):
+            self.write()
+
+
+METRICS: Optional[Metrics] = None
+"""The metrics while they are on."""
+
+WRITER: Optional[MetricsWriter] = None
+
+
+def start(path: Path, interval: float = DEFAULT_INTERVAL) -> Metrics:
+    """Turn metrics on for the whole process, written to a file every interval.
+
+    Args:
+        path (Path): The file
+        interval (float): Seconds between writes. Defaults to DEFAULT_INTERVAL.
+
+    Returns:
+        Metrics: The metrics
+    """
+    global METRICS, WRITER  # pylint: disable=global-statement
+    stop()
+    METRICS = Metrics()
+    WRITER = MetricsWriter(METRICS, path, interval)
+    WRITER.start()
+    return METRICS
+
+
+def stop() -> None:
+    """Write the final numbers and turn metrics off."""
+    global METRICS, WRITER  # pylint: disable=global-statement
+    if WRITER is not None:
+        WRITER.stop(timeout=STOP_TIMEOUT)
+    METRICS = None
+    WRITER = None
@@ -0,0 +1,142 @@
+"""
+cProfile for a whole session or a window of one, written as pstats files for bug reports.
+
+Read the files with `python -m pstats <file>` or a viewer such as snakeviz.
+
+Before python 3.12 cProfile only sees the thread that started it, commands running on worker
+threads, as in the async command loop, are profiled with a profile of their own through worker()
+and added in when profiling stops.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+DEFAULT_PROFILE = "dedlin.pstats"
+"""Where PROFILE STOP writes when not given a file."""
+
+TOP_FUNCTIONS = 15
+"""Rows in the summary shown by PROFILE STOP."""
+
+
+class Profiler:
+    """One cProfile at a time, python can't run two"""
+
+    def __init__(self) -> None:
+        """Set up initial state."""
+        self.profile: Optional[cProfile.Profile] = None
+        self.owner: Optional[int] = None
+        """Thread that started profiling"""
+        self.workers: list[cProfile.Profile] = []
+        """Profiles of blocks that ran on other threads"""
+        self.lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether profiling is on.
+
+        Returns:
+            bool: True if started and not stopped
+        """
+        return self.profile is not None
+
+    def start(self) -> bool:
+        """Start profiling.
+
+        Returns:
+            bool: False if already running, or another profiler such as a debugger holds the hook
+        """
+        if self.profile is not None:
+            return False
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # python 3.12+ allows one profiler at a time
+            return False
+        self.profile = profile
+        self.owner = threading.get_ident()
+        return True
+
+    @contextmanager
+    def worker(self) -> Iterator[None]:
+        """Profile a block running on another thread than the one that started profiling.
+
+        Yields:
+            None: Nothing
+        """
+        if self.profile is None or threading.get_ident() == self.owner:
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # python 3.12+ profiles with sys.monitoring, which already sees every thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.workers.append(profile)
+
+    def stop(self, path: Path) -> Optional[pstats.Stats]:
+        """Stop profiling and write the pstats file.
+
+        Args:
+            path (Path): The file
+
+        Returns:
+            Optional[pstats.Stats]: What was recorded, None if not running
+        """
+        if self.profile is None:
+            return None
+        profile, self.profile = self.profile, None
+        profile.disable()
+        with self.lock:
+            workers, self.workers = self.workers, []
+        stats = pstats.Stats(profile)
+        for worker in workers:
+            stats.add(worker)
+        stats.dump_stats(str(path))
+        return stats
+
+
+def top_functions(stats: pstats.Stats, limit: int = TOP_FUNCTIONS) -> list[str]:
+    """The functions with the most cumulative time, as pstats prints them.
+
+    Args:
+        stats (pstats.Stats): What was recorded
+        limit (int): Rows. Defaults to TOP_FUNCTIONS.
+
+    Returns:
+        list[str]: The report lines
+    """
+    stream = io.StringIO()
+    stats.stream = stream  # type: ignore[attr-defined]
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return [line for line in stream.getvalue().splitlines() if line.strip()]
+
+
+@contextmanager
+def profiled(profiler: Profiler, path: Path) -> Iterator[None]:
+    """Profile a block, writing the file even if the block raises or exits.
+
+    Args:
+        profiler (Profiler): The profiler
+        path (Path): The pstats file
+
+    Yields:
+        None: Nothing
+    """
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop(path)
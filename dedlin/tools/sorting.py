@@ -0,0 +1,206 @@
+"""
+Sorting with options, and an external merge sort for big ranges.
+
+Above EXTERNAL_SORT_LINES, lines are sorted in runs. Each run's sorted order is written to a
+temporary file as line numbers and the runs are merged with heapq.merge. Keys only exist for
+one run at a time and the result holds the same string objects as the document, so memory stays
+bounded no matter how expensive the keys are.
+"""
+
+import array
+import heapq
+import re
+import tempfile
+from typing import IO, Any, Callable, Generator, Iterable, Optional
+
+from pydantic.dataclasses import dataclass
+
+from dedlin.basic_types import Phrases
+
+EXTERNAL_SORT_LINES = 1_000_000
+"""Ranges longer than this are sorted in runs of this many lines."""
+
+NUMBER = re.compile(r"\s*([-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?)")
+"""Leading number for numeric sorting."""
+
+SortKey = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class SortOptions:
+    """How to sort"""
+
+    numeric: bool = False
+    ignore_case: bool = False
+    reverse: bool = False
+    unique: bool = False
+    field: Optional[int] = None
+    column: Optional[int] = None
+
+
+def parse_sort_options(phrases: Optional[Phrases]) -> Optional[SortOptions]:
+    """Parse the words after SORT, e.g. `SORT NUMERIC REVERSE FIELD 2`.
+
+    Args:
+        phrases (Optional[Phrases]): The words
+
+    Returns:
+        Optional[SortOptions]: The options, None if they don't make sense
+    """
+    words = [part.upper() for part in phrases.parts] if phrases else []
+    flags: dict[str, bool] = {}
+    positions: dict[str, int] = {}
+    names = {"NUMERIC": "numeric", "NOCASE": "ignore_case", "REVERSE": "reverse", "UNIQUE": "unique"}
+    index = 0
+    while index < len(words):
+        word = words[index]
+        if word in names:
+            flags[names[word]] = True
+        elif word in ("FIELD", "COLUMN") and index + 1 < len(words) and words[index + 1].isdigit():
+            index += 1
+            position = int(words[index])
+            if position < 1:
+                return None
+            positions[word.lower()] = position
+        else:
+            return None
+        index += 1
+    if len(positions) > 1:
+        return None
+    return SortOptions(**flags, **positions)
+
+
+def _number(text: str) -> float:
+    """Leading number, like `sort -n` lines without one count as zero.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        float: The number
+    """
+    match = NUMBER.match(text)
+    return float(match.group(1)) if match else 0.0
+
+
+def sort_key(options: SortOptions) -> Optional[SortKey]:
+    """Key function for the options.
+
+    Args:
+        options (SortOptions): The options
+
+    Returns:
+        Optional[SortKey]: The key, None to compare lines as they are
+    """
+    steps: list[SortKey] = []
+    if options.field is not None:
+        field_index = options.field - 1
+
+        def field(text: str) -> str:
+            fields = text.split()
+            return fields[field_index] if field_index < len(fields) else ""
+
+        steps.append(field)
+    elif options.column is not None:
+        column_index = options.column - 1
+        steps.append(lambda text: text[column_index:])
+    if options.numeric:
+        steps.append(_number)
+    elif options.ignore_case:
+        steps.append(str.casefold)
+
+    if not steps:
+        return None
+    if len(steps) == 1:
+        return steps[0]
+    first, second = steps
+    return lambda text: second(first(text))
+
+
+def _write_run(indices: list[int]) -> IO[bytes]:
+    """Save a run's sorted order to a temporary file.
+
+    Args:
+        indices (list[int]): Line numbers in sorted order
+
+    Returns:
+        IO[bytes]: The file, rewound
+    """
+    file = tempfile.TemporaryFile()  # pylint: disable=consider-using-with
+    array.array("q", indices).tofile(file)
+    file.seek(0)
+    return file
+
+
+def _read_run(file: IO[bytes], chunk: int = 65_536) -> Generator[int, None, None]:
+    """Read a run back a chunk at a time.
+
+    Args:
+        file (IO[bytes]): The run
+        chunk (int): Line numbers per read
+
+    Returns:
+        Generator[int, None, None]: Line numbers in sorted order
+    """
+    item_size = array.array("q").itemsize
+    while data := file.read(chunk * item_size):
+        yield from array.array("q", data)
+
+
+def _unique(lines: Iterable[str], key: Optional[SortKey]) -> Generator[str, None, None]:
+    """Drop lines that have the same key as the one before, first one wins.
+
+    Args:
+        lines (Iterable[str]): Sorted lines
+        key (Optional[SortKey]): The key
+
+    Returns:
+        Generator[str, None, None]: The lines
+    """
+    previous: Any = None
+    first = True
+    for line in lines:
+        current = key(line) if key else line
+        if first or current != previous:
+            yield line
+        previous = current
+        first = False
+
+
+def sorted_lines(lines: list[str], options: SortOptions, run_size: int = EXTERNAL_SORT_LINES) -> list[str]:
+    """Sort lines, in runs merged from temporary files if there are more than run_size.
+
+    Stable either way, lines with equal keys keep their order.
+
+    Args:
+        lines (list[str]): The lines, not changed
+        options (SortOptions): How to sort
+        run_size (int): Lines per run. Defaults to EXTERNAL_SORT_LINES.
+
+    Returns:
+        list[str]: The sorted lines
+    """
+    key = sort_key(options)
+    if len(lines) <= run_size:
+        result = sorted(lines, key=key, reverse=options.reverse)
+        return list(_unique(result, key)) if options.unique else result
+
+    runs: list[IO[bytes]] = []
+    try:
+        for start in range(0, len(lines), run_size):
+            run = lines[start : start + run_size]
+            keys = run if key is None else [key(line) for line in run]
+            order = sorted(range(len(run)), key=keys.__getitem__, reverse=options.reverse)
+            del keys, run
+            runs.append(_write_run([start + offset for offset in order]))
+            del order
+
+        def line_key(index: int) -> Any:
+            line = lines[index]
+            return key(line) if key else line
+
+        merged = (lines[index] for index in heapq.merge(*map(_read_run, runs), key=line_key, reverse=options.reverse))
+        return list(_unique(merged, key) if options.unique else merged)
+    finally:
+        for run in runs:
+            run.close()
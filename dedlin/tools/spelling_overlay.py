@@ -2,10 +2,30 @@
 Create overlay of spelling markers
 """
 
+from functools import lru_cache
+from typing import Optional
+
 from spellchecker import SpellChecker
 
 spell = SpellChecker()
 
+CORRECTIONS_CACHE_SIZE = 4096
+"""Misspelled words remembered, shared by every buffer."""
+
+
+@lru_cache(maxsize=CORRECTIONS_CACHE_SIZE)
+def correction(word: str) -> Optional[str]:
+    """
+    Most likely correction of a word, edit distance search is slow so each word is looked up once.
+
+    Args:
+        word (str): The misspelled word
+
+    Returns:
+        Optional[str]: The correction, None if there is none
+    """
+    return spell.correction(word)  # type: ignore[no-any-return]
+
 
 def check(line: str) -> str:
     """
@@ -21,8 +41,8 @@ def check(line: str) -> str:
     misspelled = spell.unknown(spell.split_words(line))
     new_line = line
     for word in misspelled:
-        correction = spell.correction(word)
-        if correction != word and correction:
-            replacement = f"{word} (did you mean {correction}?)"
+        suggestion = correction(word)
+        if suggestion != word and suggestion:
+            replacement = f"{word} (did you mean {suggestion}?)"
             new_line = new_line.replace(word, replacement)
     return new_line
@@ -0,0 +1,142 @@
+"""
+Per command timing, to find out which command makes a macro slow.
+
+Off unless asked for. When on, each command costs two reads of each clock and a dict lookup.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+BUCKETS = (0.001, 0.01, 0.1, 1.0)
+"""Upper bounds, in seconds, of the wall time histogram. Slower commands go in a last bucket."""
+
+BUCKET_LABELS = ("<1ms", "<10ms", "<100ms", "<1s", ">=1s")
+
+
+class CommandStats:
+    """Running totals for one kind of command"""
+
+    __slots__ = ("count", "wall", "cpu", "lines", "slowest", "histogram")
+
+    def __init__(self) -> None:
+        """Set up initial state."""
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.lines = 0
+        self.slowest = 0.0
+        self.histogram = [0] * (len(BUCKETS) + 1)
+
+    def add(self, wall: float, cpu: float, lines: int) -> None:
+        """Count one run.
+
+        Args:
+            wall (float): Seconds of wall time
+            cpu (float): Seconds of CPU time
+            lines (int): Lines touched
+        """
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        self.lines += lines
+        self.slowest = max(self.slowest, wall)
+        bucket = 0
+        while bucket < len(BUCKETS) and wall >= BUCKETS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Totals for JSON.
+
+        Returns:
+            dict[str, Any]: The totals
+        """
+        return {
+            "count": self.count,
+            "wall_seconds": self.wall,
+            "cpu_seconds": self.cpu,
+            "lines": self.lines,
+            "slowest_seconds": self.slowest,
+            "histogram": dict(zip(BUCKET_LABELS, self.histogram)),
+        }
+
+
+class CommandTimings:
+    """Wall time, CPU time and lines touched, per kind of command"""
+
+    def __init__(
+        self, clock: Callable[[], float] = time.perf_counter, cpu_clock: Callable[[], float] = time.process_time
+    ) -> None:
+        """Set up initial state.
+
+        Args:
+            clock (Callable[[], float]): Wall time in seconds. Defaults to time.perf_counter.
+            cpu_clock (Callable[[], float]): CPU time in seconds. Defaults to time.process_time.
+        """
+        self.clock = clock
+        self.cpu_clock = cpu_clock
+        self.stats: dict[str, CommandStats] = {}
+
+    def start(self) -> tuple[float, float]:
+        """Read the clocks before a command.
+
+        Returns:
+            tuple[float, float]: Wall and CPU time
+        """
+        return self.clock(), self.cpu_clock()
+
+    def stop(self, name: str, started: tuple[float, float], lines: int) -> None:
+        """Read the clocks after a command and count it.
+
+        Args:
+            name (str): Kind of command
+            started (tuple[float, float]): What start() returned
+            lines (int): Lines the command touched
+        """
+        wall, cpu = self.clock() - started[0], self.cpu_clock() - started[1]
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CommandStats()
+        stats.add(wall, cpu, lines)
+
+    def reset(self) -> None:
+        """Forget everything recorded."""
+        self.stats.clear()
+
+    def summary(self) -> Generator[str, None, None]:
+        """Table of totals, slowest kind of command first.
+
+        Returns:
+            Generator[str, None, None]: The rows
+        """
+        if not self.stats:
+            yield "No commands timed yet"
+            return
+        yield (
+            f"{'Command':<12} {'Count':>6} {'Total s':>9} {'Mean ms':>9} {'Max ms':>9} {'CPU s':>9} {'Lines':>10}  "
+            + " ".join(f"{label:>6}" for label in BUCKET_LABELS)
+        )
+        for name, stats in sorted(self.stats.items(), key=lambda item: item[1].wall, reverse=True):
+            mean = stats.wall / stats.count * 1000
+            yield (
+                f"{name:<12} {stats.count:>6} {stats.wall:>9.3f} {mean:>9.2f} {stats.slowest * 1000:>9.2f} "
+                f"{stats.cpu:>9.3f} {stats.lines:>10}  " + " ".join(f"{count:>6}" for count in stats.histogram)
+            )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Everything recorded, for JSON.
+
+        Returns:
+            dict[str, Any]: Totals by kind of command
+        """
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    def write_json(self, path: Path) -> None:
+        """Dump everything recorded to a file.
+
+        Args:
+            path (Path): The file
+        """
+        path.write_text(json.dumps(self.as_dict(), indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,237 @@
+"""
+Trace spans for macros, commands and file operations, written as OpenTelemetry JSON lines to a local file.
+
+Each line is an OTLP/JSON export request holding one finished span, the format the OpenTelemetry
+Collector's otlpjsonfile receiver reads, so no collector or SDK is needed while editing.
+When tracing is off, span() hands back one shared span that does nothing.
+"""
+
+import contextvars
+import json
+import secrets
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable, Optional
+
+from dedlin.__about__ import __version__
+
+SERVICE_NAME = "dedlin"
+
+SPAN_KIND_INTERNAL = 1
+STATUS_CODE_ERROR = 2
+
+Attributes = dict[str, Any]
+
+
+def _attribute_value(value: Any) -> dict[str, Any]:
+    """An attribute value in OTLP/JSON form.
+
+    Args:
+        value (Any): The value
+
+    Returns:
+        dict[str, Any]: e.g. {"intValue": "3"}
+    """
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # 64 bit integers are strings in OTLP/JSON
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_attributes(attributes: Attributes) -> list[dict[str, Any]]:
+    """Attributes in OTLP/JSON form.
+
+    Args:
+        attributes (Attributes): Names and values
+
+    Returns:
+        list[dict[str, Any]]: Key and value pairs
+    """
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items()]
+
+
+class NullSpan:
+    """Span used when tracing is off, records nothing"""
+
+    def set(self, key: str, value: Any) -> None:
+        """Ignore an attribute.
+
+        Args:
+            key (str): Name
+            value (Any): Value
+        """
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        return None
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """One timed operation, written to the trace file when it ends"""
+
+    __slots__ = ("tracer", "name", "attributes", "span_id", "parent_id", "start_ns", "token")
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Attributes) -> None:
+        """Set up initial state.
+
+        Args:
+            tracer (Tracer): Where the span is written
+            name (str): What the span is
+            attributes (Attributes): Details, more can be set while the span is open
+        """
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = ""
+        self.start_ns = 0
+        self.token: Optional[contextvars.Token[Optional[Span]]] = None
+
+    def set(self, key: str, value: Any) -> None:
+        """Add or change an attribute.
+
+        Args:
+            key (str): Name
+            value (Any): Value
+        """
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        parent = self.tracer.current.get()
+        self.parent_id = parent.span_id if parent else ""
+        self.token = self.tracer.current.set(self)
+        self.start_ns = self.tracer.clock()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        exc_traceback: Optional[TracebackType],
+    ) -> None:
+        end_ns = self.tracer.clock()
+        if self.token is not None:
+            self.tracer.current.reset(self.token)
+        self.tracer.write(self, end_ns, exc_value)
+
+
+class Tracer:
+    """Writes finished spans to a JSON lines file, one trace per session"""
+
+    def __init__(self, path: Path, clock: Callable[[], int] = time.time_ns) -> None:
+        """Set up initial state.
+
+        Args:
+            path (Path): The trace file, appended to
+            clock (Callable[[], int]): Nanoseconds since the epoch. Defaults to time.time_ns.
+        """
+        self.path = path
+        self.clock = clock
+        self.trace_id = secrets.token_hex(16)
+        # line buffered, a crash loses no finished spans
+        self.file = open(path, "a", encoding="utf-8", buffering=1)  # pylint: disable=consider-using-with
+        self.lock = threading.Lock()
+        # a context variable, so commands run in worker threads by asyncio.to_thread keep their parent span
+        self.current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("dedlin_span", default=None)
+        self.resource = {"attributes": otlp_attributes({"service.name": SERVICE_NAME})}
+        self.scope = {"name": SERVICE_NAME, "version": __version__}
+
+    def span(self, name: str, attributes: Optional[Attributes] = None) -> Span:
+        """A span, timed from entering it as a context manager to leaving it.
+
+        Args:
+            name (str): What the span is
+            attributes (Optional[Attributes]): Details. Defaults to None.
+
+        Returns:
+            Span: The span
+        """
+        return Span(self, name, attributes or {})
+
+    def write(self, span: Span, end_ns: int, error: Optional[BaseException]) -> None:
+        """Write a finished span.
+
+        Args:
+            span (Span): The span
+            end_ns (int): When it ended
+            error (Optional[BaseException]): What it raised, if anything
+        """
+        record: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": span.span_id,
+            "parentSpanId": span.parent_id,
+            "name": span.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(end_ns),
+            "attributes": otlp_attributes(span.attributes),
+            "status": {"code": STATUS_CODE_ERROR, "message": repr(error)} if error is not None else {},
+        }
+        request = {"resourceSpans": [{"resource": self.resource, "scopeSpans": [{"scope": self.scope, "spans": [record]}]}]}
+        line = json.dumps(request, separators=(",", ":")) + "\n"
+        with self.lock:
+            if not self.file.closed:
+                self.file.write(line)
+
+    def close(self) -> None:
+        """Close the trace file, later spans are dropped."""
+        with self.lock:
+            self.file.close()
+
+
+TRACER: Optional[Tracer] = None
+"""The tracer while tracing is on."""
+
+
+def start(path: Path) -> Tracer:
+    """Turn tracing on for the whole process.
+
+    Args:
+        path (Path): The trace file, appended to
+
+    Returns:
+        Tracer: The tracer
+    """
+    global TRACER  # pylint: disable=global-statement
+    stop()
+    TRACER = Tracer(path)
+    return TRACER
+
+
+def stop() -> None:
+    """Turn tracing off and close the trace file."""
+    global TRACER  # pylint: disable=global-statement
+    if TRACER is not None:
+        TRACER.close()
+        TRACER = None
+
+
+def span(name: str, attributes: Optional[Attributes] = None) -> "Span | NullSpan":
+    """A span if tracing is on, else the shared span that does nothing.
+
+    Args:
+        name (str): What the span is
+        attributes (Optional[Attributes]): Details. Defaults to None.
+
+    Returns:
+        Span | NullSpan: Use as a context manager
+    """
+    if TRACER is None:
+        return NULL_SPAN
+    return TRACER.span(name, attributes)
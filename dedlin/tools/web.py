@@ -1,9 +1,173 @@
 """
 Fetch lines from web, assuming html, turn into text
+
+One pooled session keeps the connection to a site open from one BROWSE to the next. With a cache
+folder, pages are kept on disk with their ETag and Last-Modified and asked for again conditionally,
+an unchanged page costs neither a download nor a conversion.
 """
 
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
 import html2text
 import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 5
+"""Seconds to wait for a connection or an answer."""
+
+POOL_SIZE = 10
+"""Connections kept open per site."""
+
+CHUNK_SIZE = 64 * 1024
+"""Bytes read and converted at a time, the page is never held whole."""
+
+CACHE_FORMAT = 1
+"""Goes up when conversion changes, pages cached in an older format are fetched again."""
+
+BLANK_LINES = re.compile(r"\n{2,}")
+
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def session() -> requests.Session:
+    """The session all fetches share, made when first needed.
+
+    Returns:
+        requests.Session: The session
+    """
+    global _SESSION  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _SESSION.mount("http://", adapter)
+            _SESSION.mount("https://", adapter)
+        return _SESSION
+
+
+class PageCache:
+    """Rows of fetched pages and the validators to ask whether they changed, one file per url"""
+
+    def __init__(self, folder: Path) -> None:
+        """Set up initial state.
+
+        Args:
+            folder (Path): Where the files go, made when first needed
+        """
+        self.folder = folder
+
+    def path(self, url: str) -> Path:
+        """File for a url.
+
+        Args:
+            url (str): The url
+
+        Returns:
+            Path: The file, may not exist
+        """
+        return self.folder / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def get(self, url: str) -> Optional[dict[str, Any]]:
+        """What was cached for a url.
+
+        Args:
+            url (str): The url
+
+        Returns:
+            Optional[dict[str, Any]]: The entry, None if there is none or it can't be used
+        """
+        try:
+            with open(self.path(url), encoding="utf-8") as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exception:
+            logger.warning(f"Ignoring cached page for {url}: {exception}")
+            return None
+        if not isinstance(entry, dict) or entry.get("format") != CACHE_FORMAT or entry.get("url") != url:
+            return None
+        return entry
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], rows: list[str]) -> None:
+        """Cache the rows of a page, replacing the file atomically.
+
+        Args:
+            url (str): The url
+            etag (Optional[str]): The ETag header
+            last_modified (Optional[str]): The Last-Modified header
+            rows (list[str]): The page as rows
+        """
+        entry = {"format": CACHE_FORMAT, "url": url, "etag": etag, "last_modified": last_modified, "rows": rows}
+        path = self.path(url)
+        temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            temp_path.write_text(json.dumps(entry), encoding="utf-8")
+            os.replace(temp_path, path)
+        except OSError as exception:
+            # the page was fetched fine, only the next BROWSE will be slower
+            logger.warning(f"Couldn't cache page {url}: {exception}")
+            temp_path.unlink(missing_ok=True)
+
+
+CACHE: Optional[PageCache] = None
+"""The page cache while it is on."""
+
+
+def start_cache(folder: Path) -> PageCache:
+    """Turn the page cache on for the whole process.
+
+    Args:
+        folder (Path): Where cached pages go
+
+    Returns:
+        PageCache: The cache
+    """
+    global CACHE  # pylint: disable=global-statement
+    CACHE = PageCache(folder)
+    return CACHE
+
+
+def rows_from_text(text: str) -> list[str]:
+    """Split text into stripped rows, dropping blank lines in one pass.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        list[str]: The rows, without trailing blank ones
+    """
+    lines = [line.strip() for line in BLANK_LINES.sub("\n", text).split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def html_to_rows(chunks: Iterable[str]) -> list[str]:
+    """Convert html to rows of text as it arrives.
+
+    Args:
+        chunks (Iterable[str]): The html, in pieces
+
+    Returns:
+        list[str]: The rows
+    """
+    handler = html2text.HTML2Text()
+    handler.ignore_links = True
+    for chunk in chunks:
+        handler.feed(chunk)
+    handler.feed("")
+    return rows_from_text(handler.optwrap(handler.finish()))
 
 
 def fetch_page_as_rows(url: str) -> list[str]:
@@ -16,16 +180,27 @@ def fetch_page_as_rows(url: str) -> list[str]:
         list[str]: The rows
     """
     # TODO: handle popular line based formats, e.g. CVS
-    response = requests.get(url, timeout=5)
-    handler = html2text.HTML2Text()
-    handler.ignore_links = True
-    text = handler.handle(response.text)
-    while "\n\n" in text:
-        text = text.replace("\n\n", "\n")
-    lines = [_.strip() for _ in text.split("\n")]
-    while lines[-1].strip() == "":
-        lines.pop()
-    return lines
+    cache = CACHE
+    cached = cache.get(url) if cache else None
+    headers: dict[str, str] = {}
+    if cached is not None:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    with session().get(url, headers=headers, timeout=TIMEOUT, stream=True) as response:
+        if cached is not None and response.status_code == 304:
+            logger.debug(f"Page not modified, using cached rows for {url}")
+            return list(cached["rows"])
+        if response.encoding is None:
+            # not text by its content type, guessing would mean reading it whole first
+            response.encoding = "utf-8"
+        rows = html_to_rows(response.iter_content(CHUNK_SIZE, decode_unicode=True))
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if cache is not None and response.status_code == 200 and (etag or last_modified):
+            cache.put(url, etag, last_modified, rows)
+    return rows
 
 
 if __name__ == "__main__":
@@ -1,4 +1,12 @@
-from typing import Generator
+from pathlib import Path
+from typing import Any, AsyncIterator, Generator, Optional, Union
+
+from dedlin.basic_types import Command, CommandGeneratorProtocol, Printable
+from dedlin.command_sources import InMemoryCommandGenerator
+from dedlin.document import Document
+from dedlin.document_sources import InMemoryInputter
+from dedlin.main import Dedlin
+from dedlin.parsers import parse_command
 
 
 # pylint:disable=unused-argument
@@ -9,3 +17,55 @@ def fake_input(prompt: int) -> Generator[str, None, None]:
 
 def fake_edit(prompt: str, initial: str) -> str:
     return "rabbit"
+
+
+def make_document(lines: list[str]) -> Document:
+    """Document with lines and no inputters"""
+    return Document(InMemoryInputter([]), InMemoryInputter([]), lines)
+
+
+def make_app(
+    results: Optional[list[Optional[str]]] = None,
+    lines: Optional[list[str]] = None,
+    path: Optional[Union[Path, str]] = None,
+    inputter: Optional[CommandGeneratorProtocol] = None,
+    outputter: Optional[Printable] = None,
+    **attributes: Any,
+) -> Dedlin:
+    """Headless Dedlin without history, output collected in results.
+
+    Attributes such as quiet are set before path is opened, opening it runs the commands of inputter.
+    """
+    if outputter is None:
+        collected = results if results is not None else []
+        outputter = lambda text, end="\n": collected.append(text)  # noqa: E731
+    app = Dedlin(
+        inputter=inputter if inputter is not None else InMemoryCommandGenerator([]),
+        insert_document_inputter=InMemoryInputter([]),
+        edit_document_inputter=InMemoryInputter([]),
+        outputter=outputter,
+        headless=True,
+        history=False,
+    )
+    for name, value in attributes.items():
+        setattr(app, name, value)
+    if path is not None:
+        app.entry_point(str(path))
+    elif lines is not None:
+        app.doc = make_document(lines)
+    return app
+
+
+class AsyncTextCommands:
+    """Async command source of commands typed as text, parsed as they are pulled"""
+
+    def __init__(self, texts: list[str], headless: bool = True) -> None:
+        self.texts = texts
+        self.headless = headless
+        self.prompt = ""
+        self.current_line = 0
+        self.document_length = 0
+
+    async def generate(self) -> AsyncIterator[Command]:
+        for text in self.texts:
+            yield parse_command(text, self.current_line, self.document_length, headless=self.headless)
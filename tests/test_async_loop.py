@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import dedlin.main
+from dedlin.basic_types import Commands
+from dedlin.command_sources import AsyncCommandGenerator, InMemoryCommandGenerator
+from dedlin.document_sources import AsyncStringGenerator, BlockingStringGenerator, InMemoryInputter
+from dedlin.outputters.queued import QueuedPrinter
+from dedlin.parsers import parse_command
+from tests.fakes import AsyncTextCommands, make_app
+
+
+def test_commands_run_and_output_arrives_in_order():
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    outputter = app.document_outputter
+
+    exit_code = asyncio.run(app.run_command_source_async(AsyncTextCommands(["SORT", "LIST", "2 DELETE", "LIST"])))
+    assert exit_code is None
+    assert app.doc.lines == ["a", "c"]
+    listed = [text for text in results if " : " in text]
+    assert listed == ["   1 : a", "   2 : b", "   3 : c", "   1 : a", "   2 : c"]
+    assert results.index("Sorted") < results.index("   1 : a")
+    assert app.document_outputter is outputter
+
+
+def test_sync_sources_adapted():
+    results = []
+    app = make_app(results, ["one"])
+    commands = InMemoryCommandGenerator([parse_command("EXIT", 1, 1, headless=True)])
+
+    async def run():
+        source = AsyncCommandGenerator(commands)
+        source.current_line = 3
+        assert commands.current_line == 3
+        return await app.run_command_source_async(source)
+
+    app.file_path = None
+    app.headless = True
+    assert asyncio.run(run()) == 0
+
+
+def test_ctrl_c_cancels_a_slow_command(monkeypatch):
+    results = []
+    app = make_app(results, ["cat"])
+    fetching, release = threading.Event(), threading.Event()
+
+    def slow_fetch(url):
+        fetching.set()
+        release.wait(5)
+        return ["page"]
+
+    monkeypatch.setattr(dedlin.main, "fetch_page_as_rows", slow_fetch)
+
+    async def run():
+        task = asyncio.create_task(
+            app.run_command_source_async(AsyncTextCommands(["BROWSE https://example.com", "LIST"]))
+        )
+        await asyncio.to_thread(fetching.wait, 5)
+        assert app.cancel_command()
+        release.set()
+        return await task
+
+    assert asyncio.run(run()) is None
+    assert "Cancelled" in results
+    # the page came back after the cancel, it was dropped
+    assert app.doc.lines == ["cat"]
+    assert "   1 : cat" in results
+    assert not app.cancel_command()
+
+
+def test_async_string_source_for_insert():
+    class AsyncLines:
+        def __init__(self, lines):
+            self.lines = lines
+            self.prompt = ""
+            self.default = ""
+
+        async def generate(self):
+            for line in self.lines:
+                await asyncio.sleep(0)
+                yield line
+
+    results = []
+    app = make_app(results, ["cat"])
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        app.doc.insert_inputter = BlockingStringGenerator(AsyncLines(["dog", "walrus"]), loop)
+        await app.run_command_source_async(AsyncTextCommands(["2 INSERT"], headless=False))
+
+    asyncio.run(run())
+    assert app.doc.lines == ["cat", "dog", "walrus"]
+    inserts = [command for command in app.history if command.command == Commands.INSERT]
+    assert inserts[-1].phrases.parts == ("dog", "walrus")
+
+
+def test_sync_string_source_adapted():
+    async def run():
+        return [line async for line in AsyncStringGenerator(InMemoryInputter(["a", "b"])).generate()]
+
+    assert asyncio.run(run()) == ["a", "b"]
+
+
+def test_queued_printer_batches_a_burst():
+    printed = []
+
+    async def run():
+        printer = QueuedPrinter(lambda text, end="\n": printed.append(text), asyncio.get_running_loop())
+        drain = asyncio.create_task(printer.drain())
+
+        def burst():
+            for number in range(100):
+                printer(str(number))
+
+        await asyncio.to_thread(burst)
+        await printer.join()
+        drain.cancel()
+        return printer.queue.qsize()
+
+    assert asyncio.run(run()) == 0
+    assert printed == [str(number) for number in range(100)]
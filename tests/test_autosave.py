@@ -0,0 +1,111 @@
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.tools.autosave import AutosaveWorker, sidecar_path
+from tests.fakes import make_app
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDocument:
+    def __init__(self):
+        self.version = 0
+        self.dirty = False
+        self.lines = ["cat"]
+
+    def snapshot(self):
+        if not self.dirty:
+            return None
+        return self.version, list(self.lines)
+
+    def change(self, line):
+        self.lines.append(line)
+        self.version += 1
+        self.dirty = True
+
+
+def test_writes_only_when_due_and_changed():
+    clock = FakeClock()
+    document = FakeDocument()
+    written = []
+    worker = AutosaveWorker(document.snapshot, written.append, interval=30, clock=clock)
+
+    document.change("dog")
+    assert not worker.tick()
+    clock.now += 30
+    assert worker.tick()
+    assert written == [["cat", "dog"]]
+
+    # nothing new
+    clock.now += 30
+    assert not worker.tick()
+
+    # several changes in one interval become one write
+    document.change("bird")
+    document.change("walrus")
+    clock.now += 10
+    assert not worker.tick()
+    clock.now += 20
+    assert worker.tick()
+    assert written[-1] == ["cat", "dog", "bird", "walrus"]
+    assert len(written) == 2
+
+
+def test_clean_document_is_not_written():
+    clock = FakeClock()
+    written = []
+    worker = AutosaveWorker(FakeDocument().snapshot, written.append, interval=1, clock=clock)
+    clock.now += 1
+    assert not worker.tick()
+    assert not written
+
+
+def test_failed_write_is_retried():
+    clock = FakeClock()
+    document = FakeDocument()
+    attempts = []
+
+    def write(lines):
+        attempts.append(lines)
+        if len(attempts) == 1:
+            raise OSError("disk full")
+
+    worker = AutosaveWorker(document.snapshot, write, interval=5, clock=clock)
+    document.change("dog")
+    clock.now += 5
+    assert not worker.tick()
+    clock.now += 5
+    assert worker.tick()
+    assert len(attempts) == 2
+
+
+def test_thread_stops():
+    worker = AutosaveWorker(lambda: None, lambda lines: None, interval=0.01)
+    worker.start()
+    worker.stop(timeout=5)
+    assert worker.thread is None
+
+
+def test_recovery_file_round_trip(tmp_path):
+    document = tmp_path / "notes.txt"
+    document.write_text("cat\ndog\n", encoding="utf-8")
+    results = []
+    app = make_app(results, path=document, autosave_interval=60)
+    recovery = sidecar_path(document)
+
+    assert app.autosave_snapshot() is None
+    app.execute_command(Command(Commands.REPLACE, LineRange(1, 0), Phrases(("cat", "walrus"))))
+    version, lines = app.autosave_snapshot()
+    app.write_autosave(lines)
+    assert recovery.read_text(encoding="utf-8") == "walrus\ndog\n"
+    assert document.read_text(encoding="utf-8") == "cat\ndog\n"
+
+    make_app(results, path=document, autosave_interval=60)
+    assert any("may have changes" in str(text) for text in results)
+
+    app.execute_command(Command(Commands.SAVE))
+    assert not recovery.exists()
@@ -0,0 +1,79 @@
+import io
+
+from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.command_sources import InMemoryCommandGenerator
+from dedlin.document_sources import InMemoryInputter
+from dedlin.main import Dedlin
+from dedlin.outputters.buffered import BufferedPrinter, batched
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, s):
+        self.writes += 1
+        return super().write(s)
+
+
+def test_writes_through_outside_batch():
+    stream = io.StringIO()
+    printer = BufferedPrinter(stream=stream)
+    printer("cat")
+    printer("dog\n")
+    printer(None, end="")
+    assert stream.getvalue() == "cat\ndog"
+
+
+def test_batch_holds_output_until_exit():
+    stream = CountingStream()
+    printer = BufferedPrinter(stream=stream)
+    with printer.batch():
+        for number in range(100):
+            printer(str(number))
+        assert stream.getvalue() == ""
+    assert stream.getvalue() == "".join(f"{number}\n" for number in range(100))
+    assert stream.writes == 1
+
+
+def test_batch_flushes_at_threshold():
+    stream = CountingStream()
+    printer = BufferedPrinter(stream=stream, flush_threshold=10)
+    with printer.batch():
+        printer("12345")
+        assert stream.writes == 0
+        printer("67890")
+        assert stream.writes == 1
+    assert stream.getvalue() == "12345\n67890\n"
+
+
+def test_batched_passes_through_plain_callables():
+    results = []
+
+    def printer(text, end="\n"):
+        results.append(text)
+
+    with batched(printer) as output:
+        output("cat")
+    assert results == ["cat"]
+
+
+def test_list_uses_one_write():
+    stream = CountingStream()
+    printer = BufferedPrinter(stream=stream)
+    app = Dedlin(
+        inputter=InMemoryCommandGenerator([Command(Commands.LIST, LineRange(start=1, offset=99))]),
+        insert_document_inputter=InMemoryInputter([]),
+        edit_document_inputter=InMemoryInputter([]),
+        outputter=printer,
+        history=False,
+    )
+    app.quiet = True
+    app.entry_point()
+    assert stream.writes == 0
+
+    app.doc.lines = [str(number) for number in range(100)]
+    app.execute_command(Command(Commands.LIST, LineRange(start=1, offset=99)))
+    assert stream.writes == 1
+    assert "   100 : 99" in stream.getvalue()
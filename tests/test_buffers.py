@@ -0,0 +1,118 @@
+from dedlin.basic_types import Commands
+from dedlin.buffers import BufferManager
+from dedlin.parsers import parse_command
+from tests.fakes import make_app, make_document
+
+
+def _run(app, text):
+    command = parse_command(text, app.doc.current_line, len(app.doc.lines), headless=True)
+    return app.execute_command(command)
+
+
+def _files(tmp_path):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text("cat\ndog\n", encoding="utf-8")
+    second.write_text("one\ntwo\nthree\n", encoding="utf-8")
+    return first, second
+
+
+def test_open_switch_and_list(tmp_path):
+    first, second = _files(tmp_path)
+    results = []
+    app = make_app(results, path=first)
+    assert parse_command("BUFFER", 1, 2, headless=True).command == Commands.BUFFER
+
+    _run(app, f"BUFFER OPEN {second}")
+    assert app.doc.lines == ["one", "two", "three"]
+    assert app.file_path == second
+
+    _run(app, "BUFFER first.txt")
+    assert app.doc.lines == ["cat", "dog"]
+    assert app.file_path == first
+
+    results.clear()
+    _run(app, "BUFFER LIST")
+    assert "* first.txt: 2 lines" in results[0]
+    assert "  second.txt: 3 lines" in results[1]
+
+
+def test_copy_to_another_buffer_and_exit_saves_both(tmp_path):
+    first, second = _files(tmp_path)
+    app = make_app(path=first)
+    _run(app, f"BUFFER OPEN {second}")
+    _run(app, "BUFFER SWITCH first.txt")
+
+    _run(app, "1,2 COPY 2 second.txt")
+    assert app.doc.lines == ["cat", "dog"]
+    assert app.buffers.buffers["second.txt"].doc.lines == ["one", "cat", "dog", "two", "three"]
+
+    _run(app, "2 DELETE")
+    _run(app, "EXIT")
+    assert first.read_text(encoding="utf-8") == "cat\n"
+    assert second.read_text(encoding="utf-8") == "one\ncat\ndog\ntwo\nthree\n"
+    assert app.buffers.current.name == "first.txt"
+
+
+def test_close_refuses_unsaved_changes(tmp_path):
+    first, second = _files(tmp_path)
+    results = []
+    app = make_app(results, path=first)
+    _run(app, "BUFFER CLOSE")
+    assert any("only buffer" in text for text in results)
+
+    _run(app, f"BUFFER OPEN {second}")
+    _run(app, "1 DELETE")
+    _run(app, "BUFFER CLOSE")
+    assert any("unsaved changes" in text for text in results)
+
+    _run(app, "SAVE")
+    _run(app, "BUFFER CLOSE")
+    assert len(app.buffers) == 1
+    assert app.file_path == first
+
+
+def _buffer(manager, name, lines):
+    buffer = manager.add(name)
+    buffer.doc = make_document(lines)
+    buffer.measure()
+    return buffer
+
+
+def test_budget_evicts_least_recently_used():
+    manager = BufferManager()
+    manager.current.doc = make_document([])
+    old = _buffer(manager, "old", ["x" * 100] * 100)
+    recent = _buffer(manager, "recent", ["y" * 100] * 100)
+    manager.switch("old")
+    manager.switch("recent")
+    manager.switch("main")
+    try:
+        manager.budget = old.estimated_bytes() + 1
+        assert manager.enforce_budget() == ["old"]
+        assert old.evicted and not recent.evicted
+        assert old.line_count == 100
+        assert old.doc.lines == []
+
+        # changed lines were spilled, switching reads them back
+        assert old.spill_path.exists()
+        manager.switch("old")
+        assert old.doc.lines == ["x" * 100] * 100
+        assert old.spill_path is None
+        assert recent.evicted
+    finally:
+        manager.cleanup()
+
+
+def test_unchanged_file_is_read_again_instead_of_spilled(tmp_path):
+    first, second = _files(tmp_path)
+    app = make_app(path=first)
+    _run(app, f"BUFFER OPEN {second}")
+    buffer = app.buffers.buffers["first.txt"]
+    assert buffer.evict(app.buffers.folder())
+    assert buffer.spill_path is None
+
+    _run(app, "BUFFER first.txt")
+    assert app.doc.lines == ["cat", "dog"]
+    _run(app, "1 DELETE")
+    _run(app, "SAVE")
+    assert first.read_text(encoding="utf-8") == "dog\n"
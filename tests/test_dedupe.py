@@ -0,0 +1,53 @@
+from dedlin.basic_types import Commands, LineRange
+from dedlin.document import Document
+from dedlin.document_sources import InMemoryInputter
+from dedlin.parsers import parse_command
+from dedlin.tools.dedupe import dedupe_lines, with_counts
+
+
+def _document(lines):
+    return Document(InMemoryInputter([]), InMemoryInputter([]), lines)
+
+
+def test_keeps_first_occurrences_in_order():
+    kept, counts = dedupe_lines(["cat", "dog", "cat", "", "dog", "cat", ""])
+    assert kept == ["cat", "dog", ""]
+    assert counts == [3, 2, 2]
+    assert with_counts(kept, counts) == ["3 cat", "2 dog", "2 "]
+
+
+def test_long_lines_are_compared_by_digest():
+    long_line = "walrus " * 100_000
+    kept, counts = dedupe_lines([long_line, long_line + "!", long_line])
+    assert kept == [long_line, long_line + "!"]
+    assert counts == [2, 1]
+
+
+def test_parses_both_names():
+    for text in ("2,4 DEDUPE", "2,4UNIQ COUNT"):
+        command = parse_command(text, current_line=1, document_length=5, headless=True)
+        assert command.command == Commands.DEDUPE
+        assert command.line_range == LineRange(2, 2)
+
+
+def test_dedupe_range_and_undo():
+    document = _document(["a", "b", "b", "a", "b", "b"])
+    document.current_line = 6
+    assert document.dedupe(LineRange(2, 3)) == 2
+    assert document.lines == ["a", "b", "a", "b"]
+    assert document.current_line == 4
+    assert document.first_changed_line() == 1
+    document.undo()
+    assert document.lines == ["a", "b", "b", "a", "b", "b"]
+
+
+def test_nothing_to_drop_is_not_a_change():
+    document = _document(["a", "b"])
+    assert document.dedupe() == 0
+    assert not document.dirty
+
+
+def test_count():
+    document = _document(["a", "b", "a"])
+    assert document.dedupe(count=True) == 1
+    assert document.lines == ["2 a", "1 b"]
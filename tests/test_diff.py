@@ -0,0 +1,90 @@
+import difflib
+import random
+
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.parsers import parse_command
+from dedlin.tools.diff import opcodes, unified_diff
+from tests.fakes import make_app
+
+
+def _apply(old, new, codes):
+    result = []
+    for tag, old_low, old_high, new_low, new_high in codes:
+        if tag == "equal":
+            assert old[old_low:old_high] == new[new_low:new_high]
+            result.extend(old[old_low:old_high])
+        else:
+            result.extend(new[new_low:new_high])
+    return result
+
+
+def test_matches_difflib_for_simple_edits():
+    old = [f"line {number}" for number in range(100)]
+    new = list(old)
+    new[10] = "changed"
+    del new[50]
+    new.insert(80, "added")
+    expected = list(difflib.unified_diff(old, new, "a", "b", lineterm=""))
+    assert list(unified_diff(old, new, "a", "b")) == expected
+
+
+def test_opcodes_rebuild_the_new_lines():
+    generator = random.Random(7)
+    for _ in range(500):
+        old = [generator.choice("abcdef") + str(generator.randint(0, 20)) for _ in range(generator.randint(0, 40))]
+        new = list(old)
+        for _ in range(generator.randint(0, 6)):
+            spot = generator.randint(0, len(new))
+            if generator.random() < 0.5:
+                new.insert(spot, generator.choice("xyz"))
+            elif new:
+                del new[min(spot, len(new) - 1)]
+        assert _apply(old, new, opcodes(old, new)) == new
+
+
+def test_repetitive_text_stays_small():
+    old = [f"line {number % 500}" for number in range(20_000)]
+    new = list(old)
+    new[3_000] = "edit"
+    new[15_000] = "edit"
+    diff = list(unified_diff(old, new, "a", "b"))
+    assert [line for line in diff if line[:1] in "+-" and line[:3] not in ("---", "+++")] == [
+        "-line 0",
+        "+edit",
+        "-line 0",
+        "+edit",
+    ]
+
+
+def test_skip_and_no_changes():
+    old = ["a", "b", "c"]
+    assert not list(unified_diff(old, list(old), "a", "b"))
+    assert list(unified_diff(old, ["a", "b", "d"], "a", "b", skip=2))[-2:] == ["-c", "+d"]
+
+
+def test_diff_command(tmp_path):
+    path = tmp_path / "walrus.txt"
+    path.write_text("cat\ndog\nbird\n", encoding="utf-8")
+    results = []
+    app = make_app(results, path=path)
+    assert parse_command("DIFF UNDO", 1, 3, headless=True) == Command(Commands.DIFF, phrases=Phrases(("UNDO",)))
+
+    app.execute_command(Command(Commands.DIFF))
+    assert results[-1] == "No changes"
+
+    app.execute_command(Command(Commands.REPLACE, LineRange(3, 0), Phrases(("bird", "walrus"))))
+    results.clear()
+    app.execute_command(Command(Commands.DIFF))
+    assert results[:3] == [f"--- {path}", "+++ current document", "@@ -1,3 +1,3 @@"]
+    assert results[-2:] == ["-bird", "+walrus"]
+
+    app.execute_command(Command(Commands.DELETE, LineRange(1, 0)))
+    results.clear()
+    app.execute_command(Command(Commands.DIFF, phrases=Phrases(("undo",))))
+    assert results == ["--- before last change", "+++ current document", "@@ -1,3 +1,2 @@", "-cat", " dog", " walrus"]
+
+    # someone else changed the file, so nothing is assumed to match
+    path.write_text("cow\ndog\nbird\n", encoding="utf-8")
+    results.clear()
+    app.execute_command(Command(Commands.DIFF))
+    assert "-cow" in results and "-bird" in results
@@ -46,3 +46,22 @@ def test_document_move_back_stuff_to_front():
         "1",
         "2",
     ]
+
+
+def test_dirty_from_tracks_first_changed_line():
+    doc = Document(fake_input, fake_edit, [str(number) for number in range(1, 11)])
+    assert doc.first_changed_line() is None
+
+    doc.push(9, ["new"])
+    assert doc.dirty
+    assert doc.first_changed_line() == 8
+    doc.copy(LineRange(1, 0), 6)
+    assert doc.first_changed_line() == 5
+
+    doc.mark_clean()
+    assert not doc.dirty
+    assert doc.first_changed_line() is None
+
+    doc.undo()
+    # replaced wholesale, could be anything
+    assert doc.first_changed_line() == 0
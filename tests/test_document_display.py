@@ -88,3 +88,30 @@ def test_search():
     for result in results:
         assert "rOT" not in result[0]
     assert len(results) == 3
+
+
+def test_page_jumps_to_line():
+    lines = [str(number) for number in range(1, 100_001)]
+    doc = Document(fake_input, fake_edit, lines)
+
+    result = list(doc.page(3, start=90_000))
+    assert [text for text, _ in result] == [
+        "    90000 : 90000",
+        "    90001 : 90001",
+        "    90002 : 90002",
+    ]
+    assert doc.current_line == 90_003
+
+    result = list(doc.page(3, start=200_000))
+    assert [text for text, _ in result] == ["   100000 : 100000"]
+    assert doc.current_line == 100_000
+
+
+def test_list_doc_window():
+    lines = [str(number) for number in range(1, 1_001)]
+    doc = Document(fake_input, fake_edit, lines)
+    doc.current_line = 7
+
+    result = list(doc.list_doc(LineRange(start=8, offset=992), window=3))
+    assert [text for text, _ in result] == ["      8 : 8", "      9 : 9", "     10 : 10"]
+    assert doc.current_line == 7
@@ -9,3 +9,68 @@ def test_write_to_markdown():
         data_to_write = "Something"
         patch_path.return_value = data_to_write
         assert file_converters.write_to_markdown("foo.txt", ["# Title", "", "_Hello_ *world*"])
+
+
+SAMPLE = [
+    "# Walrus",
+    "",
+    "Some *facts* about [tusks][ref].",
+    "",
+    "- one",
+    "- two",
+    "",
+    "- three, loose",
+    "",
+    "```python",
+    "x = 1",
+    "",
+    "y = 2",
+    "```",
+    "",
+    "| a | b |",
+    "|---|---|",
+    "| 1 | 2 |",
+    "",
+    "[ref]: http://example.com",
+]
+
+
+def test_blocks_render_like_the_whole_document():
+    whole = file_converters.get_markdown_it().render("\n".join(SAMPLE))
+    assert "".join(file_converters.render_blocks(SAMPLE)) == whole
+
+
+def test_stream_markdown_matches_whole_document():
+    import mistune
+
+    from dedlin.tools.export import markdown_blocks, stream_markdown
+
+    whole = mistune.create_markdown()("\n".join(SAMPLE))
+    assert "".join(stream_markdown(SAMPLE, "\n")) == whole
+    # the fenced code keeps its blank line
+    assert ["```python", "x = 1", "", "y = 2", "```", ""] in list(markdown_blocks(SAMPLE))
+
+
+def test_markdown_file_is_written_next_to_it(tmp_path):
+    path = tmp_path / "walrus.md"
+    path.write_text("\n".join(SAMPLE), encoding="utf-8")
+    html_path = file_converters.write_to_markdown(str(path), SAMPLE)
+    assert html_path == str(tmp_path / "walrus.html")
+    assert "<h1>Walrus</h1>" in (tmp_path / "walrus.html").read_text(encoding="utf-8")
+    # the markdown is left alone
+    assert path.exists()
+
+
+def test_blocks_carry_only_the_references_they_use():
+    import mistune
+
+    from dedlin.tools.export import markdown_block_texts, stream_markdown
+
+    lines = ["See [the Walrus][Walrus] and [seals].", "", "No links here.", ""]
+    lines += [f"[ref{number}]: http://example.com/{number}" for number in range(100)]
+    lines += ["[walrus]: http://example.com/walrus", "[seals]: http://example.com/seals"]
+    texts = list(markdown_block_texts(lines, "\n"))
+    assert texts[0].endswith("\n\n[walrus]: http://example.com/walrus\n[seals]: http://example.com/seals")
+    assert "ref1" not in texts[0]
+    assert texts[1] == "No links here.\n"
+    assert "".join(stream_markdown(lines, "\n")) == mistune.create_markdown()("\n".join(lines))
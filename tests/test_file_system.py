@@ -0,0 +1,179 @@
+import bz2
+import codecs
+import gzip
+
+import pytest
+
+import dedlin.file_system as file_system
+from dedlin import CommandGenerator
+from tests.fakes import make_app
+
+
+@pytest.mark.parametrize("line_break", ["\n", "\r\n", "\r"])
+def test_line_break_round_trips(tmp_path, line_break):
+    path = tmp_path / "walrus.txt"
+    path.write_bytes(line_break.join(["cat", "dog", "", "walrus"]).encode("utf-8") + line_break.encode("utf-8"))
+
+    lines, text_format = file_system.read_file_with_format(path)
+    assert lines == ["cat", "dog", "", "walrus"]
+    assert text_format.line_break == line_break
+
+    original = path.read_bytes()
+    file_system.save_and_overwrite(path, lines, text_format.line_break, text_format.encoding)
+    assert path.read_bytes() == original
+
+
+def test_dominant_line_break_wins(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"a\r\nb\r\nc\nd\r\n")
+    lines, text_format = file_system.read_file_with_format(path)
+    assert lines == ["a", "b", "c", "d"]
+    assert text_format.line_break == "\r\n"
+
+
+def test_no_trailing_line_break(tmp_path):
+    path = tmp_path / "short.txt"
+    path.write_bytes(b"a\nb")
+    assert file_system.read_file(path) == ["a", "b"]
+
+
+def test_block_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_system, "BLOCK_SIZE", 3)
+    path = tmp_path / "blocks.txt"
+    text = "walrus\r\nfacts\r\n\r\ntusks, ü and é\r\n"
+    path.write_bytes(text.encode("utf-8"))
+    lines, text_format = file_system.read_file_with_format(path)
+    assert lines == ["walrus", "facts", "", "tusks, ü and é"]
+    assert text_format.line_break == "\r\n"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8-sig", "utf-16", "utf-32"])
+def test_byte_order_marks(tmp_path, encoding):
+    path = tmp_path / "marked.txt"
+    path.write_bytes("tusk\nwhisker\n".encode(encoding))
+    lines, text_format = file_system.read_file_with_format(path)
+    assert lines == ["tusk", "whisker"]
+    assert text_format.encoding == encoding
+
+    file_system.save_and_overwrite(path, lines, text_format.line_break, text_format.encoding)
+    assert path.read_bytes() == "tusk\nwhisker\n".encode(encoding)
+
+
+def test_not_utf8_falls_back_to_latin1(tmp_path):
+    path = tmp_path / "old.txt"
+    path.write_bytes("café\n".encode("latin-1"))
+    lines, text_format = file_system.read_file_with_format(path)
+    assert lines == ["café"]
+    assert text_format.encoding == "latin-1"
+
+
+def test_detect_encoding():
+    assert file_system.detect_encoding(codecs.BOM_UTF32_LE + b"a") == "utf-32"
+    assert file_system.detect_encoding(codecs.BOM_UTF16_LE + b"a\x00") == "utf-16"
+    assert file_system.detect_encoding(b"plain") == "utf-8"
+
+
+def test_only_universal_newlines_split(tmp_path):
+    path = tmp_path / "odd.txt"
+    path.write_bytes("form\x0cfeed here\nnext\n".encode("utf-8"))
+    assert file_system.read_file(path) == ["form\x0cfeed here", "next"]
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+def test_compressed_round_trip(tmp_path, suffix):
+    path = tmp_path / f"walrus.log{suffix}"
+    lines = [f"{number} walrus sighting" for number in range(5_000)]
+    file_system.save_and_overwrite(path, lines, "\r\n")
+
+    opener = file_system.COMPRESSED_SUFFIXES[suffix]
+    with opener(str(path), "rb") as file:
+        assert file.read().startswith(b"0 walrus sighting\r\n1 walrus")
+
+    read_back, text_format = file_system.read_file_with_format(path)
+    assert read_back == lines
+    assert text_format.line_break == "\r\n"
+
+
+def test_new_compressed_file_is_an_empty_archive(tmp_path):
+    path = tmp_path / "new.txt.gz"
+    assert file_system.read_or_create_file(path) == []
+    with gzip.open(str(path), "rb") as file:
+        assert file.read() == b""
+
+
+def test_compressed_macro(tmp_path):
+    document = tmp_path / "notes.txt.gz"
+    file_system.save_and_overwrite(document, ["cat", "dog"], "\n")
+    macro = tmp_path / "cleanup.ed.bz2"
+    with bz2.open(str(macro), "wt", encoding="utf-8") as file:
+        file.write("1 REPLACE cat walrus\nSAVE\n")
+
+    app = make_app(inputter=CommandGenerator(macro), quit_safety=False)
+    app.entry_point(str(document), str(macro))
+    assert file_system.read_file(document) == ["walrus", "dog"]
+
+
+def _saved(tmp_path, lines, line_break="\n"):
+    path = tmp_path / "log.txt"
+    file_system.save_and_overwrite(path, lines, line_break)
+    return path, file_system.file_signature(path)
+
+
+def test_save_rewrites_only_the_tail(tmp_path):
+    lines = [f"{number} walrus" for number in range(1_000)]
+    path, signature = _saved(tmp_path, lines, "\r\n")
+    inode = path.stat().st_ino
+
+    lines[-1] = "changed walrus"
+    lines.append("one more")
+    signature = file_system.save_document(path, lines, "\r\n", unchanged_lines=999, signature=signature)
+    assert path.stat().st_ino == inode
+    assert path.read_bytes() == "".join(line + "\r\n" for line in lines).encode("utf-8")
+    assert signature == file_system.file_signature(path)
+
+    del lines[-2:]
+    file_system.save_document(path, lines, "\r\n", unchanged_lines=998, signature=signature)
+    assert file_system.read_file(path) == lines
+
+
+def test_tail_offset_counts_bytes_not_characters(tmp_path):
+    lines = ["tête à tête", "naïve", "plain", "last"]
+    path, signature = _saved(tmp_path, lines)
+    lines[3] = "ünïcode"
+    file_system.save_document(path, lines, "\n", unchanged_lines=3, signature=signature)
+    assert file_system.read_file(path) == lines
+
+
+def test_save_replaces_file_when_changed_elsewhere(tmp_path):
+    lines = [f"{number}" for number in range(100)]
+    path, signature = _saved(tmp_path, lines)
+    path.chmod(0o640)
+    with open(path, "a", encoding="utf-8") as file:
+        file.write("someone else\n")
+    inode = path.stat().st_ino
+
+    lines[-1] = "mine"
+    file_system.save_document(path, lines, "\n", unchanged_lines=99, signature=signature)
+    assert file_system.read_file(path) == lines
+    # written to a temp file and renamed over the old one
+    assert path.stat().st_ino != inode
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert [entry.name for entry in tmp_path.iterdir()] == ["log.txt"]
+
+
+def test_save_replaces_file_when_change_is_near_the_start(tmp_path):
+    lines = [f"{number}" for number in range(100)]
+    path, signature = _saved(tmp_path, lines)
+    inode = path.stat().st_ino
+    lines[1] = "early"
+    file_system.save_document(path, lines, "\n", unchanged_lines=1, signature=signature)
+    assert file_system.read_file(path) == lines
+    assert path.stat().st_ino != inode
+
+
+def test_mixed_line_breaks_are_not_uniform(tmp_path):
+    path = tmp_path / "mixed.txt"
+    path.write_bytes(b"a\r\nb\nc\r\n")
+    assert not file_system.read_file_with_format(path)[1].uniform
+    path.write_bytes(b"a\r\nb\r\nc\r\n")
+    assert file_system.read_file_with_format(path)[1].uniform
@@ -1,7 +1,9 @@
 import dedlin.main as main_module
-from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
 from dedlin.command_sources import InMemoryCommandGenerator
+from dedlin.document import DEFAULT_PAGE_SIZE
 from dedlin.document_sources import InMemoryInputter
+from tests.fakes import make_app
 
 
 def test_main():
@@ -18,3 +20,45 @@ def test_main():
         inputter=commandGenerator, insert_document_inputter=inputter, edit_document_inputter=thingy, outputter=print
     )
     app.entry_point()
+
+
+def test_page_command_jumps_and_continues():
+    results = []
+    app = make_app(results, path="/dev/null")
+    app.doc.lines = [str(number) for number in range(1, 21)]
+    results.clear()
+
+    app.execute_command(Command(Commands.PAGE, LineRange(start=12, offset=0)))
+    assert results == ["   12 : 12", "   13 : 13", "   14 : 14", "   15 : 15", "   16 : 16"]
+
+    results.clear()
+    # bare PAGE has the whole document as range, continue where we left off
+    app.execute_command(Command(Commands.PAGE, LineRange(start=1, offset=19)))
+    assert results[0] == "   17 : 17"
+
+
+def test_pager_limits_list_to_one_page():
+    results = []
+    app = make_app(results, path="/dev/null", pager=True)
+    app.doc.lines = [str(number) for number in range(1, 21)]
+    app.doc.current_line = 12
+    results.clear()
+
+    app.execute_command(Command(Commands.LIST, LineRange(start=1, offset=19)))
+    assert len(results) == DEFAULT_PAGE_SIZE
+    assert results[0] == "    1 : 1"
+    # LIST never moves the current line, even when paged
+    assert app.doc.current_line == 12
+
+
+def test_save_after_editing_the_end(tmp_path):
+    document = tmp_path / "log.txt"
+    document.write_bytes(b"".join(f"{number}\r\n".encode() for number in range(200)))
+    inode = document.stat().st_ino
+    app = make_app(path=document)
+    app.execute_command(Command(Commands.REPLACE, LineRange(start=200, offset=0), Phrases(("199", "last"))))
+    app.execute_command(Command(Commands.SAVE))
+
+    assert document.stat().st_ino == inode
+    assert document.read_bytes().endswith(b"198\r\nlast\r\n")
+    assert not app.doc.dirty
@@ -0,0 +1,77 @@
+import sys
+import tracemalloc
+
+import pytest
+
+from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.parsers import parse_command
+from dedlin.tools import memory
+from dedlin.utils.exceptions import DedlinException
+from tests.fakes import make_app, make_document
+
+
+def test_human():
+    assert memory.human(12) == "12 bytes"
+    assert memory.human(1536) == "1.5 KB"
+    assert memory.human(3 * memory.MEGABYTE) == "3.0 MB"
+    assert memory.human(2 * 1024 * memory.MEGABYTE) == "2.0 GB"
+
+
+def test_shared_lines_count_once():
+    line = "x" * 1000
+    assert memory.lines_bytes([line, line]) == sys.getsizeof([line, line]) + sys.getsizeof(line)
+
+
+def test_undo_copy_shares_unchanged_lines():
+    doc = make_document([f"line {number}" * 50 for number in range(100)])
+    assert memory.undo_bytes(doc) == 0
+    doc.backup()
+    assert memory.undo_bytes(doc) == sys.getsizeof(doc.previous_lines)
+    doc.lines[0] = "changed"
+    assert memory.undo_bytes(doc) > sys.getsizeof(doc.previous_lines)
+
+
+def test_ceiling_refuses_then_clears_caches():
+    usage = iter([900, 900])
+    ceiling = memory.MemoryCeiling(1000, usage=lambda: next(usage))
+    assert ceiling.allows(50)
+    assert not ceiling.allows(200)
+    assert ceiling.used == 900
+    unknown = memory.MemoryCeiling(1000, usage=lambda: None)
+    assert unknown.allows(10**12)
+
+
+def test_process_bytes_traced():
+    was_tracing = tracemalloc.is_tracing()
+    memory.start_tracing()
+    try:
+        assert memory.process_bytes() is not None
+        assert memory.peak_bytes() >= memory.process_bytes()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def test_info_shows_memory():
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    assert parse_command("INFO", 1, 3, headless=True).command == Commands.INFO
+    app.execute_command(Command(Commands.INFO))
+    assert any(row.endswith("document") for row in results)
+    assert any(row.endswith("kept for undo") for row in results)
+
+
+def test_allocating_commands_refused_over_ceiling():
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    app.memory_ceiling = memory.MemoryCeiling(1000, usage=lambda: 2000)
+    with pytest.raises(DedlinException):
+        app.execute_command(Command(Commands.SORT))
+
+    app.halt_on_error = False
+    app.execute_command(Command(Commands.SORT))
+    assert app.doc.lines == ["b", "a", "c"]
+    assert any("refused" in row for row in results)
+
+    app.execute_command(Command(Commands.DELETE, LineRange(1, 0)))
+    assert app.doc.lines == ["a", "c"]
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+import pytest
+
+from dedlin import StringCommandGenerator
+from dedlin.parsers import parse_command
+from dedlin.tools import metrics
+from tests.fakes import make_app
+
+
+def test_counter_and_histogram_text():
+    counter = metrics.Counter("things_total", "Things.", ("kind",))
+    counter.inc(2, ('a "quoted"\\name',))
+    assert list(counter.render())[-1] == 'things_total{kind="a \\"quoted\\"\\\\name"} 2'
+
+    histogram = metrics.Histogram("wait_seconds", "Waits.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+    lines = list(histogram.render())
+    assert lines[2:] == [
+        'wait_seconds_bucket{le="0.1"} 1',
+        'wait_seconds_bucket{le="1"} 3',
+        'wait_seconds_bucket{le="+Inf"} 4',
+        "wait_seconds_sum 4.05",
+        "wait_seconds_count 4",
+    ]
+
+
+def test_big_values_are_exact():
+    counter = metrics.Counter("lines_total", "Lines.")
+    counter.inc(12345678)
+    assert list(counter.render())[-1] == "lines_total 12345678"
+    written = metrics.Counter("written_total", "Written.")
+    written.inc(10000000)
+    written.inc(1.0)
+    assert list(written.render())[-1] == "written_total 10000001"
+
+    histogram = metrics.Histogram("save_seconds", "Saves.", buckets=(1.0,))
+    histogram.observe(1234567.125)
+    histogram.observe(0.1)
+    assert "save_seconds_sum 1234567.225" in list(histogram.render())
+
+
+def test_unlabelled_metrics_start_at_zero(tmp_path):
+    path = tmp_path / "dedlin.prom"
+    metrics.Metrics().write(path)
+    text = path.read_text(encoding="utf-8")
+    assert "dedlin_lines_read_total 0\n" in text
+    assert "dedlin_save_seconds_count 0\n" in text
+    assert 'dedlin_cache_hits_total{function="dedlin.tools.export.get_markdown"}' in text
+    assert [item.name for item in tmp_path.iterdir()] == ["dedlin.prom"]
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = metrics.start(tmp_path / "dedlin.prom", interval=3600)
+    yield recorder
+    metrics.stop()
+
+
+def test_hooks(tmp_path: Path, recorder):
+    document = tmp_path / "notes.txt"
+    document.write_text("beta\nalpha\ngamma\n", encoding="utf-8")
+    make_app(path=document, inputter=StringCommandGenerator("1,2 SORT\nSAVE"))
+
+    assert recorder.commands.values[("SORT",)] == 1
+    assert recorder.commands.values[("SAVE",)] == 1
+    assert recorder.lines_read.values[()] == 3
+    assert recorder.lines_written.values[()] == 3
+    assert sum(recorder.save_seconds.counts[()]) == 1
+    assert sum(recorder.parse_seconds.counts[()]) == 2
+
+    parse_command("LIST", 1, 3, headless=True)
+    assert sum(recorder.parse_seconds.counts[()]) == 3
+
+    metrics.stop()
+    text = (tmp_path / "dedlin.prom").read_text(encoding="utf-8")
+    assert 'dedlin_commands_total{command="SORT"} 1' in text
+    assert metrics.METRICS is None
@@ -0,0 +1,52 @@
+from dedlin.basic_types import Command, Commands, LineRange, NullPrinter, Phrases
+from dedlin.command_sources import StringCommandGenerator
+from tests.fakes import make_app
+
+
+def _run(tmp_path, outputter, script, no_display=False):
+    document = tmp_path / "notes.txt"
+    document.write_text("cat\ndog\ncat food\n", encoding="utf-8")
+    return make_app(
+        path=document,
+        inputter=StringCommandGenerator(script),
+        outputter=outputter,
+        quiet=True,
+        no_display=no_display,
+    )
+
+
+def test_no_display_nulls_document_output(tmp_path):
+    results = []
+    app = _run(tmp_path, lambda text, end="\n": results.append(text), "1,3 LIST", no_display=True)
+    assert isinstance(app.document_outputter, NullPrinter)
+    assert not results
+
+
+def test_replace_still_happens_without_output(tmp_path):
+    script = "1,3 REPLACE cat bird\n1,3 LIST\n1,3 SEARCH bird\nHISTORY"
+    quiet_app = _run(tmp_path, NullPrinter(), script, no_display=True)
+    results = []
+    loud_app = _run(tmp_path, lambda text, end="\n": results.append(text), script)
+
+    assert quiet_app.doc.lines == loud_app.doc.lines == ["bird", "dog", "bird food"]
+    assert quiet_app.doc.current_line == loud_app.doc.current_line
+    assert quiet_app.doc.dirty
+    assert results
+
+
+def test_spell_moves_current_line_without_output(tmp_path):
+    quiet_app = _run(tmp_path, NullPrinter(), "1,2 SPELL", no_display=True)
+    loud_app = _run(tmp_path, lambda text, end="\n": None, "1,2 SPELL")
+    assert quiet_app.doc.current_line == loud_app.doc.current_line == 3
+
+
+def test_quiet_headless_skips_status_lines(tmp_path):
+    app = _run(tmp_path, NullPrinter(), "1 REPLACE cat bird\n1 LIST", no_display=True)
+    comments = [command.comment for command in app.history if command.command == Commands.COMMENT]
+    # feedback is still in the history, only status lines are never built
+    assert "Replacing" in comments
+    assert not any(comment.startswith("Current line") for comment in comments)
+
+    app.verbose = True
+    app.execute_command(Command(Commands.REPLACE, LineRange(1, 0), Phrases(("bird", "cat"))))
+    assert app.doc.lines[0] == "cat"
@@ -0,0 +1,80 @@
+import asyncio
+import pstats
+
+import pytest
+
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.parsers import parse_command
+from dedlin.tools.profiling import Profiler, profiled, top_functions
+from tests.fakes import AsyncTextCommands, make_app
+
+
+def test_start_stop_writes_pstats(tmp_path):
+    profiler = Profiler()
+    assert profiler.start()
+    assert not profiler.start()
+    sorted(range(1000), reverse=True)
+    stats = profiler.stop(tmp_path / "out.pstats")
+    assert stats is not None
+    assert not profiler.running
+    assert pstats.Stats(str(tmp_path / "out.pstats")).total_calls > 0
+    assert any("function calls" in row for row in top_functions(stats))
+    assert profiler.stop(tmp_path / "again.pstats") is None
+
+
+def test_profiled_writes_on_error(tmp_path):
+    profiler = Profiler()
+    path = tmp_path / "crash.pstats"
+    with pytest.raises(SystemExit):
+        with profiled(profiler, path):
+            raise SystemExit(1)
+    assert path.exists()
+    assert not profiler.running
+
+
+def test_profile_command(tmp_path):
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    path = tmp_path / "window.pstats"
+    assert parse_command(f"PROFILE STOP {path}", 1, 3, headless=True) == Command(
+        Commands.PROFILE, phrases=Phrases(("STOP", str(path)))
+    )
+
+    app.execute_command(Command(Commands.PROFILE, phrases=Phrases(("START",))))
+    assert app.profiler.running
+    app.execute_command(Command(Commands.SORT, LineRange(1, 2)))
+    app.execute_command(Command(Commands.PROFILE, phrases=Phrases(("STOP", str(path)))))
+    assert not app.profiler.running
+    assert path.exists()
+    assert any("sort" in row for row in results)
+
+
+def test_profile_command_refused_for_whole_session(tmp_path):
+    app = make_app(lines=["b", "a", "c"])
+    app.profile_path = tmp_path / "session.pstats"
+    app.execute_command(Command(Commands.PROFILE, phrases=Phrases(("START",))))
+    assert not app.profiler.running
+
+
+def test_profile_command_in_the_async_loop(tmp_path):
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    app.doc.lines = [str(number) for number in range(1000)]
+    path = tmp_path / "async.pstats"
+    commands = AsyncTextCommands(["PROFILE START", "SORT", f"PROFILE STOP {path}"])
+    assert asyncio.run(app.run_command_source_async(commands)) is None
+    assert not app.profiler.running
+    assert any("Profile saved" in row for row in results)
+    # SORT ran on a worker thread and still shows up
+    rows = top_functions(pstats.Stats(str(path)), limit=1000)
+    assert any("document.py" in row and "(sort)" in row for row in rows)
+
+
+def test_whole_session_profile_sees_async_commands(tmp_path):
+    app = make_app(lines=["b", "a", "c"])
+    app.doc.lines = [str(number) for number in range(1000)]
+    path = tmp_path / "session.pstats"
+    with profiled(app.profiler, path):
+        asyncio.run(app.run_command_source_async(AsyncTextCommands(["SORT"])))
+    rows = top_functions(pstats.Stats(str(path)), limit=1000)
+    assert any("document.py" in row and "(sort)" in row for row in rows)
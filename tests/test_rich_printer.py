@@ -1,4 +1,8 @@
-from dedlin.outputters.rich_output import RichPrinter
+import io
+
+from rich.console import Console
+
+from dedlin.outputters.rich_output import RichPrinter, get_lexer
 
 
 def test_the_rich_printer(capsys) -> None:
@@ -6,3 +10,42 @@ def test_the_rich_printer(capsys) -> None:
     printer.print("So it goes", end="\n")
     captured = capsys.readouterr()
     assert "So it goes" in captured.out
+
+
+def test_batch_highlights_once() -> None:
+    stream = io.StringIO()
+    printer = RichPrinter(console=Console(file=stream), max_block_lines=3)
+    with printer.batch():
+        printer("import os")
+        printer("x = 1")
+        assert stream.getvalue() == ""
+        printer("y = 2\n")
+        assert "x = 1" in stream.getvalue()
+        printer("z = 3")
+    assert "z = 3" in stream.getvalue()
+    assert get_lexer("python") is get_lexer("python")
+
+
+def test_batch_split_keeps_every_line() -> None:
+    stream = io.StringIO()
+    printer = RichPrinter(console=Console(file=stream), max_block_lines=4)
+    lines = [f"x{number} = {number}" for number in range(10)]
+    with printer.batch():
+        for line in lines:
+            printer(line)
+    assert stream.getvalue().splitlines() == lines
+
+
+def test_batch_highlights_for_terminals() -> None:
+    stream = io.StringIO()
+    printer = RichPrinter(console=Console(file=stream, force_terminal=True, color_system="256"))
+    with printer.batch():
+        printer("import os")
+    assert "\x1b[38;5;" in stream.getvalue()
+
+    stream = io.StringIO()
+    printer = RichPrinter(console=Console(file=stream, force_terminal=True, color_system="standard"))
+    with printer.batch():
+        printer("import os")
+    assert "\x1b[" in stream.getvalue()
+    assert "38;5;" not in stream.getvalue()
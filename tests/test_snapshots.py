@@ -0,0 +1,160 @@
+import asyncio
+import threading
+
+import dedlin.file_system as file_system
+from dedlin.basic_types import Commands, LineRange
+from dedlin.document import Document
+from dedlin.outputters.queued import QueuedPrinter
+from tests.fakes import AsyncTextCommands, make_app, make_document
+
+
+def test_view_keeps_its_lines_through_edits():
+    doc = make_document(["b", "a", "c"])
+    view = doc.view()
+    snapshot = doc.snapshot()
+
+    doc.sort()
+    doc.spread(LineRange(1, 0), ["z"])
+    doc.replace_quietly(LineRange(1, 2), "c", "C")
+    doc.delete(LineRange(1, 0))
+    doc.fill(LineRange(1, 1), "x")
+    assert doc.lines == ["b", "x", "C"]
+    assert view.lines == ["b", "a", "c"]
+    assert snapshot == ["b", "a", "c"]
+
+    doc.undo()
+    assert doc.lines == ["b", "C"]
+    view = doc.view()
+    doc.push(1, ["first"])
+    assert doc.lines == ["first", "b", "C"]
+    assert view.lines == ["b", "C"]
+    doc.undo()
+    assert doc.lines == ["b", "C"]
+
+
+def test_only_the_edit_after_a_view_copies():
+    doc = make_document(["a", "b"])
+    doc.view()
+    doc.delete(LineRange(1, 0))
+    # the shared list became the undo copy, the edit got a list of its own
+    assert not doc.shared
+    lines = doc.lines
+    doc.delete(LineRange(1, 0))
+    assert doc.lines is lines
+    assert doc.previous_lines == ["b"]
+
+
+def test_edits_to_a_view_stay_in_the_view():
+    doc = make_document(["a", "b"])
+    view = doc.view()
+    view.replace_quietly(LineRange(1, 1), "a", "A")
+    view.delete(LineRange(2, 0))
+    assert view.lines == ["A"]
+    assert doc.lines == ["a", "b"]
+
+
+def test_readers_on_another_thread_see_a_stable_view():
+    doc = make_document([str(number) for number in range(1000)])
+    stop = threading.Event()
+    seen = []
+
+    def read(view):
+        while not stop.is_set():
+            seen.append(tuple(view.lines) == tuple(str(number) for number in range(1000)))
+
+    reader = threading.Thread(target=read, args=(doc.view(),))
+    reader.start()
+    try:
+        for _ in range(200):
+            doc.reverse()
+            doc.replace_quietly(LineRange(1, 9), "9", "nine")
+            doc.delete(LineRange(1, 0))
+            doc.paste(1, ["0"])
+    finally:
+        stop.set()
+        reader.join()
+    assert seen and all(seen)
+
+
+def test_search_runs_on_a_snapshot_while_edits_continue(monkeypatch):
+    results = []
+    app = make_app(results, ["cat", "dog", "cat food"], concurrent_reads=True)
+    searching, release = threading.Event(), threading.Event()
+    search = Document.search
+
+    def slow_search(self, line_range, value, case_sensitive=False):
+        searching.set()
+        assert release.wait(5)
+        yield from search(self, line_range, value, case_sensitive)
+
+    monkeypatch.setattr(Document, "search", slow_search)
+
+    async def run():
+        task = asyncio.create_task(app.run_command_source_async(AsyncTextCommands(["SEARCH cat", "1 DELETE", "LIST"])))
+        await asyncio.to_thread(searching.wait, 5)
+        # the search holds no lock, the edits after it go ahead
+        while "   2 : cat food" not in results:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await task
+
+    assert asyncio.run(run()) is None
+    assert app.doc.lines == ["dog", "cat food"]
+    assert "   1 : cat" in results
+    assert "   3 : cat food" in results
+    assert results.index("   1 : dog") < results.index("   1 : cat")
+
+
+def test_queued_printer_batch_is_not_interleaved():
+    printed = []
+
+    async def run():
+        printer = QueuedPrinter(lambda text, end="\n": printed.append(text), asyncio.get_running_loop())
+        drain = asyncio.create_task(printer.drain())
+        both = threading.Barrier(2)
+
+        def burst(name):
+            with printer.batch():
+                both.wait(5)
+                for number in range(100):
+                    printer(f"{name}{number}")
+
+        await asyncio.gather(asyncio.to_thread(burst, "a"), asyncio.to_thread(burst, "b"))
+        await printer.join()
+        drain.cancel()
+
+    asyncio.run(run())
+    assert len(printed) == 200
+    first = printed[0][0]
+    assert all(text[0] == first for text in printed[:100])
+
+
+def test_snapshot_keeps_the_file_of_its_buffer(monkeypatch, tmp_path):
+    first, second = tmp_path / "first.md", tmp_path / "second.md"
+    first.write_text("# cat\n", encoding="utf-8")
+    second.write_text("# dog\n", encoding="utf-8")
+    app = make_app(path=first, concurrent_reads=True)
+    exporting, release = threading.Event(), threading.Event()
+    exported = []
+    dispatch = app.dispatch_command
+
+    def slow_dispatch(command):
+        if command.command == Commands.EXPORT:
+            # the file is looked up after the switch
+            exporting.set()
+            assert release.wait(5)
+        return dispatch(command)
+
+    monkeypatch.setattr(app, "dispatch_command", slow_dispatch)
+    monkeypatch.setattr(file_system, "export", lambda path, lines, line_break: exported.append((path, lines)))
+
+    async def run():
+        task = asyncio.create_task(app.run_command_source_async(AsyncTextCommands(["EXPORT", f"BUFFER OPEN {second}"])))
+        await asyncio.to_thread(exporting.wait, 5)
+        while app.file_path != second:
+            await asyncio.sleep(0.001)
+        release.set()
+        return await task
+
+    assert asyncio.run(run()) is None
+    assert exported == [(first, ["# cat"])]
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.document import Document
+from dedlin.document_sources import InMemoryInputter
+from dedlin.parsers import parse_command
+from dedlin.tools.sorting import SortOptions, parse_sort_options, sorted_lines
+from tests.fakes import make_app
+
+
+def test_parse_sort_options():
+    assert parse_sort_options(None) == SortOptions()
+    assert parse_sort_options(Phrases(("numeric", "REVERSE", "field", "2"))) == SortOptions(
+        numeric=True, reverse=True, field=2
+    )
+    assert parse_sort_options(Phrases(("FIELD",))) is None
+    assert parse_sort_options(Phrases(("FIELD", "0"))) is None
+    assert parse_sort_options(Phrases(("FIELD", "1", "COLUMN", "2"))) is None
+    assert parse_sort_options(Phrases(("sideways",))) is None
+
+
+def test_keys():
+    lines = ["10 walrus", "9 Seal", "b 3", "A 2", "-1.5e1 orca"]
+    assert sorted_lines(lines, SortOptions(numeric=True)) == ["-1.5e1 orca", "b 3", "A 2", "9 Seal", "10 walrus"]
+    assert sorted_lines(lines, SortOptions(field=2, numeric=True))[-2:] == ["A 2", "b 3"]
+    assert sorted_lines(["b", "A", "a", "B"], SortOptions(ignore_case=True, unique=True)) == ["A", "b"]
+    assert sorted_lines(["xb", "ya", "zc"], SortOptions(column=2, reverse=True)) == ["zc", "xb", "ya"]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        SortOptions(),
+        SortOptions(numeric=True),
+        SortOptions(ignore_case=True, reverse=True),
+        SortOptions(field=2, unique=True),
+        SortOptions(numeric=True, reverse=True, unique=True),
+    ],
+)
+def test_external_sort_matches_in_memory(options):
+    generator = random.Random(42)
+    lines = [f"{generator.randint(0, 50)} {generator.choice('aAbBcC')}{generator.randint(0, 9)}" for _ in range(1_000)]
+    assert sorted_lines(lines, options, run_size=64) == sorted_lines(lines, options)
+
+
+def test_sort_command_range():
+    document = Document(InMemoryInputter([]), InMemoryInputter([]), ["z", "10", "9", "1", "a"])
+    command = parse_command("2,4 SORT NUMERIC", current_line=1, document_length=5, headless=True)
+    assert command.command == Commands.SORT
+    document.sort(command.line_range, parse_sort_options(command.phrases))
+    assert document.lines == ["z", "1", "9", "10", "a"]
+    assert document.first_changed_line() == 1
+    document.undo()
+    assert document.lines == ["z", "10", "9", "1", "a"]
+
+
+def test_unique_shortens_document():
+    document = Document(InMemoryInputter([]), InMemoryInputter([]), ["b", "a", "b", "a"])
+    document.current_line = 4
+    document.sort(LineRange(1, 3), SortOptions(unique=True))
+    assert document.lines == ["a", "b"]
+    assert document.current_line == 2
+
+
+def test_bad_options_leave_document_alone():
+    results = []
+    app = make_app(results, ["b", "a"])
+    app.execute_command(Command(Commands.SORT, LineRange(1, 1), Phrases(("sideways",))))
+    assert app.doc.lines == ["b", "a"]
+    assert any("SORT options" in str(text) for text in results)
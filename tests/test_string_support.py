@@ -1,6 +1,8 @@
-from dedlin.basic_types import Command, Commands, Phrases
-from dedlin.parsers import extract_phrases
+import dedlin.string_comands as string_comands
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.parsers import extract_phrases, parse_command
 from dedlin.string_comands import block_commands, process_strings
+from tests.fakes import make_app
 
 
 def test_block_commands():
@@ -34,3 +36,65 @@ def test_process_strings():
         lines = ["a"]
         process_strings(lines, command)
         assert lines[0]
+
+
+def test_process_strings_honors_range():
+    lines = ["cat", "dog", "bird", "walrus"]
+    assert process_strings(lines, Command(Commands.UPPER), LineRange(2, 1))
+    assert lines == ["cat", "DOG", "BIRD", "walrus"]
+
+
+def test_width_is_required():
+    lines = ["a"]
+    assert not process_strings(lines, Command(Commands.CENTER))
+    assert not process_strings(lines, Command(Commands.RJUST, phrases=Phrases(("wide",))))
+    assert lines == ["a"]
+
+
+def test_indent_and_dedent_range():
+    lines = ["def walrus():", "return 1", "x = 2"]
+    assert process_strings(lines, Command(Commands.INDENT), LineRange(2, 0))
+    assert lines == ["def walrus():", "    return 1", "x = 2"]
+    process_strings(lines, Command(Commands.INDENT, phrases=Phrases(("# ",))), LineRange(1, 1))
+    assert lines == ["# def walrus():", "#     return 1", "x = 2"]
+
+
+def test_string_commands_from_the_parser_can_be_undone():
+    app = make_app(lines=["  cat", "  dog", "bird"])
+    app.execute_command(parse_command("1,2 DEDENT", 1, 3, headless=True))
+    assert app.doc.lines == ["cat", "dog", "bird"]
+    app.execute_command(parse_command("3 UPPER", 1, 3, headless=True))
+    assert app.doc.lines == ["cat", "dog", "BIRD"]
+    assert app.doc.first_changed_line() == 0
+    app.execute_command(Command(Commands.UNDO))
+    assert app.doc.lines == ["cat", "dog", "bird"]
+
+
+def test_command_without_a_width_leaves_undo_alone():
+    results = []
+    app = make_app(results, ["cat", "dog"])
+    app.execute_command(parse_command("1 UPPER", 1, 2, headless=True))
+    app.execute_command(parse_command("1,2 CENTER", 1, 2, headless=True))
+    assert any("needs a width" in text for text in results)
+    app.execute_command(Command(Commands.UNDO))
+    assert app.doc.lines == ["cat", "dog"]
+
+
+def test_parallel_map_keeps_order(monkeypatch):
+    monkeypatch.setattr(string_comands, "CHUNK_LINES", 7)
+    lines = [f"walrus {number}" for number in range(100)]
+    assert string_comands.parallel_map(str.upper, lines, workers=3) == [line.upper() for line in lines]
+
+
+def test_big_ranges_go_parallel_only_without_gil(monkeypatch):
+    calls = []
+    monkeypatch.setattr(string_comands, "PARALLEL_MIN_LINES", 10)
+    monkeypatch.setattr(string_comands, "parallel_map", lambda transform, lines, workers: calls.append(workers) or [])
+    lines = ["a"] * 10
+
+    monkeypatch.setattr(string_comands, "gil_enabled", lambda: True)
+    assert string_comands.transform_lines(str.upper, lines, workers=4) == ["A"] * 10
+    monkeypatch.setattr(string_comands, "gil_enabled", lambda: False)
+    string_comands.transform_lines(str.upper, lines, workers=4)
+    string_comands.transform_lines(str.upper, lines[:9], workers=4)
+    assert calls == [4]
@@ -0,0 +1,130 @@
+import threading
+from pathlib import Path
+
+from dedlin.basic_types import Command, Commands, LineRange
+from dedlin.command_sources import InMemoryCommandGenerator
+from dedlin.document_sources import InMemoryInputter
+from dedlin.main import Dedlin
+from dedlin.outputters.talking_outputter import TalkingPrinter, coalesce
+
+
+class FakeEngine:
+    """Stands in for pyttsx3, no audio device needed."""
+
+    def __init__(self):
+        self.said = []
+        self.runs = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Event()
+        self.stopped = 0
+
+    def say(self, text):
+        self.said.append(text)
+
+    def runAndWait(self):
+        self.started.set()
+        self.gate.wait(timeout=5)
+        self.runs += 1
+
+    def stop(self):
+        self.stopped += 1
+
+
+def test_speech_does_not_block_the_caller():
+    engine = FakeEngine()
+    engine.gate.clear()
+    printer = TalkingPrinter(engine=engine)
+    printer("first")
+    assert engine.started.wait(timeout=5)
+    # still speaking "first", but the caller is free to go on
+    printer("second")
+    engine.gate.set()
+    printer.wait()
+    assert engine.said == ["first", "second"]
+
+
+def test_interrupt_skips_stale_messages():
+    engine = FakeEngine()
+    engine.gate.clear()
+    printer = TalkingPrinter(engine=engine)
+    printer("first")
+    assert engine.started.wait(timeout=5)
+    printer("stale one")
+    printer("stale two")
+    printer.interrupt()
+    printer("fresh")
+    engine.gate.set()
+    printer.wait()
+    assert engine.said == ["first", "fresh"]
+
+
+def test_bounded_queue_drops_oldest():
+    engine = FakeEngine()
+    engine.gate.clear()
+    printer = TalkingPrinter(engine=engine, max_queued=2)
+    printer("busy")
+    assert engine.started.wait(timeout=5)
+    for word in ["a", "b", "c", "d"]:
+        printer(word)
+    engine.gate.set()
+    printer.wait()
+    assert engine.said == ["busy", "c", "d"]
+
+
+def test_coalesce_keeps_latest_status():
+    messages = [
+        "Current line 1 of 9",
+        "Copied",
+        "Copied",
+        "Current line 2 of 9",
+        "Current line 3 of 9",
+    ]
+    assert coalesce(messages) == ["Copied", "Current line 3 of 9"]
+
+
+def test_no_engine_is_quiet():
+    printer = TalkingPrinter(engine=None)
+    printer("nothing happens")
+    assert printer.worker is None
+    assert printer.wait(timeout=1)
+
+
+def test_wait_gives_up_after_timeout():
+    engine = FakeEngine()
+    engine.gate.clear()
+    printer = TalkingPrinter(engine=engine)
+    printer("long speech")
+    assert engine.started.wait(timeout=5)
+    assert not printer.wait(timeout=0.01)
+    engine.gate.set()
+    assert printer.wait(timeout=5)
+
+
+class InterruptCounter:
+    def __init__(self):
+        self.interrupts = 0
+
+    def __call__(self, text, end="\n"):
+        pass
+
+    def interrupt(self):
+        self.interrupts += 1
+
+
+def test_only_typed_commands_interrupt_speech():
+    printer = InterruptCounter()
+    app = Dedlin(
+        inputter=InMemoryCommandGenerator([Command(Commands.LIST, LineRange(start=1, offset=0))]),
+        insert_document_inputter=InMemoryInputter([]),
+        edit_document_inputter=InMemoryInputter([]),
+        outputter=printer,
+        history=False,
+    )
+    app.entry_point()
+    typed = printer.interrupts
+    assert typed >= 1
+
+    macro = InMemoryCommandGenerator([Command(Commands.LIST, LineRange(start=1, offset=0))])
+    app.run_command_source(macro, active_macro=Path("walrus.ed"))
+    assert printer.interrupts == typed
@@ -0,0 +1,75 @@
+import json
+
+from dedlin.basic_types import Command, Commands, LineRange, Phrases
+from dedlin.parsers import parse_command
+from dedlin.tools.timing import CommandTimings
+from tests.fakes import make_app
+
+
+class FakeClock:
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+def test_totals_and_histogram():
+    timings = CommandTimings(clock=FakeClock(0.002), cpu_clock=FakeClock(0.001))
+    for _ in range(3):
+        timings.stop("LIST", timings.start(), lines=10)
+    stats = timings.as_dict()["LIST"]
+    assert stats["count"] == 3
+    assert stats["lines"] == 30
+    assert round(stats["wall_seconds"], 6) == 0.006
+    assert stats["histogram"]["<10ms"] == 3
+    rows = list(timings.summary())
+    assert rows[1].startswith("LIST")
+
+
+def test_write_json(tmp_path):
+    timings = CommandTimings()
+    timings.stop("SORT", timings.start(), lines=5)
+    path = tmp_path / "timings.json"
+    timings.write_json(path)
+    assert json.loads(path.read_text(encoding="utf-8"))["SORT"]["lines"] == 5
+
+
+def test_off_by_default():
+    app = make_app(lines=["b", "a", "c"])
+    app.execute_command(Command(Commands.SORT, LineRange(1, 2)))
+    assert app.timings is None
+
+
+def test_timing_command():
+    results = []
+    app = make_app(results, ["b", "a", "c"])
+    assert parse_command("TIMING off", 1, 3, headless=True) == Command(Commands.TIMING, phrases=Phrases(("off",)))
+
+    app.execute_command(Command(Commands.TIMING))
+    assert app.timings is not None
+    app.execute_command(Command(Commands.SORT, LineRange(1, 2)))
+    app.execute_command(Command(Commands.DELETE, LineRange(1, 0)))
+    assert app.timings.stats["SORT"].lines == 3
+    assert app.timings.stats["DELETE"].lines == 1
+
+    results.clear()
+    app.execute_command(Command(Commands.TIMING))
+    assert results[0].startswith("Command")
+    assert {row.split()[0] for row in results[1:]} == {"SORT", "DELETE"}
+
+    app.execute_command(Command(Commands.TIMING, phrases=Phrases(("RESET",))))
+    assert not app.timings.stats
+    app.execute_command(Command(Commands.TIMING, phrases=Phrases(("OFF",))))
+    assert app.timings is None
+
+
+def test_json_at_exit(tmp_path):
+    app = make_app(lines=["b", "a", "c"])
+    app.timings = CommandTimings()
+    app.timing_path = tmp_path / "timings.json"
+    app.execute_command(Command(Commands.REVERSE))
+    app.final_report()
+    assert json.loads(app.timing_path.read_text(encoding="utf-8"))["REVERSE"]["count"] == 1
@@ -0,0 +1,90 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from dedlin import StringCommandGenerator
+from dedlin.tools import tracing
+from tests.fakes import make_app
+
+
+def _spans(path: Path) -> list[dict]:
+    spans = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            request = json.loads(line)
+            spans.extend(request["resourceSpans"][0]["scopeSpans"][0]["spans"])
+    return spans
+
+
+def _attributes(span: dict) -> dict:
+    return {item["key"]: next(iter(item["value"].values())) for item in span["attributes"]}
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    tracing.start(path)
+    yield path
+    tracing.stop()
+
+
+def test_off_by_default():
+    assert tracing.TRACER is None
+    with tracing.span("anything", {"a": 1}) as span:
+        span.set("b", 2)
+    assert span is tracing.NULL_SPAN
+
+
+def test_span_records(trace_file):
+    with pytest.raises(ValueError):
+        with tracing.span("outer", {"count": 3, "ratio": 0.5, "flag": True, "name": "x"}):
+            with tracing.span("inner") as inner:
+                inner.set("late", "yes")
+            raise ValueError("boom")
+    tracing.stop()
+
+    inner, outer = _spans(trace_file)
+    assert inner["parentSpanId"] == outer["spanId"]
+    assert outer["parentSpanId"] == ""
+    assert inner["traceId"] == outer["traceId"]
+    assert int(outer["startTimeUnixNano"]) <= int(inner["startTimeUnixNano"])
+    assert int(inner["endTimeUnixNano"]) <= int(outer["endTimeUnixNano"])
+    assert outer["attributes"][0] == {"key": "count", "value": {"intValue": "3"}}
+    assert _attributes(outer) == {"count": "3", "ratio": 0.5, "flag": True, "name": "x"}
+    assert _attributes(inner) == {"late": "yes"}
+    assert outer["status"]["code"] == tracing.STATUS_CODE_ERROR
+    assert inner["status"] == {}
+
+
+def test_nested_macro_spans(tmp_path: Path, monkeypatch, trace_file):
+    monkeypatch.chdir(tmp_path)
+    document = tmp_path / "notes.txt"
+    document.write_text("beta\nalpha\n", encoding="utf-8")
+    (tmp_path / "parent.ed").write_text("MACRO child.ed\n", encoding="utf-8")
+    (tmp_path / "child.ed").write_text("1,2 SORT\n", encoding="utf-8")
+
+    make_app(path=document, inputter=StringCommandGenerator("MACRO parent.ed\nSAVE"))
+    tracing.stop()
+
+    spans = _spans(trace_file)
+    by_id = {span["spanId"]: span for span in spans}
+
+    def ancestry(span: dict) -> list[str]:
+        names = []
+        while span["parentSpanId"]:
+            span = by_id[span["parentSpanId"]]
+            names.append(span["name"])
+        return names
+
+    sort = next(span for span in spans if span["name"] == "SORT")
+    assert ancestry(sort) == ["macro", "MACRO", "macro", "MACRO"]
+    assert _attributes(sort)["dedlin.range.lines"] == "2"
+    assert _attributes(by_id[sort["parentSpanId"]])["dedlin.macro.path"] == str((tmp_path / "child.ed").resolve())
+    assert _attributes(by_id[sort["parentSpanId"]])["dedlin.macro.depth"] == "2"
+
+    save = next(span for span in spans if span["name"] == "SAVE")
+    write = next(span for span in spans if span["name"] == "file.write")
+    assert write["parentSpanId"] == save["spanId"]
+    read = next(span for span in spans if span["name"] == "file.read")
+    assert _attributes(read)["dedlin.file.lines"] == "2"
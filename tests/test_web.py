@@ -0,0 +1,106 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dedlin.tools import web
+
+PAGE = b"<html><body><h1>Walrus</h1><p>Walruses eat clams.</p>\n\n\n<p>They nap on ice.</p></body></html>"
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 19 Oct 2026 00:00:00 GMT"
+
+
+class Site(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    validator = "etag"
+    requests = []
+    not_modified = 0
+
+    def do_GET(self):
+        Site.requests.append((self.client_address, dict(self.headers)))
+        if (self.validator == "etag" and self.headers.get("If-None-Match") == ETAG) or (
+            self.validator == "last_modified" and self.headers.get("If-Modified-Since") == LAST_MODIFIED
+        ):
+            Site.not_modified += 1
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        if self.validator == "etag":
+            self.send_header("ETag", ETAG)
+        elif self.validator == "last_modified":
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(monkeypatch):
+    Site.requests = []
+    Site.validator = "etag"
+    Site.not_modified = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    monkeypatch.setattr(web, "_SESSION", None)
+    monkeypatch.setattr(web, "CACHE", None)
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/walrus.html"
+    finally:
+        web.session().close()
+        server.shutdown()
+        server.server_close()
+
+
+def test_page_as_rows(site):
+    assert web.fetch_page_as_rows(site) == ["# Walrus", "Walruses eat clams.", "They nap on ice."]
+
+
+def test_connection_is_reused(site):
+    web.fetch_page_as_rows(site)
+    web.fetch_page_as_rows(site)
+    assert len(Site.requests) == 2
+    assert Site.requests[0][0] == Site.requests[1][0]
+
+
+@pytest.mark.parametrize("validator", ["etag", "last_modified"])
+def test_unchanged_page_comes_from_the_cache(site, tmp_path, validator):
+    Site.validator = validator
+    web.start_cache(tmp_path / "pages")
+    first = web.fetch_page_as_rows(site)
+    assert "If-None-Match" not in Site.requests[0][1]
+
+    second = web.fetch_page_as_rows(site)
+    assert second == first
+    assert Site.not_modified == 1
+    headers = Site.requests[1][1]
+    if validator == "etag":
+        assert headers["If-None-Match"] == ETAG
+    else:
+        assert headers["If-Modified-Since"] == LAST_MODIFIED
+
+
+def test_pages_without_validators_are_not_cached(site, tmp_path):
+    Site.validator = None
+    cache = web.start_cache(tmp_path / "pages")
+    web.fetch_page_as_rows(site)
+    assert cache.get(site) is None
+
+
+def test_broken_cache_file_is_ignored(site, tmp_path):
+    cache = web.start_cache(tmp_path)
+    cache.path(site).write_text("{not json", encoding="utf-8")
+    assert web.fetch_page_as_rows(site)[0] == "# Walrus"
+    assert cache.get(site)["etag"] == ETAG
+
+
+def test_blank_lines_collapse_in_one_pass():
+    assert web.rows_from_text("a\n\n\n\nb\n \nc\n\n\n") == ["a", "b", "", "c"]
+    assert web.rows_from_text("\n\n") == []
+    assert web.html_to_rows(["<p>Wal", "rus</p>"]) == ["Walrus"]